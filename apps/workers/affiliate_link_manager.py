@@ -1,13 +1,20 @@
 # Created automatically by Cursor AI (2024-12-19)
 
-import logging
-from typing import Dict, List, Optional, Any
+import structlog
+from typing import Dict, List, Optional, Any, Tuple
+from collections import defaultdict
 from datetime import datetime, timedelta
-import requests
+import asyncio
+import re
 from celery import shared_task
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
-logger = logging.getLogger(__name__)
+from sqlalchemy import text
+
+from db import get_engine
+from link_health import LinkHealthChecker, LinkHealthCache, summarize_results
+
+logger = structlog.get_logger()
 
 
 @shared_task(bind=True, name='affiliate_link_manager.health_check')
@@ -22,69 +29,18 @@ def check_link_health(
     try:
         logger.info("Starting affiliate link health check", review_id=review_id)
         
-        results = []
-        for link in affiliate_links:
-            link_id = link.get('id')
-            url = link.get('url')
-            provider = link.get('provider')
-            
-            if not url:
-                continue
-                
-            try:
-                # Check if link is accessible
-                response = requests.head(url, timeout=10, allow_redirects=True)
-                is_healthy = response.status_code == 200
-                
-                # Check for common affiliate link patterns
-                parsed_url = urlparse(url)
-                has_affiliate_params = any(
-                    param in parse_qs(parsed_url.query) 
-                    for param in ['ref', 'aff', 'partner', 'tag', 'campaign']
-                )
-                
-                result = {
-                    'link_id': link_id,
-                    'url': url,
-                    'provider': provider,
-                    'is_healthy': is_healthy,
-                    'status_code': response.status_code,
-                    'has_affiliate_params': has_affiliate_params,
-                    'checked_at': datetime.utcnow().isoformat(),
-                    'response_time': response.elapsed.total_seconds()
-                }
-                
-                if not is_healthy:
-                    result['error'] = f"HTTP {response.status_code}"
-                    
-            except requests.RequestException as e:
-                result = {
-                    'link_id': link_id,
-                    'url': url,
-                    'provider': provider,
-                    'is_healthy': False,
-                    'error': str(e),
-                    'checked_at': datetime.utcnow().isoformat()
-                }
-            
-            results.append(result)
-            
-        healthy_count = sum(1 for r in results if r.get('is_healthy', False))
-        total_count = len(results)
+        results = asyncio.run(LinkHealthChecker(cache=LinkHealthCache()).check_links(affiliate_links))
+        summary = summarize_results(results)
         
         logger.info("Affiliate link health check completed", 
                    review_id=review_id, 
-                   healthy_count=healthy_count, 
-                   total_count=total_count)
+                   healthy_count=summary['healthy_count'], 
+                   total_count=summary['total_count'])
         
         return {
             'review_id': review_id,
             'results': results,
-            'summary': {
-                'healthy_count': healthy_count,
-                'total_count': total_count,
-                'health_percentage': (healthy_count / total_count * 100) if total_count > 0 else 0
-            }
+            'summary': summary
         }
         
     except Exception as e:
@@ -92,6 +48,67 @@ def check_link_health(
         raise self.retry(countdown=60, max_retries=3)
 
 
+@shared_task(bind=True, name='affiliate_link_manager.org_health_check')
+def check_org_link_health(self, org_id: str) -> Dict[str, Any]:
+    """
+    Check every enabled affiliate link across all reviews of an org in one pooled pass.
+    """
+    try:
+        logger.info("Starting org affiliate link health check", org_id=org_id)
+        
+        links = _fetch_links(org_id)
+        results = asyncio.run(LinkHealthChecker(cache=LinkHealthCache()).check_links(links))
+        
+        review_by_link = {link['id']: link['review_id'] for link in links}
+        results_by_review = defaultdict(list)
+        for result in results:
+            results_by_review[review_by_link[result['link_id']]].append(result)
+        
+        summary = summarize_results(results)
+        logger.info("Org affiliate link health check completed", 
+                   org_id=org_id, 
+                   reviews=len(results_by_review),
+                   healthy_count=summary['healthy_count'], 
+                   total_count=summary['total_count'])
+        
+        return {
+            'org_id': org_id,
+            'results': results,
+            'reviews': {
+                review_id: summarize_results(review_results)
+                for review_id, review_results in results_by_review.items()
+            },
+            'summary': summary
+        }
+        
+    except Exception as e:
+        logger.error("Error in org affiliate link health check", org_id=org_id, error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+
+@shared_task(bind=True, name='affiliate_link_manager.scheduled_health_check')
+def check_stale_link_health(self) -> Dict[str, Any]:
+    """
+    Periodic health check of every enabled affiliate link; only URLs whose
+    cached result has expired are probed.
+    """
+    try:
+        links = _fetch_links()
+        results = asyncio.run(LinkHealthChecker(cache=LinkHealthCache()).check_links(links))
+        summary = summarize_results(results)
+        
+        logger.info("Scheduled affiliate link health check completed", 
+                   total_count=summary['total_count'],
+                   cached_count=summary['cached_count'],
+                   healthy_count=summary['healthy_count'])
+        
+        return {'summary': summary, 'checked_at': datetime.utcnow().isoformat()}
+        
+    except Exception as e:
+        logger.error("Error in scheduled affiliate link health check", error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+
 @shared_task(bind=True, name='affiliate_link_manager.auto_insert')
 def auto_insert_affiliate_links(
     self,
@@ -115,58 +132,30 @@ def auto_insert_affiliate_links(
                     links_by_product[product_id] = []
                 links_by_product[product_id].append(link)
         
+        # Resolve each product's name and link once per task
+        products_by_name = {}
+        for product_id, links in links_by_product.items():
+            product_info = next((link.get('product_info', {}) for link in links), {})
+            product_name = product_info.get('name', '')
+            best_link = _select_best_link(links)
+            if product_name and best_link and product_name.lower() not in products_by_name:
+                products_by_name[product_name.lower()] = {
+                    'product_id': product_id,
+                    'product_name': product_name,
+                    'link': best_link,
+                    'link_html': _create_affiliate_link_html(best_link, product_name)
+                }
+        
+        pattern = _compile_product_pattern(list(products_by_name))
+        
         modified_sections = {}
         insertion_log = []
         
         for section_name, section_content in content_sections.items():
             if not isinstance(section_content, str):
                 continue
-                
-            modified_content = section_content
-            section_insertions = []
-            
-            # Find product mentions and insert links
-            for product_id, links in links_by_product.items():
-                product_info = next((link.get('product_info', {}) for link in links), {})
-                product_name = product_info.get('name', '')
-                
-                if not product_name:
-                    continue
-                
-                # Find best link for this product
-                best_link = _select_best_link(links)
-                if not best_link:
-                    continue
-                
-                # Insert link at first mention
-                if product_name.lower() in modified_content.lower():
-                    # Find the actual case of the product name
-                    import re
-                    pattern = re.compile(re.escape(product_name), re.IGNORECASE)
-                    match = pattern.search(modified_content)
-                    
-                    if match:
-                        start_pos = match.start()
-                        end_pos = match.end()
-                        
-                        # Create affiliate link HTML
-                        link_html = _create_affiliate_link_html(best_link, product_name)
-                        
-                        # Insert the link
-                        modified_content = (
-                            modified_content[:start_pos] + 
-                            link_html + 
-                            modified_content[end_pos:]
-                        )
-                        
-                        section_insertions.append({
-                            'product_id': product_id,
-                            'product_name': product_name,
-                            'link_id': best_link.get('id'),
-                            'position': start_pos,
-                            'link_text': link_html
-                        })
             
+            modified_content, section_insertions = _insert_links(section_content, pattern, products_by_name)
             modified_sections[section_name] = modified_content
             insertion_log.extend(section_insertions)
         
@@ -180,7 +169,9 @@ def auto_insert_affiliate_links(
             'insertion_log': insertion_log,
             'summary': {
                 'total_insertions': len(insertion_log),
-                'sections_modified': len([s for s in modified_sections.values() if s != content_sections.get(s, '')])
+                'sections_modified': sum(
+                    1 for name, content in modified_sections.items() if content != content_sections.get(name)
+                )
             }
         }
         
@@ -240,6 +231,89 @@ def generate_disclosure_blocks(
         raise self.retry(countdown=60, max_retries=3)
 
 
+def _fetch_links(org_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Enabled affiliate links of every review in an org (or in every org)."""
+    query = """
+        SELECT al.id, al.review_id, al.url, al.params->>'provider'
+        FROM affiliate_links al
+        JOIN reviews r ON r.id = al.review_id
+        WHERE al.enabled {org_filter}
+    """
+    with get_engine().connect() as conn:
+        if org_id:
+            rows = conn.execute(text(query.format(org_filter="AND r.org_id = :org_id")), {'org_id': org_id}).fetchall()
+        else:
+            rows = conn.execute(text(query.format(org_filter=""))).fetchall()
+    
+    return [
+        {'id': str(link_id), 'review_id': str(review_id), 'url': url, 'provider': provider}
+        for link_id, review_id, url, provider in rows
+    ]
+
+
+def _compile_product_pattern(product_names: List[str]) -> Optional[re.Pattern]:
+    """
+    One case-insensitive alternation of all product names, longest first so
+    "Notion AI" wins over "Notion"; names only match as whole words. Each
+    name is captured by group p<index in product_names>.
+    """
+    if not product_names:
+        return None
+    ordered = sorted(enumerate(product_names), key=lambda item: len(item[1]), reverse=True)
+    alternation = '|'.join(f"(?P<p{index}>{re.escape(name)})" for index, name in ordered)
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+
+def _insert_links(
+    content: str,
+    pattern: Optional[re.Pattern],
+    products_by_name: Dict[str, Dict[str, Any]]
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Link the first mention of each product in a single scan of the section."""
+    if pattern is None:
+        return content, []
+    
+    # Matches map back through their capture group: lowercasing the matched
+    # text need not give the name back (Kelvin sign, dotted I, ...)
+    products_by_group = {
+        pattern.groupindex[f"p{index}"]: product for index, product in enumerate(products_by_name.values())
+    }
+    parts = []
+    insertions = []
+    linked = set()
+    last_end = 0
+    output_length = 0
+    
+    for match in pattern.finditer(content):
+        product = products_by_group[match.lastindex]
+        if product['product_id'] in linked:
+            continue
+        linked.add(product['product_id'])
+        
+        preceding = content[last_end:match.start()]
+        parts.append(preceding)
+        parts.append(product['link_html'])
+        output_length += len(preceding)
+        
+        insertions.append({
+            'product_id': product['product_id'],
+            'product_name': product['product_name'],
+            'link_id': product['link'].get('id'),
+            'position': output_length,
+            'link_text': product['link_html']
+        })
+        
+        output_length += len(product['link_html'])
+        last_end = match.end()
+        if len(linked) == len(products_by_name):
+            break
+    
+    if not insertions:
+        return content, []
+    parts.append(content[last_end:])
+    return ''.join(parts), insertions
+
+
 def _select_best_link(links: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """Select the best affiliate link from a list of options."""
     if not links:
@@ -9,6 +9,8 @@ from collections import defaultdict, Counter
 import numpy as np
 from dataclasses import dataclass
 
+from llm import get_llm_usage
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,7 +56,7 @@ def collect_review_analytics(
         performance_metrics = _calculate_performance_metrics(performance_data)
         
         # Cost metrics
-        cost_metrics = _calculate_cost_metrics(performance_data)
+        cost_metrics = _calculate_cost_metrics(performance_data, get_llm_usage(review_id))
         
         # Quality metrics
         quality_metrics = _calculate_quality_metrics(claims, scores, sources)
@@ -292,8 +294,8 @@ def _calculate_performance_metrics(performance_data: Dict[str, Any]) -> Dict[str
     return metrics
 
 
-def _calculate_cost_metrics(performance_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Calculate cost-related metrics."""
+def _calculate_cost_metrics(performance_data: Dict[str, Any], llm_usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Calculate cost-related metrics, including recorded LLM usage."""
     metrics = {
         'total_cost': 0.0,
         'cost_per_review': 0.0,
@@ -302,13 +304,30 @@ def _calculate_cost_metrics(performance_data: Dict[str, Any]) -> Dict[str, Any]:
         'storage_cost': 0.0
     }
     
+    if llm_usage:
+        llm_tokens = llm_usage.get('prompt_tokens', 0) + llm_usage.get('completion_tokens', 0)
+        llm_calls = llm_usage.get('api_calls', 0)
+        metrics['total_cost'] += llm_usage.get('cost', 0.0)
+        metrics['token_usage'] += llm_tokens
+        metrics['api_calls'] += llm_calls
+        metrics['llm'] = {
+            'api_calls': llm_calls,
+            'tokens': llm_tokens,
+            'cost': round(llm_usage.get('cost', 0.0), 6),
+            'cache_hits': llm_usage.get('cache_hits', 0),
+            'coalesced_requests': llm_usage.get('coalesced', 0),
+            'cache_hit_rate': round(llm_usage.get('cache_hits', 0) / max(llm_calls + llm_usage.get('cache_hits', 0), 1), 3),
+            'avg_latency_ms': round(llm_usage.get('latency_ms', 0.0) / llm_calls, 1) if llm_calls else 0.0
+        }
+    
     if not performance_data:
+        metrics['cost_per_review'] = round(metrics['total_cost'], 2)
         return metrics
     
     # Extract cost data
-    metrics['total_cost'] = performance_data.get('total_cost', 0.0)
-    metrics['token_usage'] = performance_data.get('token_usage', 0)
-    metrics['api_calls'] = performance_data.get('api_calls', 0)
+    metrics['total_cost'] += performance_data.get('total_cost', 0.0)
+    metrics['token_usage'] += performance_data.get('token_usage', 0)
+    metrics['api_calls'] += performance_data.get('api_calls', 0)
     metrics['storage_cost'] = performance_data.get('storage_cost', 0.0)
     
     # Calculate cost per review
@@ -1,6 +1,7 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 from celery import Celery
+from celery.schedules import crontab
 import os
 
 # Celery configuration
@@ -13,11 +14,13 @@ celery_app = Celery(
         "workers.claim_extractor", 
         "workers.pricing_normalizer",
         "workers.criteria_planner",
+        "workers.criteria_recommender",
         "workers.scoring_engine",
         "workers.pros_cons_synthesizer",
         "workers.usecase_recommender",
         "workers.narrative_writer",
         "workers.seo_packager",
+        "workers.link_graph",
         "workers.exporter",
     ]
 )
@@ -34,5 +37,15 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    beat_schedule={
+        "rebuild-criteria-index-nightly": {
+            "task": "criteria_recommender.rebuild_criteria_index",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "check-stale-affiliate-links": {
+            "task": "affiliate_link_manager.scheduled_health_check",
+            "schedule": crontab(minute="*/15"),
+        },
+    },
 )
 
@@ -0,0 +1,11 @@
+from functools import lru_cache
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Process-wide SQLAlchemy engine (connections are pooled and created lazily)."""
+    return create_engine(settings.DATABASE_URL, pool_pre_ping=True, pool_size=5, max_overflow=5)
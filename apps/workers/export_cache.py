@@ -0,0 +1,124 @@
+import structlog
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import time
+
+from prometheus_client import Counter
+
+from config import settings
+from redis_client import get_redis
+from storage import ObjectStorage, get_storage
+
+logger = structlog.get_logger()
+
+EXPORT_CACHE_LOOKUPS = Counter(
+    'export_cache_lookups_total',
+    'Export cache lookups by format and result (hit or miss)',
+    ['format', 'result']
+)
+EXPORT_CACHE_EVICTIONS = Counter(
+    'export_cache_evictions_total',
+    'Cached export objects deleted by LRU eviction'
+)
+EXPORT_CACHE_UNTRACKED = Counter(
+    'export_cache_untracked_total',
+    'Uploaded exports that could not be recorded in the cache index, so LRU eviction never deletes them'
+)
+
+LRU_INDEX_KEY = "export_cache:lru"
+EVICTED_INDEX_KEY = "export_cache:evicted"
+
+
+def export_cache_key(fmt: str, payload: Dict[str, Any], renderer_version: int) -> str:
+    """Hash of the canonicalized export inputs; any change to them is a new export."""
+    canonical = json.dumps(
+        {'format': fmt, 'renderer_version': renderer_version, **payload},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """
+    Rendered exports shared across workers, keyed by content hash.
+
+    Objects stay in object storage under their content-addressed key. Redis
+    keeps each entry's result metadata and a sorted set of entries scored by
+    last access; once it holds more than max_entries, the least recently
+    used entries are dropped. Their objects are only deleted from storage
+    after delete_grace seconds (the download URL lifetime), so URLs already
+    handed out and bundles about to read the object keep working. A Redis
+    outage only costs re-rendering.
+    """
+
+    def __init__(self, storage: Optional[ObjectStorage] = None, store=None, max_entries: Optional[int] = None,
+                 delete_grace: Optional[float] = None):
+        self.storage = storage if storage is not None else get_storage()
+        self.store = store if store is not None else get_redis()
+        self.max_entries = max_entries or settings.EXPORT_CACHE_MAX_ENTRIES
+        self.delete_grace = settings.EXPORT_URL_TTL_SECONDS if delete_grace is None else delete_grace
+
+    def get(self, fmt: str, file_key: str) -> Optional[Dict[str, Any]]:
+        """Stored result for an export object, or None when it has to be rendered."""
+        entry = None
+        try:
+            stored = self.store.get(_entry_key(file_key))
+            if stored is not None and self.storage.exists(file_key):
+                entry = json.loads(stored)
+                # xx: a lookup racing an eviction must not put the key back into the index
+                self.store.zadd(LRU_INDEX_KEY, {file_key: time.time()}, xx=True)
+        except Exception as e:
+            logger.warning("Could not read export cache", file_key=file_key, error=str(e))
+
+        EXPORT_CACHE_LOOKUPS.labels(format=fmt, result='hit' if entry is not None else 'miss').inc()
+        return entry
+
+    def set(self, file_key: str, entry: Dict[str, Any]) -> None:
+        """Record a freshly uploaded export, evict beyond the size bound and delete expired evictions."""
+        try:
+            pipe = self.store.pipeline()
+            pipe.set(_entry_key(file_key), json.dumps(entry))
+            pipe.zadd(LRU_INDEX_KEY, {file_key: time.time()})
+            # Re-uploaded after an eviction: the pending delete would remove the new object
+            pipe.zrem(EVICTED_INDEX_KEY, file_key)
+            pipe.zcard(LRU_INDEX_KEY)
+            size = pipe.execute()[-1]
+        except Exception as e:
+            EXPORT_CACHE_UNTRACKED.inc()
+            logger.warning("Could not record export in cache, it will not be evicted", file_key=file_key, error=str(e))
+            return
+
+        try:
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+            self._delete_evicted()
+        except Exception as e:
+            logger.warning("Could not evict cached exports", error=str(e))
+
+    def _evict(self, count: int) -> None:
+        now = time.time()
+        for file_key in self.store.zrange(LRU_INDEX_KEY, 0, count - 1):
+            # Lookups stop finding the entry now; the object outlives the URLs already handed out
+            self.store.delete(_entry_key(file_key))
+            self.store.zrem(LRU_INDEX_KEY, file_key)
+            self.store.zadd(EVICTED_INDEX_KEY, {file_key: now})
+        logger.info("Evicted cached exports", count=count)
+
+    def _delete_evicted(self) -> None:
+        expired = self.store.zrangebyscore(EVICTED_INDEX_KEY, '-inf', time.time() - self.delete_grace)
+        for file_key in expired:
+            if self.store.zrem(EVICTED_INDEX_KEY, file_key):
+                self.storage.delete(file_key)
+                EXPORT_CACHE_EVICTIONS.inc()
+        if expired:
+            logger.info("Deleted evicted exports", count=len(expired))
+
+
+def _entry_key(file_key: str) -> str:
+    return f"export_cache:entry:{file_key}"
+
+
+def get_export_cache(storage: Optional[ObjectStorage] = None) -> ExportCache:
+    """Default export cache for workers."""
+    return ExportCache(storage)
@@ -1,23 +1,62 @@
 # Created automatically by Cursor AI (2024-12-19)
 
-import logging
-from typing import Dict, List, Optional, Any
+import structlog
+from typing import BinaryIO, Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
-import json
+from functools import lru_cache
 import io
-from celery import shared_task
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from celery import chord, group, shared_task
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab import rl_config
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFBase85Encode, PDFDictionary, PDFName, PDFStream, PDFZCompress
+from reportlab.pdfgen import canvas
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-import boto3
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 from botocore.exceptions import ClientError
+from prometheus_client import Histogram
+
+from config import settings
+from export_cache import export_cache_key, get_export_cache
+from storage import get_storage
 
-logger = logging.getLogger(__name__)
+logger = structlog.get_logger()
+
+EXPORT_RENDER_SECONDS = Histogram(
+    'export_render_cpu_seconds',
+    'CPU time spent rendering one export, by format',
+    ['format'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+# Bump whenever rendered output changes so cached exports are not reused
+RENDERER_VERSION = 3
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+# Comparison rows per PDF table, about one A4 page
+PDF_TABLE_CHUNK_ROWS = 35
+# Flowables held ahead of the layout; enough for any keep-with-next chain
+PDF_STORY_LOOKAHEAD = 4
+COMPARISON_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
 
 
 @shared_task(bind=True, name='exporter.export_pdf')
@@ -33,118 +72,11 @@ def export_review_pdf(
     try:
         logger.info("Starting PDF export", review_id=review_id)
         
-        # Create PDF document
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        title = Paragraph(review_data.get('title', 'Product Review'), title_style)
-        story.append(title)
-        story.append(Spacer(1, 20))
+        result = _export_format('pdf', review_id, review_data, export_config)
         
-        # Executive Summary
-        if 'executive_summary' in review_data.get('sections', {}):
-            story.append(Paragraph("Executive Summary", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            summary_text = review_data['sections']['executive_summary'].get('content', '')
-            story.append(Paragraph(summary_text, styles['Normal']))
-            story.append(Spacer(1, 20))
+        logger.info("PDF export completed", review_id=review_id, file_key=result['file_key'], cached=result['cached'])
         
-        # Product Comparison Table
-        if 'products' in review_data:
-            story.append(Paragraph("Product Comparison", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            
-            products = review_data['products']
-            if products:
-                # Create table data
-                table_data = [['Product', 'Score', 'Price', 'Rank']]
-                for product in products:
-                    table_data.append([
-                        product.get('name', ''),
-                        f"{product.get('score', 0):.2f}",
-                        f"${product.get('price', 0)}",
-                        f"#{product.get('rank', 0)}"
-                    ])
-                
-                # Create table
-                table = Table(table_data, colWidths=[3*inch, 1*inch, 1*inch, 0.8*inch])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(table)
-                story.append(Spacer(1, 20))
-        
-        # Detailed Analysis
-        if 'detailed_analysis' in review_data.get('sections', {}):
-            story.append(Paragraph("Detailed Analysis", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            analysis_text = review_data['sections']['detailed_analysis'].get('content', '')
-            story.append(Paragraph(analysis_text, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        # Pros and Cons
-        if 'pros' in review_data or 'cons' in review_data:
-            story.append(Paragraph("Pros and Cons", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            
-            if 'pros' in review_data:
-                story.append(Paragraph("Pros:", styles['Heading3']))
-                for pro in review_data['pros']:
-                    story.append(Paragraph(f"• {pro.get('title', '')}", styles['Normal']))
-                story.append(Spacer(1, 12))
-            
-            if 'cons' in review_data:
-                story.append(Paragraph("Cons:", styles['Heading3']))
-                for con in review_data['cons']:
-                    story.append(Paragraph(f"• {con.get('title', '')}", styles['Normal']))
-                story.append(Spacer(1, 20))
-        
-        # Conclusion
-        if 'conclusion' in review_data.get('sections', {}):
-            story.append(Paragraph("Conclusion", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            conclusion_text = review_data['sections']['conclusion'].get('content', '')
-            story.append(Paragraph(conclusion_text, styles['Normal']))
-        
-        # Build PDF
-        doc.build(story)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        # Upload to S3/MinIO
-        file_key = f"exports/{review_id}/review_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
-        upload_success = _upload_to_storage(pdf_content, file_key, 'application/pdf')
-        
-        logger.info("PDF export completed", review_id=review_id, file_key=file_key)
-        
-        return {
-            'review_id': review_id,
-            'format': 'pdf',
-            'file_key': file_key,
-            'file_size': len(pdf_content),
-            'upload_success': upload_success,
-            'metadata': {
-                'exported_at': datetime.utcnow().isoformat(),
-                'pages': len(story) // 2  # Rough estimate
-            }
-        }
+        return result
         
     except Exception as e:
         logger.error("Error in PDF export", review_id=review_id, error=str(e))
@@ -164,92 +96,11 @@ def export_review_word(
     try:
         logger.info("Starting Word export", review_id=review_id)
         
-        # Create Word document
-        doc = Document()
-        
-        # Title
-        title = doc.add_heading(review_data.get('title', 'Product Review'), 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Executive Summary
-        if 'executive_summary' in review_data.get('sections', {}):
-            doc.add_heading('Executive Summary', level=1)
-            summary_text = review_data['sections']['executive_summary'].get('content', '')
-            doc.add_paragraph(summary_text)
-        
-        # Product Comparison Table
-        if 'products' in review_data:
-            doc.add_heading('Product Comparison', level=1)
-            
-            products = review_data['products']
-            if products:
-                table = doc.add_table(rows=1, cols=4)
-                table.style = 'Table Grid'
-                
-                # Header row
-                header_cells = table.rows[0].cells
-                header_cells[0].text = 'Product'
-                header_cells[1].text = 'Score'
-                header_cells[2].text = 'Price'
-                header_cells[3].text = 'Rank'
-                
-                # Data rows
-                for product in products:
-                    row_cells = table.add_row().cells
-                    row_cells[0].text = product.get('name', '')
-                    row_cells[1].text = f"{product.get('score', 0):.2f}"
-                    row_cells[2].text = f"${product.get('price', 0)}"
-                    row_cells[3].text = f"#{product.get('rank', 0)}"
-        
-        # Detailed Analysis
-        if 'detailed_analysis' in review_data.get('sections', {}):
-            doc.add_heading('Detailed Analysis', level=1)
-            analysis_text = review_data['sections']['detailed_analysis'].get('content', '')
-            doc.add_paragraph(analysis_text)
-        
-        # Pros and Cons
-        if 'pros' in review_data or 'cons' in review_data:
-            doc.add_heading('Pros and Cons', level=1)
-            
-            if 'pros' in review_data:
-                doc.add_heading('Pros:', level=2)
-                for pro in review_data['pros']:
-                    doc.add_paragraph(pro.get('title', ''), style='List Bullet')
-            
-            if 'cons' in review_data:
-                doc.add_heading('Cons:', level=2)
-                for con in review_data['cons']:
-                    doc.add_paragraph(con.get('title', ''), style='List Bullet')
-        
-        # Conclusion
-        if 'conclusion' in review_data.get('sections', {}):
-            doc.add_heading('Conclusion', level=1)
-            conclusion_text = review_data['sections']['conclusion'].get('content', '')
-            doc.add_paragraph(conclusion_text)
+        result = _export_format('docx', review_id, review_data, export_config)
         
-        # Save to buffer
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        docx_content = buffer.getvalue()
-        buffer.close()
+        logger.info("Word export completed", review_id=review_id, file_key=result['file_key'], cached=result['cached'])
         
-        # Upload to S3/MinIO
-        file_key = f"exports/{review_id}/review_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.docx"
-        upload_success = _upload_to_storage(docx_content, file_key, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        
-        logger.info("Word export completed", review_id=review_id, file_key=file_key)
-        
-        return {
-            'review_id': review_id,
-            'format': 'docx',
-            'file_key': file_key,
-            'file_size': len(docx_content),
-            'upload_success': upload_success,
-            'metadata': {
-                'exported_at': datetime.utcnow().isoformat(),
-                'sections': len(doc.paragraphs)
-            }
-        }
+        return result
         
     except Exception as e:
         logger.error("Error in Word export", review_id=review_id, error=str(e))
@@ -269,26 +120,11 @@ def export_review_html(
     try:
         logger.info("Starting HTML export", review_id=review_id)
         
-        # Generate HTML content
-        html_content = _generate_html_content(review_data, export_config)
+        result = _export_format('html', review_id, review_data, export_config)
         
-        # Upload to S3/MinIO
-        file_key = f"exports/{review_id}/review_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.html"
-        upload_success = _upload_to_storage(html_content.encode('utf-8'), file_key, 'text/html')
+        logger.info("HTML export completed", review_id=review_id, file_key=result['file_key'], cached=result['cached'])
         
-        logger.info("HTML export completed", review_id=review_id, file_key=file_key)
-        
-        return {
-            'review_id': review_id,
-            'format': 'html',
-            'file_key': file_key,
-            'file_size': len(html_content),
-            'upload_success': upload_success,
-            'metadata': {
-                'exported_at': datetime.utcnow().isoformat(),
-                'include_styles': export_config.get('include_styles', True)
-            }
-        }
+        return result
         
     except Exception as e:
         logger.error("Error in HTML export", review_id=review_id, error=str(e))
@@ -308,252 +144,494 @@ def export_review_json(
     try:
         logger.info("Starting JSON export", review_id=review_id)
         
-        # Prepare JSON data
-        json_data = {
-            'review_id': review_id,
-            'exported_at': datetime.utcnow().isoformat(),
-            'review': review_data,
-            'export_config': export_config
-        }
+        result = _export_format('json', review_id, review_data, export_config)
         
-        # Convert to JSON string
-        json_content = json.dumps(json_data, indent=2, ensure_ascii=False)
+        logger.info("JSON export completed", review_id=review_id, file_key=result['file_key'], cached=result['cached'])
         
-        # Upload to S3/MinIO
-        file_key = f"exports/{review_id}/review_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-        upload_success = _upload_to_storage(json_content.encode('utf-8'), file_key, 'application/json')
+        return result
         
-        logger.info("JSON export completed", review_id=review_id, file_key=file_key)
+    except Exception as e:
+        logger.error("Error in JSON export", review_id=review_id, error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+
+@shared_task(bind=True, name='exporter.export_bundle')
+def export_review_bundle(
+    self,
+    review_id: str,
+    review_data: Dict[str, Any],
+    export_config: Dict[str, Any],
+    formats: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Export review to several formats at once as a single ZIP bundle.
+    
+    Each format renders as its own export task, so formats spread over the
+    worker pool instead of sharing one worker process, and a format that was
+    already exported comes from the export cache. This task is replaced by a
+    chord whose callback streams the stored formats into the ZIP, so its
+    result is the bundle's.
+    """
+    # Retrying can't fix the request, so this fails outright
+    formats = formats or list(EXPORT_FORMATS)
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported export formats: {unknown}")
+    
+    try:
+        logger.info("Starting bundle export", review_id=review_id, formats=formats)
+        
+        cache = get_export_cache(get_storage())
+        file_key = _export_key(review_id, 'zip', review_data, export_config, formats)
+        cached = cache.get('zip', file_key)
+        if cached is not None:
+            logger.info("Bundle export served from cache", review_id=review_id, file_key=file_key)
+            return _export_result(review_id, 'zip', file_key, cached, cached=True)
+        
+        parts = group(EXPORT_FORMATS[fmt]['task'].s(review_id, review_data, export_config) for fmt in formats)
+        assemble = assemble_review_bundle.s(review_id, file_key, time.time())
         
-        return {
-            'review_id': review_id,
-            'format': 'json',
-            'file_key': file_key,
-            'file_size': len(json_content),
-            'upload_success': upload_success,
+    except Exception as e:
+        logger.error("Error in bundle export", review_id=review_id, error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+    
+    return self.replace(chord(parts, assemble))
+
+
+@shared_task(bind=True, name='exporter.assemble_bundle')
+def assemble_review_bundle(
+    self,
+    parts: List[Dict[str, Any]],
+    review_id: str,
+    file_key: str,
+    started_at: float
+) -> Dict[str, Any]:
+    """
+    Chord callback of a bundle export: stream every exported format from
+    storage into the ZIP, which is written straight back to storage in
+    multipart chunks, so neither the formats nor the bundle are held in memory.
+    """
+    # The chord's part results never change, so retrying can't fix a failed part
+    failed = [part['format'] for part in parts if not part['upload_success']]
+    if failed:
+        logger.error("Bundle formats failed to upload", review_id=review_id, formats=failed)
+        raise RuntimeError(f"Bundle formats failed to upload: {failed}")
+    
+    try:
+        storage = get_storage()
+        files = []
+        with storage.open_writer(file_key, 'application/zip') as upload:
+            with zipfile.ZipFile(upload, 'w') as bundle:
+                for part in parts:
+                    fmt = part['format']
+                    name = f"review.{EXPORT_FORMATS[fmt]['extension']}"
+                    member = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                    member.compress_type = EXPORT_FORMATS[fmt]['compression']
+                    with storage.open_reader(part['file_key']) as source, bundle.open(member, 'w') as target:
+                        shutil.copyfileobj(source, target)
+                    files.append({'format': fmt, 'name': name, 'file_size': part['file_size'], 'metadata': part['metadata']})
+            bundle_size = upload.tell()
+        
+        render_seconds = round(time.time() - started_at, 3)
+        entry = {
+            'file_size': bundle_size,
+            'files': files,
             'metadata': {
                 'exported_at': datetime.utcnow().isoformat(),
-                'data_keys': list(review_data.keys())
+                'duration_seconds': render_seconds
             }
         }
+        get_export_cache(storage).set(file_key, entry)
+        logger.info("Bundle export completed", review_id=review_id, file_key=file_key, seconds=render_seconds)
+        
+        return _export_result(review_id, 'zip', file_key, entry, cached=False)
         
     except Exception as e:
-        logger.error("Error in JSON export", review_id=review_id, error=str(e))
+        logger.error("Error assembling bundle export", review_id=review_id, error=str(e))
         raise self.retry(countdown=60, max_retries=3)
 
 
-def _generate_html_content(review_data: Dict[str, Any], export_config: Dict[str, Any]) -> str:
-    """Generate HTML content for the review."""
-    include_styles = export_config.get('include_styles', True)
+def _render_pdf(review_id: str, review_data: Dict[str, Any], export_config: Dict[str, Any], out: BinaryIO) -> Dict[str, Any]:
+    """Render the review as PDF into out."""
+    doc = SimpleDocTemplate(out, pagesize=A4)
+    doc.build(_LazyStory(_pdf_story(review_data, _pdf_styles())), canvasmaker=_CompactCanvas)
     
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{review_data.get('title', 'Product Review')}</title>
-        {_get_html_styles() if include_styles else ''}
-    </head>
-    <body>
-        <div class="container">
-            <h1 class="title">{review_data.get('title', 'Product Review')}</h1>
-    """
+    return {'pages': doc.page}
+
+
+def _pdf_story(review_data: Dict[str, Any], styles: Dict[str, ParagraphStyle]) -> Iterator[Flowable]:
+    """Flowables of the review in reading order, produced on demand."""
+    # Title
+    yield Paragraph(review_data.get('title', 'Product Review'), styles['title'])
+    yield Spacer(1, 20)
     
     # Executive Summary
     if 'executive_summary' in review_data.get('sections', {}):
-        html += f"""
-            <section class="section">
-                <h2>Executive Summary</h2>
-                <p>{review_data['sections']['executive_summary'].get('content', '')}</p>
-            </section>
-        """
+        yield Paragraph("Executive Summary", styles['heading2'])
+        yield Spacer(1, 12)
+        summary_text = review_data['sections']['executive_summary'].get('content', '')
+        yield Paragraph(summary_text, styles['normal'])
+        yield Spacer(1, 20)
     
     # Product Comparison Table
     if 'products' in review_data:
-        html += """
-            <section class="section">
-                <h2>Product Comparison</h2>
-                <table class="comparison-table">
-                    <thead>
-                        <tr>
-                            <th>Product</th>
-                            <th>Score</th>
-                            <th>Price</th>
-                            <th>Rank</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-        """
-        
-        for product in review_data['products']:
-            html += f"""
-                        <tr>
-                            <td>{product.get('name', '')}</td>
-                            <td>{product.get('score', 0):.2f}</td>
-                            <td>${product.get('price', 0)}</td>
-                            <td>#{product.get('rank', 0)}</td>
-                        </tr>
-            """
-        
-        html += """
-                    </tbody>
-                </table>
-            </section>
-        """
+        yield Paragraph("Product Comparison", styles['heading2'])
+        yield Spacer(1, 12)
+        
+        products = review_data['products']
+        if products:
+            # Page-sized tables: reportlab re-lays out the unsplit remainder of
+            # a table on every page break, which grows quadratically with rows
+            yield from _comparison_tables(products)
+            yield Spacer(1, 20)
     
     # Detailed Analysis
     if 'detailed_analysis' in review_data.get('sections', {}):
-        html += f"""
-            <section class="section">
-                <h2>Detailed Analysis</h2>
-                <p>{review_data['sections']['detailed_analysis'].get('content', '')}</p>
-            </section>
-        """
+        yield Paragraph("Detailed Analysis", styles['heading2'])
+        yield Spacer(1, 12)
+        analysis_text = review_data['sections']['detailed_analysis'].get('content', '')
+        yield Paragraph(analysis_text, styles['normal'])
+        yield Spacer(1, 20)
     
     # Pros and Cons
     if 'pros' in review_data or 'cons' in review_data:
-        html += """
-            <section class="section">
-                <h2>Pros and Cons</h2>
-        """
+        yield Paragraph("Pros and Cons", styles['heading2'])
+        yield Spacer(1, 12)
         
         if 'pros' in review_data:
-            html += """
-                <div class="pros-cons">
-                    <h3>Pros:</h3>
-                    <ul>
-            """
+            yield Paragraph("Pros:", styles['heading3'])
             for pro in review_data['pros']:
-                html += f"<li>{pro.get('title', '')}</li>"
-            html += "</ul></div>"
+                yield Paragraph(f"• {pro.get('title', '')}", styles['normal'])
+            yield Spacer(1, 12)
         
         if 'cons' in review_data:
-            html += """
-                <div class="pros-cons">
-                    <h3>Cons:</h3>
-                    <ul>
-            """
+            yield Paragraph("Cons:", styles['heading3'])
             for con in review_data['cons']:
-                html += f"<li>{con.get('title', '')}</li>"
-            html += "</ul></div>"
-        
-        html += "</section>"
+                yield Paragraph(f"• {con.get('title', '')}", styles['normal'])
+            yield Spacer(1, 20)
     
     # Conclusion
     if 'conclusion' in review_data.get('sections', {}):
-        html += f"""
-            <section class="section">
-                <h2>Conclusion</h2>
-                <p>{review_data['sections']['conclusion'].get('content', '')}</p>
-            </section>
-        """
+        yield Paragraph("Conclusion", styles['heading2'])
+        yield Spacer(1, 12)
+        conclusion_text = review_data['sections']['conclusion'].get('content', '')
+        yield Paragraph(conclusion_text, styles['normal'])
+
+
+class _CompactCanvas(canvas.Canvas):
+    """
+    Canvas that encodes each page's content stream as soon as the page is
+    finished. reportlab keeps every page until save(), by default as
+    uncompressed operator text; encoded, a finished page costs about what it
+    adds to the output file.
     
-    html += """
-        </div>
-    </body>
-    </html>
+    This rewrites reportlab page internals (Pages.pages, page.stream,
+    page.compression), so reportlab is pinned and a test checks that the
+    output is byte-identical to reportlab's own before a version bump.
     """
     
-    return html
-
-
-def _get_html_styles() -> str:
-    """Get CSS styles for HTML export."""
-    return """
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 40px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }
-        .title {
-            text-align: center;
-            color: #333;
-            border-bottom: 3px solid #007bff;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }
-        .section {
-            margin-bottom: 30px;
-        }
-        .section h2 {
-            color: #007bff;
-            border-left: 4px solid #007bff;
-            padding-left: 15px;
-        }
-        .section h3 {
-            color: #555;
-            margin-top: 20px;
-        }
-        .comparison-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-        }
-        .comparison-table th,
-        .comparison-table td {
-            border: 1px solid #ddd;
-            padding: 12px;
-            text-align: left;
-        }
-        .comparison-table th {
-            background-color: #007bff;
-            color: white;
-            font-weight: bold;
-        }
-        .comparison-table tr:nth-child(even) {
-            background-color: #f9f9f9;
-        }
-        .pros-cons {
-            margin: 20px 0;
-        }
-        .pros-cons ul {
-            margin: 10px 0;
-            padding-left: 20px;
-        }
-        .pros-cons li {
-            margin: 5px 0;
-        }
-    </style>
+    def showPage(self) -> None:
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.stream and page.compression:
+            # Same filters save() would apply; a stream that already names
+            # its filters is written as-is
+            filters = [PDFBase85Encode, PDFZCompress] if rl_config.useA85 else [PDFZCompress]
+            content = page.stream
+            for stream_filter in reversed(filters):
+                content = stream_filter.encode(content)
+            page.Contents = PDFStream(
+                dictionary=PDFDictionary({'Filter': PDFArray([PDFName(f.pdfname) for f in filters])}),
+                content=content
+            )
+            page.Contents.__Comment__ = "page stream"
+            page.stream = None
+
+
+class _LazyStory(list):
+    """
+    Story list that pulls flowables from an iterator as reportlab consumes them.
+    
+    doc.build() only ever removes flowables from the front (del story[0] or
+    del story[:i]), so refilling there keeps a short lookahead in memory
+    instead of the whole document.
     """
+    
+    def __init__(self, flowables: Iterator[Flowable], lookahead: int = PDF_STORY_LOOKAHEAD):
+        super().__init__()
+        self._flowables = flowables
+        self._lookahead = lookahead
+        self._fill()
+    
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._fill()
+    
+    def _fill(self) -> None:
+        while len(self) < self._lookahead:
+            flowable = next(self._flowables, None)
+            if flowable is None:
+                return
+            self.append(flowable)
 
 
-def _upload_to_storage(content: bytes, file_key: str, content_type: str) -> bool:
-    """Upload file to S3/MinIO storage."""
-    try:
-        # Configure S3 client (works with MinIO too)
-        s3_client = boto3.client(
-            's3',
-            endpoint_url='http://localhost:9000',  # MinIO endpoint
-            aws_access_key_id='minioadmin',
-            aws_secret_access_key='minioadmin',
-            region_name='us-east-1'
-        )
+def _comparison_tables(products: List[Dict[str, Any]]) -> Iterator[Table]:
+    """Product comparison as consecutive tables of at most PDF_TABLE_CHUNK_ROWS rows, each with the header."""
+    for start in range(0, len(products), PDF_TABLE_CHUNK_ROWS):
+        table_data = [['Product', 'Score', 'Price', 'Rank']]
+        for product in products[start:start + PDF_TABLE_CHUNK_ROWS]:
+            table_data.append([
+                product.get('name', ''),
+                f"{product.get('score', 0):.2f}",
+                f"${product.get('price', 0)}",
+                f"#{product.get('rank', 0)}"
+            ])
+        
+        table = Table(table_data, colWidths=[3*inch, 1*inch, 1*inch, 0.8*inch], repeatRows=1)
+        table.setStyle(COMPARISON_TABLE_STYLE)
+        yield table
+
+
+def _render_docx(review_id: str, review_data: Dict[str, Any], export_config: Dict[str, Any], out: BinaryIO) -> Dict[str, Any]:
+    """Render the review as a Word document into out."""
+    doc = Document(io.BytesIO(_docx_template()))
+    
+    # Title
+    title = doc.add_heading(review_data.get('title', 'Product Review'), 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Executive Summary
+    if 'executive_summary' in review_data.get('sections', {}):
+        doc.add_heading('Executive Summary', level=1)
+        summary_text = review_data['sections']['executive_summary'].get('content', '')
+        doc.add_paragraph(summary_text)
+    
+    # Product Comparison Table
+    if 'products' in review_data:
+        doc.add_heading('Product Comparison', level=1)
+        
+        products = review_data['products']
+        if products:
+            table = doc.add_table(rows=1, cols=4)
+            table.style = 'Table Grid'
+            
+            # Header row
+            header_cells = table.rows[0].cells
+            header_cells[0].text = 'Product'
+            header_cells[1].text = 'Score'
+            header_cells[2].text = 'Price'
+            header_cells[3].text = 'Rank'
+            
+            # Data rows
+            for product in products:
+                row_cells = table.add_row().cells
+                row_cells[0].text = product.get('name', '')
+                row_cells[1].text = f"{product.get('score', 0):.2f}"
+                row_cells[2].text = f"${product.get('price', 0)}"
+                row_cells[3].text = f"#{product.get('rank', 0)}"
+    
+    # Detailed Analysis
+    if 'detailed_analysis' in review_data.get('sections', {}):
+        doc.add_heading('Detailed Analysis', level=1)
+        analysis_text = review_data['sections']['detailed_analysis'].get('content', '')
+        doc.add_paragraph(analysis_text)
+    
+    # Pros and Cons
+    if 'pros' in review_data or 'cons' in review_data:
+        doc.add_heading('Pros and Cons', level=1)
         
-        # Upload file
-        s3_client.put_object(
-            Bucket='product-review-crew',
-            Key=file_key,
-            Body=content,
-            ContentType=content_type
-        )
+        if 'pros' in review_data:
+            doc.add_heading('Pros:', level=2)
+            for pro in review_data['pros']:
+                doc.add_paragraph(pro.get('title', ''), style='List Bullet')
         
+        if 'cons' in review_data:
+            doc.add_heading('Cons:', level=2)
+            for con in review_data['cons']:
+                doc.add_paragraph(con.get('title', ''), style='List Bullet')
+    
+    # Conclusion
+    if 'conclusion' in review_data.get('sections', {}):
+        doc.add_heading('Conclusion', level=1)
+        conclusion_text = review_data['sections']['conclusion'].get('content', '')
+        doc.add_paragraph(conclusion_text)
+    
+    doc.save(out)
+    
+    return {'sections': len(doc.paragraphs)}
+
+
+def _render_html(review_id: str, review_data: Dict[str, Any], export_config: Dict[str, Any], out: BinaryIO) -> Dict[str, Any]:
+    """Render the review as HTML into out."""
+    out.write(_generate_html_content(review_data, export_config).encode('utf-8'))
+    return {'include_styles': export_config.get('include_styles', True)}
+
+
+def _render_json(review_id: str, review_data: Dict[str, Any], export_config: Dict[str, Any], out: BinaryIO) -> Dict[str, Any]:
+    """Render the review as JSON into out."""
+    json_data = {
+        'review_id': review_id,
+        'exported_at': datetime.utcnow().isoformat(),
+        'review': review_data,
+        'export_config': export_config
+    }
+    out.write(json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8'))
+    return {'data_keys': list(review_data.keys())}
+
+
+# PDF and DOCX are already compressed, so the bundle stores them as-is
+EXPORT_FORMATS = {
+    'pdf': {'render': _render_pdf, 'task': export_review_pdf, 'extension': 'pdf', 'content_type': 'application/pdf', 'compression': zipfile.ZIP_STORED},
+    'docx': {
+        'render': _render_docx,
+        'task': export_review_word,
+        'extension': 'docx',
+        'content_type': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'compression': zipfile.ZIP_STORED
+    },
+    'html': {'render': _render_html, 'task': export_review_html, 'extension': 'html', 'content_type': 'text/html', 'compression': zipfile.ZIP_DEFLATED},
+    'json': {'render': _render_json, 'task': export_review_json, 'extension': 'json', 'content_type': 'application/json', 'compression': zipfile.ZIP_DEFLATED},
+}
+
+
+def _export_format(fmt: str, review_id: str, review_data: Dict[str, Any], export_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Render and upload one format, unless an identical export is already stored."""
+    cache = get_export_cache(get_storage())
+    file_key = _export_key(review_id, fmt, review_data, export_config)
+    cached = cache.get(fmt, file_key)
+    if cached is not None:
+        return _export_result(review_id, fmt, file_key, cached, cached=True)
+    
+    # Small exports stay in memory; large ones roll over to disk and are
+    # uploaded from there in multipart chunks
+    with tempfile.SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_BYTES) as spool:
+        metadata, cpu_seconds = _render(fmt, review_id, review_data, export_config, spool)
+        EXPORT_RENDER_SECONDS.labels(format=fmt).observe(cpu_seconds)
+        file_size = spool.tell()
+        spool.seek(0)
+        upload_success = _upload_to_storage(spool, file_key, EXPORT_FORMATS[fmt]['content_type'])
+    
+    entry = {
+        'file_size': file_size,
+        'metadata': {
+            'exported_at': datetime.utcnow().isoformat(),
+            **metadata
+        }
+    }
+    if upload_success:
+        cache.set(file_key, entry)
+    
+    return _export_result(review_id, fmt, file_key, entry, cached=False, upload_success=upload_success)
+
+
+def _export_result(
+    review_id: str,
+    fmt: str,
+    file_key: str,
+    entry: Dict[str, Any],
+    cached: bool,
+    upload_success: bool = True
+) -> Dict[str, Any]:
+    return {
+        'review_id': review_id,
+        'format': fmt,
+        'file_key': file_key,
+        'url': get_storage().presigned_url(file_key) if upload_success else None,
+        'upload_success': upload_success,
+        'cached': cached,
+        **entry
+    }
+
+
+def _export_key(
+    review_id: str,
+    fmt: str,
+    review_data: Dict[str, Any],
+    export_config: Dict[str, Any],
+    formats: Optional[List[str]] = None
+) -> str:
+    """Content-addressed object key: identical inputs and renderer map to the same export."""
+    payload = {'review_id': review_id, 'review_data': review_data, 'export_config': export_config}
+    if formats is not None:
+        payload['formats'] = formats
+    digest = export_cache_key(fmt, payload, RENDERER_VERSION)
+    extension = EXPORT_FORMATS[fmt]['extension'] if fmt in EXPORT_FORMATS else fmt
+    return f"exports/{review_id}/review_{digest}.{extension}"
+
+
+def _render(
+    fmt: str,
+    review_id: str,
+    review_data: Dict[str, Any],
+    export_config: Dict[str, Any],
+    out: BinaryIO
+) -> Tuple[Dict[str, Any], float]:
+    """Render one format into out; returns its metadata and the CPU seconds the render took."""
+    # Per-thread CPU time, so work on the worker's other threads isn't counted
+    started = time.thread_time()
+    metadata = EXPORT_FORMATS[fmt]['render'](review_id, review_data, export_config, out)
+    return metadata, time.thread_time() - started
+
+
+def _generate_html_content(review_data: Dict[str, Any], export_config: Dict[str, Any]) -> str:
+    """Generate HTML content for the review."""
+    return _html_template().render(
+        title=review_data.get('title', 'Product Review'),
+        include_styles=export_config.get('include_styles', True),
+        sections=review_data.get('sections', {}),
+        products=review_data.get('products'),
+        pros=review_data.get('pros'),
+        cons=review_data.get('cons')
+    )
+
+
+@lru_cache(maxsize=1)
+def _html_template() -> Template:
+    """Review template, compiled once per process."""
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=select_autoescape(['html']),
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    return env.get_template('review.html')
+
+
+@lru_cache(maxsize=1)
+def _pdf_styles() -> Dict[str, ParagraphStyle]:
+    """Paragraph styles shared by every PDF this process renders."""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=1  # Center
+        ),
+        'heading2': styles['Heading2'],
+        'heading3': styles['Heading3'],
+        'normal': styles['Normal']
+    }
+
+
+@lru_cache(maxsize=1)
+def _docx_template() -> bytes:
+    """Blank document package, so each export skips loading the default template from disk."""
+    buffer = io.BytesIO()
+    Document().save(buffer)
+    return buffer.getvalue()
+
+
+def _upload_to_storage(fileobj: BinaryIO, file_key: str, content_type: str) -> bool:
+    """Stream a rendered file to S3/MinIO storage."""
+    try:
+        get_storage().upload_fileobj(file_key, fileobj, content_type)
         return True
         
     except ClientError as e:
-        logger.error(f"Error uploading to storage: {e}")
+        logger.error("Error uploading to storage", file_key=file_key, error=str(e))
         return False
     except Exception as e:
-        logger.error(f"Unexpected error uploading to storage: {e}")
+        logger.error("Unexpected error uploading to storage", file_key=file_key, error=str(e))
         return False
@@ -0,0 +1,133 @@
+import structlog
+from typing import Dict, Any, List, Optional, Mapping
+from types import MappingProxyType
+from dataclasses import dataclass
+from datetime import date, datetime
+from bisect import bisect_right
+import threading
+import time
+import csv
+import os
+
+from config import settings
+
+logger = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class FxSnapshot:
+    """Exchange rates (units of USD per unit of currency) effective from a date."""
+    effective_date: date
+    rates: Mapping[str, float]
+
+    def to_usd(self, value: float, currency: str) -> Optional[float]:
+        """Convert value to USD, or None when the currency is not in the snapshot."""
+        rate = self.rates.get(currency.upper())
+        if rate is None:
+            return None
+        return value * rate
+
+
+class FxRateTable:
+    """
+    Dated FX snapshots, binary-searchable by effective date.
+
+    Each snapshot carries forward rates from earlier snapshots, so a lookup
+    resolves to a single dict and per-row conversion is O(1).
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        by_date: Dict[date, Dict[str, float]] = {}
+        for row in rows:
+            effective_date = parse_date(row["effective_date"])
+            by_date.setdefault(effective_date, {})[str(row["currency"]).upper()] = float(row["usd_rate"])
+
+        self.effective_dates: List[date] = sorted(by_date)
+        self._snapshots: List[FxSnapshot] = []
+
+        carried: Dict[str, float] = {"USD": 1.0}
+        for effective_date in self.effective_dates:
+            carried = {**carried, **by_date[effective_date]}
+            self._snapshots.append(FxSnapshot(effective_date, MappingProxyType(carried)))
+
+    def snapshot(self, as_of: Optional[date] = None) -> FxSnapshot:
+        """Return the snapshot in effect on as_of (default: today)."""
+        if not self._snapshots:
+            return FxSnapshot(date.min, MappingProxyType({"USD": 1.0}))
+
+        index = bisect_right(self.effective_dates, as_of or date.today()) - 1
+        # Dates before the first snapshot resolve to the earliest one
+        return self._snapshots[max(index, 0)]
+
+
+def load_fx_table(path: str) -> FxRateTable:
+    """Load an FX table from a local CSV or Parquet file."""
+    if path.endswith(".parquet"):
+        import pandas as pd
+        rows = pd.read_parquet(path).to_dict("records")
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    table = FxRateTable(rows)
+    logger.info("Loaded FX rate table", path=path, snapshots=len(table.effective_dates))
+    return table
+
+
+_cache_lock = threading.Lock()
+_cached_table: Optional[FxRateTable] = None
+_cached_mtime: Optional[float] = None
+_cached_at: float = 0.0
+
+
+def get_fx_table() -> FxRateTable:
+    """
+    Return the process-wide FX table, re-reading the file once the TTL expires
+    and only if it changed on disk.
+    """
+    global _cached_table, _cached_mtime, _cached_at
+
+    now = time.monotonic()
+    if _cached_table is not None and now - _cached_at < settings.FX_RATES_TTL_SECONDS:
+        return _cached_table
+
+    with _cache_lock:
+        if _cached_table is not None and now - _cached_at < settings.FX_RATES_TTL_SECONDS:
+            return _cached_table
+
+        path = settings.FX_RATES_PATH
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError as e:
+            if _cached_table is None:
+                raise
+            # Keep serving the last good table if the file disappears
+            logger.warning("FX rate file unavailable, keeping cached table", path=path, error=str(e))
+            _cached_at = now
+            return _cached_table
+
+        if _cached_table is None or mtime != _cached_mtime:
+            _cached_table = load_fx_table(path)
+            _cached_mtime = mtime
+        _cached_at = now
+        return _cached_table
+
+
+def clear_fx_cache() -> None:
+    """Drop the cached table so the next lookup reloads from disk."""
+    global _cached_table, _cached_mtime, _cached_at
+    with _cache_lock:
+        _cached_table = None
+        _cached_mtime = None
+        _cached_at = 0.0
+
+
+def parse_date(value: Any) -> date:
+    """Parse an ISO date/datetime string (or date-like) into a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if hasattr(value, "date"):  # pandas.Timestamp
+        return value.date()
+    return datetime.fromisoformat(str(value)[:10]).date()
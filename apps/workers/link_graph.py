@@ -0,0 +1,222 @@
+import structlog
+from celery import shared_task
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import heapq
+import json
+import math
+
+from config import settings
+from redis_client import get_redis
+from text_matching import tokenize
+
+logger = structlog.get_logger()
+
+# Shared products say far more about relatedness than a shared category
+FEATURE_WEIGHTS = {
+    'product': 3.0,
+    'keyword': 1.0,
+    'category': 0.5,
+}
+MIN_KEYWORD_LENGTH = 3
+
+
+@shared_task(bind=True, name='link_graph.index_review')
+def index_published_review(self, review: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add a published review to its org's internal-link graph.
+
+    Args:
+        review: Review document with review_id, org_id, title, slug, category,
+            products (names) and optional keywords
+
+    Returns:
+        Dictionary with the number of related reviews linked
+    """
+    try:
+        logger.info("Indexing review in link graph", review_id=review.get('review_id'))
+
+        related = LinkGraph(review.get('org_id')).add_review(review)
+
+        logger.info("Review indexed in link graph", review_id=review.get('review_id'), related=related)
+        return {
+            'review_id': review.get('review_id'),
+            'related_count': related,
+            'status': 'completed'
+        }
+
+    except Exception as e:
+        logger.error("Error indexing review in link graph", review_id=review.get('review_id'), error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+
+@shared_task(bind=True, name='link_graph.remove_review')
+def remove_published_review(self, org_id: Optional[str], review_id: str) -> Dict[str, Any]:
+    """Drop an unpublished or archived review from the link graph."""
+    try:
+        removed = LinkGraph(org_id).remove_review(review_id)
+        logger.info("Review removed from link graph", review_id=review_id, removed=removed)
+        return {'review_id': review_id, 'removed': removed, 'status': 'completed'}
+
+    except Exception as e:
+        logger.error("Error removing review from link graph", review_id=review_id, error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+
+class LinkGraph:
+    """
+    Internal-link graph over an org's published reviews, stored in Redis.
+
+    Each feature (product, category, keyword) has a posting sorted set of
+    reviews scored by publish time, and each review keeps a sorted set of its
+    most similar reviews. Publishing scores the new review against the most
+    recent postings of its features and updates both sides' related sets, so
+    a top-k lookup is a single ZREVRANGE, O(log n + k).
+    """
+
+    def __init__(self, org_id: Optional[str] = None, store=None,
+                 max_related: Optional[int] = None, posting_scan: Optional[int] = None):
+        self.prefix = f"link_graph:{org_id or 'default'}"
+        self.store = store if store is not None else get_redis()
+        self.max_related = max_related or settings.LINK_GRAPH_MAX_RELATED
+        self.posting_scan = posting_scan or settings.LINK_GRAPH_POSTING_SCAN
+
+    def add_review(self, review: Dict[str, Any]) -> int:
+        """Index (or re-index) a review; returns how many related reviews it was linked to."""
+        review_id = str(review['review_id'])
+        if self.store.get(self._doc_key(review_id)) is not None:
+            self.remove_review(review_id)
+
+        doc = _review_doc(review)
+        features = _review_features(doc)
+        scores = self._score_candidates(features, exclude=review_id)
+        related = heapq.nlargest(self.max_related, scores.items(), key=lambda item: (item[1], item[0]))
+        published = datetime.fromisoformat(doc['published_at']).timestamp()
+
+        pipe = self.store.pipeline()
+        pipe.set(self._doc_key(review_id), json.dumps(doc))
+        for feature in features:
+            pipe.zadd(self._posting_key(feature), {review_id: published})
+        if related:
+            pipe.zadd(self._related_key(review_id), dict(related))
+        for other_id, score in related:
+            # Similarity is symmetric; keep only each review's best links
+            other_key = self._related_key(other_id)
+            pipe.zadd(other_key, {review_id: score})
+            pipe.zremrangebyrank(other_key, 0, -(self.max_related + 1))
+        pipe.execute()
+
+        return len(related)
+
+    def remove_review(self, review_id: str) -> bool:
+        """Remove a review, its postings and the links pointing back to it."""
+        stored = self.store.get(self._doc_key(review_id))
+        if stored is None:
+            return False
+
+        doc = json.loads(stored)
+        related_key = self._related_key(review_id)
+        linked = self.store.zrevrange(related_key, 0, -1)
+
+        pipe = self.store.pipeline()
+        for feature in _review_features(doc):
+            pipe.zrem(self._posting_key(feature), review_id)
+        for other_id in linked:
+            pipe.zrem(self._related_key(other_id), review_id)
+        pipe.delete(related_key, self._doc_key(review_id))
+        pipe.execute()
+
+        # Links from reviews outside this one's own top list are dropped lazily by related()
+        return True
+
+    def related(self, review_id: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k related reviews of an indexed review."""
+        related_key = self._related_key(review_id)
+        ranked = self.store.zrevrange(related_key, 0, k - 1, withscores=True)
+        results, missing = self._resolve(ranked)
+        if missing:
+            self.store.zrem(related_key, *missing)
+            if len(ranked) == k:
+                return self.related(review_id, k)
+        return results
+
+    def suggest(self, review: Dict[str, Any], k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k related reviews for a review that is not indexed yet (bounded posting reads)."""
+        doc = _review_doc(review)
+        scores = self._score_candidates(_review_features(doc), exclude=doc['review_id'])
+        ranked = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        return self._resolve(ranked)[0]
+
+    def _score_candidates(self, features: List[Tuple[str, str]], exclude: Optional[str] = None) -> Dict[str, float]:
+        """Weighted, IDF-damped feature overlap against the most recent reviews of each posting."""
+        pipe = self.store.pipeline()
+        for feature in features:
+            pipe.zcard(self._posting_key(feature))
+            pipe.zrevrange(self._posting_key(feature), 0, self.posting_scan - 1)
+        replies = pipe.execute()
+
+        scores: Dict[str, float] = defaultdict(float)
+        for i, (kind, _value) in enumerate(features):
+            posting_size, members = replies[2 * i], replies[2 * i + 1]
+            weight = FEATURE_WEIGHTS[kind] / math.log2(2 + posting_size)
+            for member in members:
+                if member != exclude:
+                    scores[member] += weight
+        return scores
+
+    def _resolve(self, ranked: List[Tuple[str, float]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Attach stored documents to ranked ids; ids without a document are returned as missing."""
+        if not ranked:
+            return [], []
+        docs = self.store.mget([self._doc_key(review_id) for review_id, _score in ranked])
+        results, missing = [], []
+        for (review_id, score), stored in zip(ranked, docs):
+            if stored is None:
+                missing.append(review_id)
+                continue
+            doc = json.loads(stored)
+            results.append({
+                'review_id': review_id,
+                'title': doc['title'],
+                'url': doc['url'],
+                'category': doc['category'],
+                'score': round(score, 4)
+            })
+        return results, missing
+
+    def _doc_key(self, review_id: str) -> str:
+        return f"{self.prefix}:review:{review_id}"
+
+    def _related_key(self, review_id: str) -> str:
+        return f"{self.prefix}:related:{review_id}"
+
+    def _posting_key(self, feature: Tuple[str, str]) -> str:
+        return f"{self.prefix}:posting:{feature[0]}:{feature[1]}"
+
+
+def _review_doc(review: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalized document stored for each indexed review."""
+    title = review.get('title') or ''
+    slug = review.get('slug') or '-'.join(tokenize(title))
+    return {
+        'review_id': str(review['review_id']),
+        'title': title,
+        'url': review.get('url') or f"/reviews/{slug}",
+        'category': (review.get('category') or '').strip().lower(),
+        'products': sorted({p.strip().lower() for p in review.get('products', []) if p and p.strip()}),
+        'keywords': sorted(set(review.get('keywords') or _title_keywords(title))),
+        'published_at': review.get('published_at') or datetime.utcnow().isoformat()
+    }
+
+
+def _title_keywords(title: str) -> List[str]:
+    return [token for token in tokenize(title) if len(token) >= MIN_KEYWORD_LENGTH and token != 'review']
+
+
+def _review_features(doc: Dict[str, Any]) -> List[Tuple[str, str]]:
+    features = [('product', product) for product in doc['products']]
+    features.extend(('keyword', keyword.lower()) for keyword in doc['keywords'])
+    if doc['category']:
+        features.append(('category', doc['category']))
+    return features
@@ -0,0 +1,303 @@
+import structlog
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+import asyncio
+import hashlib
+import json
+import time
+
+import httpx
+
+from config import settings
+from redis_client import get_redis
+
+logger = structlog.get_logger()
+
+AFFILIATE_PARAMS = ['ref', 'aff', 'partner', 'tag', 'campaign']
+# Servers that reject HEAD usually answer GET normally
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+USER_AGENT = "ProductReviewCrew-LinkChecker/1.0"
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+IN_FLIGHT_POLL_SECONDS = 0.25
+
+
+class LinkHealthChecker:
+    """
+    Concurrent affiliate link prober.
+
+    Probes share one pooled keep-alive client, each host gets at most
+    per_host_limit concurrent probes, and every normalized URL is probed once
+    per call however many links point at it. With a cache, fresh results are
+    reused and a URL another worker is already probing is awaited rather than
+    probed again; cache calls run in worker threads so they never block the
+    event loop. Probes still running at the overall deadline are cancelled
+    and reported as unchecked (is_healthy None).
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cache: Optional["LinkHealthCache"] = None
+    ):
+        self.max_connections = max_connections or settings.LINK_HEALTH_MAX_CONNECTIONS
+        self.per_host_limit = per_host_limit or settings.LINK_HEALTH_PER_HOST_LIMIT
+        self.timeout = timeout or settings.LINK_HEALTH_TIMEOUT_SECONDS
+        self.deadline = deadline or settings.LINK_HEALTH_DEADLINE_SECONDS
+        self.cache = cache
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def check_links(self, links: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Health results for every link with a URL, in input order."""
+        links = [link for link in links if link.get('url')]
+        normalized, probes = {}, {}
+        for link in links:
+            try:
+                normalized[link['url']] = normalize_url(link['url'])
+            except ValueError as e:
+                # A malformed URL fails on its own rather than aborting the batch
+                probes[link['url']] = _failed_probe(f"Invalid URL: {e}")
+        probes.update(await self.probe_urls(list(dict.fromkeys(normalized.values()))))
+        return [link_result(link, probes[normalized.get(link['url'], link['url'])]) for link in links]
+
+    async def probe_urls(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Probe each URL once (or reuse its cached result), within the overall deadline."""
+        if not urls:
+            return {}
+
+        cached = await asyncio.to_thread(self.cache.get_many, urls) if self.cache else {}
+        stale = [url for url in urls if url not in cached]
+        if not stale:
+            return cached
+
+        # Semaphores belong to the running loop, so each call gets fresh ones
+        self._host_limits = {}
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={'User-Agent': USER_AGENT}
+        ) as client:
+            tasks = {url: asyncio.create_task(self._probe_shared(client, url)) for url in stale}
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if pending:
+            logger.warning("Link health deadline exceeded", unchecked=len(pending), total=len(urls))
+
+        return {
+            **cached,
+            **{
+                url: task.result() if task in done else _unchecked_probe("Health check deadline exceeded")
+                for url, task in tasks.items()
+            }
+        }
+
+    async def _probe_shared(self, client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+        """Probe a URL unless another worker holds its in-flight claim, then wait for their result."""
+        if self.cache is None:
+            async with self._host_limit(url):
+                return await self._probe(client, url)
+
+        while True:
+            # Claimed only once a host slot is free, so the claim TTL covers the probe, not the queueing
+            async with self._host_limit(url):
+                if await asyncio.to_thread(self.cache.claim, url):
+                    try:
+                        probe = await self._probe(client, url)
+                        await asyncio.to_thread(self.cache.set, url, probe)
+                        return probe
+                    finally:
+                        await asyncio.to_thread(self.cache.release, url)
+            await asyncio.sleep(IN_FLIGHT_POLL_SECONDS)
+            probe = await asyncio.to_thread(self.cache.get, url)
+            if probe is not None:
+                return probe
+
+    async def _probe(self, client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+        """Probe a URL; the caller holds its host slot."""
+        started = time.monotonic()
+        method = 'HEAD'
+        try:
+            try:
+                status_code = (await client.head(url)).status_code
+            except httpx.RemoteProtocolError:
+                status_code = None
+            if status_code is None or status_code in HEAD_FALLBACK_STATUSES:
+                method = 'GET'
+                # Stream so only the headers are read, never the page body
+                async with client.stream('GET', url) as response:
+                    status_code = response.status_code
+        except Exception as e:
+            # Transport errors and URLs httpx cannot build fail this probe only, never the batch
+            return {
+                'is_healthy': False,
+                'error': str(e) or type(e).__name__,
+                'method': method,
+                'checked_at': datetime.utcnow().isoformat(),
+                'response_time': round(time.monotonic() - started, 3)
+            }
+
+        probe = {
+            'is_healthy': 200 <= status_code < 300,
+            'status_code': status_code,
+            'method': method,
+            'checked_at': datetime.utcnow().isoformat(),
+            'response_time': round(time.monotonic() - started, 3)
+        }
+        if not probe['is_healthy']:
+            probe['error'] = f"HTTP {status_code}"
+        return probe
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        try:
+            host = urlparse(url).netloc.lower()
+        except ValueError:
+            # Unparseable: its own slot, and the probe reports the error
+            host = url
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+
+class LinkHealthCache:
+    """
+    Probe results shared across workers, keyed by normalized URL.
+
+    Healthy results live for LINK_HEALTH_HEALTHY_TTL_SECONDS and failures
+    (negative results) for LINK_HEALTH_FAILING_TTL_SECONDS, so a scheduled
+    check only probes URLs whose entry has expired. A short-lived SET NX
+    claim marks a URL as being probed. A cache outage only costs extra probes.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        healthy_ttl: Optional[int] = None,
+        failing_ttl: Optional[int] = None,
+        claim_ttl: Optional[int] = None
+    ):
+        self.store = store if store is not None else get_redis()
+        self.healthy_ttl = healthy_ttl or settings.LINK_HEALTH_HEALTHY_TTL_SECONDS
+        self.failing_ttl = failing_ttl or settings.LINK_HEALTH_FAILING_TTL_SECONDS
+        self.claim_ttl = claim_ttl or settings.LINK_HEALTH_CLAIM_TTL_SECONDS
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([url]).get(url)
+
+    def get_many(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fresh cached results for the given normalized URLs, marked as cached."""
+        try:
+            stored = self.store.mget([_result_key(url) for url in urls])
+        except Exception as e:
+            logger.warning("Could not read link health cache", error=str(e))
+            return {}
+        return {
+            url: {**json.loads(value), 'cached': True}
+            for url, value in zip(urls, stored) if value is not None
+        }
+
+    def set(self, url: str, probe: Dict[str, Any]) -> None:
+        # Unchecked results say nothing about the link and are never cached
+        if probe.get('is_healthy') is None:
+            return
+        ttl = self.healthy_ttl if probe['is_healthy'] else self.failing_ttl
+        try:
+            self.store.set(_result_key(url), json.dumps(probe), ex=ttl)
+        except Exception as e:
+            logger.warning("Could not cache link health", url=url, error=str(e))
+
+    def claim(self, url: str) -> bool:
+        """Claim the probe of a URL; False while another worker holds the claim."""
+        try:
+            return bool(self.store.set(_claim_key(url), '1', ex=self.claim_ttl, nx=True))
+        except Exception as e:
+            logger.warning("Could not claim link probe", url=url, error=str(e))
+            return True
+
+    def release(self, url: str) -> None:
+        try:
+            self.store.delete(_claim_key(url))
+        except Exception as e:
+            logger.warning("Could not release link probe", url=url, error=str(e))
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a link for probing: lowercase scheme and host, no
+    default port or fragment, sorted query without utm_* tracking params.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (key, value) for key, values in parse_qs(parsed.query, keep_blank_values=True).items()
+        if not key.lower().startswith('utm_') for value in values
+    )
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, urlencode(query), ''))
+
+
+def _result_key(url: str) -> str:
+    return f"link_health:{hashlib.sha1(url.encode()).hexdigest()}"
+
+
+def _claim_key(url: str) -> str:
+    return f"{_result_key(url)}:probing"
+
+
+def link_result(link: Dict[str, Any], probe: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-link health result from the probe of its URL."""
+    url = link['url']
+    return {
+        'link_id': link.get('id'),
+        'url': url,
+        'provider': link.get('provider'),
+        'has_affiliate_params': _has_affiliate_params(url),
+        'cached': False,
+        **probe
+    }
+
+
+def _has_affiliate_params(url: str) -> bool:
+    try:
+        query = parse_qs(urlparse(url).query)
+    except ValueError:
+        return False
+    return any(param in query for param in AFFILIATE_PARAMS)
+
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Healthy/total counts; unchecked links count towards the total but not as healthy."""
+    healthy_count = sum(1 for r in results if r.get('is_healthy'))
+    total_count = len(results)
+    return {
+        'healthy_count': healthy_count,
+        'unchecked_count': sum(1 for r in results if r.get('is_healthy') is None),
+        'cached_count': sum(1 for r in results if r.get('cached')),
+        'total_count': total_count,
+        'health_percentage': (healthy_count / total_count * 100) if total_count > 0 else 0
+    }
+
+
+def _unchecked_probe(reason: str) -> Dict[str, Any]:
+    return {
+        'is_healthy': None,
+        'error': reason,
+        'checked_at': datetime.utcnow().isoformat()
+    }
+
+
+def _failed_probe(error: str) -> Dict[str, Any]:
+    return {
+        'is_healthy': False,
+        'error': error,
+        'checked_at': datetime.utcnow().isoformat()
+    }
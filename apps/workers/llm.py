@@ -0,0 +1,767 @@
+import structlog
+from typing import Dict, Any, List, Optional, Callable, Protocol, AsyncIterator, Iterator, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, replace
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import httpx
+
+from config import settings
+from redis_client import get_redis
+
+logger = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class LLMResponse:
+    """A single completion with its token usage and latency."""
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    # Set when the completion was answered as part of a packed batch request
+    batch_size: int = 1
+    batch_index: int = 0
+    # Usage of a packed request whose reply was unusable, carried by the first
+    # completion answered by the fallback so it is still accounted
+    discarded_prompt_tokens: int = 0
+    discarded_completion_tokens: int = 0
+
+
+class LLMClient(Protocol):
+    """
+    Minimal async completion interface shared by the writer workers.
+
+    context is material the prompt refers to (e.g. review facts); clients
+    that pack requests send it once for every request sharing it.
+    """
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> LLMResponse:
+        ...
+
+    def stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield completion text deltas as they are generated."""
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+class OpenAIClient:
+    """Chat completions over the OpenAI HTTP API (or any compatible endpoint)."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self.model = model or settings.OPENAI_MODEL
+        self._client_options = {
+            "base_url": base_url or settings.OPENAI_BASE_URL,
+            "headers": {"Authorization": f"Bearer {api_key}"},
+            "timeout": timeout or settings.LLM_TIMEOUT_SECONDS,
+        }
+        # httpx connections belong to the event loop that opened them, and
+        # every task runs its own loop, so one pooled client per loop
+        self._clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> LLMResponse:
+        model = model or self.model
+        started = time.perf_counter()
+        response = await self._http().post("/chat/completions", json={
+            "model": model,
+            "messages": [{"role": "user", "content": with_context(prompt, context)}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        })
+        response.raise_for_status()
+        body = response.json()
+        usage = body.get("usage") or {}
+
+        return LLMResponse(
+            text=body["choices"][0]["message"]["content"],
+            model=body.get("model", model),
+            prompt_tokens=int(usage.get("prompt_tokens", 0)),
+            completion_tokens=int(usage.get("completion_tokens", 0)),
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    async def stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        async with self._http().stream("POST", "/chat/completions", json={
+            "model": model or self.model,
+            "messages": [{"role": "user", "content": with_context(prompt, context)}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }) as response:
+            response.raise_for_status()
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    async def aclose(self) -> None:
+        """Close this event loop's connections; other loops keep theirs."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(**self._client_options)
+        return client
+
+
+class FakeLLMClient:
+    """
+    Deterministic local stand-in for tests and offline runs.
+
+    Echoes the last prompt line unless a responder is given, optionally
+    sleeping to simulate latency, and records every prompt it receives.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str], str]] = None,
+        delay: float = 0.0,
+        model: str = "fake-llm"
+    ):
+        self.responder = responder or (lambda prompt: prompt.strip().splitlines()[-1] if prompt.strip() else "")
+        self.delay = delay
+        self.model = model
+        self.prompts: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> LLMResponse:
+        prompt = with_context(prompt, context)
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            text = self.responder(prompt)
+        finally:
+            self.in_flight -= 1
+
+        return LLMResponse(
+            text=text,
+            model=model or self.model,
+            prompt_tokens=len(prompt.split()),
+            completion_tokens=len(text.split()),
+            latency_ms=self.delay * 1000,
+        )
+
+    async def stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield the completion word by word once the simulated delay has passed."""
+        response = await self.complete(prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context)
+        words = response.text.split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+            await asyncio.sleep(0)
+
+    async def aclose(self) -> None:
+        return None
+
+
+@dataclass
+class LLMUsage:
+    """Token, call and latency accounting for one unit of work (e.g. a review)."""
+    api_calls: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    batched: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+
+    def record(self, response: LLMResponse) -> None:
+        # A packed batch is one request, however many completions it answers
+        if response.batch_index == 0:
+            self.api_calls += 1
+            self.latency_ms += response.latency_ms
+        if response.batch_size > 1:
+            self.batched += 1
+        self.prompt_tokens += response.prompt_tokens
+        self.completion_tokens += response.completion_tokens
+        if response.discarded_prompt_tokens or response.discarded_completion_tokens:
+            self.api_calls += 1
+            self.prompt_tokens += response.discarded_prompt_tokens
+            self.completion_tokens += response.discarded_completion_tokens
+
+    @property
+    def cost(self) -> float:
+        return (
+            self.prompt_tokens / 1000 * settings.LLM_PROMPT_COST_PER_1K
+            + self.completion_tokens / 1000 * settings.LLM_COMPLETION_COST_PER_1K
+        )
+
+
+_usage_scope: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage_scope", default=None)
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[LLMUsage]:
+    """
+    Collect the usage of LLM calls made inside the block, including tasks it
+    starts, so process-wide clients can still be accounted per review.
+    """
+    usage = LLMUsage()
+    token = _usage_scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_scope.reset(token)
+
+
+class ResponseCache:
+    """Process-wide completion cache with a TTL and LRU size bound."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, LLMResponse]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: LLMResponse) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedLLMClient:
+    """
+    Wraps an LLM client with a response cache and request coalescing.
+
+    Responses are cached by a hash of prompt, model and sampling params;
+    identical requests already in flight, streamed or not, on any event loop
+    of the process await the same call instead of issuing another. Usage is
+    accumulated in self.usage and in the current track_llm_usage() scope.
+    """
+
+    def __init__(self, inner: LLMClient, cache: Optional[ResponseCache] = None):
+        self.inner = inner
+        self.model = getattr(inner, "model", "llm")
+        self.cache = cache if cache is not None else get_response_cache()
+        self.usage = LLMUsage()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> LLMResponse:
+        key = request_key(prompt, model or self.model, max_tokens, temperature, context)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._account(cache_hits=1)
+            return cached
+
+        owner, future = self._join(key)
+        if not owner:
+            self._account(coalesced=1)
+            return await _await_shared(future)
+
+        try:
+            response = await self.inner.complete(
+                prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context
+            )
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._account(response)
+        self.cache.set(key, response)
+        self._settle(key, future, response)
+        return response
+
+    async def stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Replay a cached or in-flight completion as one chunk, or stream and cache it."""
+        key = request_key(prompt, model or self.model, max_tokens, temperature, context)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._account(cache_hits=1)
+            yield cached.text
+            return
+
+        owner, future = self._join(key)
+        if not owner:
+            self._account(coalesced=1)
+            yield (await _await_shared(future)).text
+            return
+
+        started = time.perf_counter()
+        parts = []
+        try:
+            async for delta in self.inner.stream(
+                prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context
+            ):
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            # Includes the consumer closing the stream early
+            self._settle(key, future, error=e)
+            raise
+
+        text = "".join(parts)
+        # Streamed responses carry no usage block, so token counts are estimated
+        response = LLMResponse(
+            text=text,
+            model=model or self.model,
+            prompt_tokens=estimate_tokens(with_context(prompt, context)),
+            completion_tokens=estimate_tokens(text),
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+        self._account(response)
+        self.cache.set(key, response)
+        self._settle(key, future, response)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def _join(self, key: str) -> Tuple[bool, Future]:
+        """The in-flight call for key, and whether the caller has to make it."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return False, future
+            future = self._in_flight[key] = Future()
+            return True, future
+
+    def _settle(
+        self,
+        key: str,
+        future: Future,
+        response: Optional[LLMResponse] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is None:
+            future.set_result(response)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            future.cancel()
+
+    def _account(self, response: Optional[LLMResponse] = None, **counters: int) -> None:
+        scoped = _usage_scope.get()
+        for usage in (self.usage, scoped) if scoped is not None else (self.usage,):
+            if response is not None:
+                usage.record(response)
+            for field, count in counters.items():
+                setattr(usage, field, getattr(usage, field) + count)
+
+
+async def _await_shared(future: Future) -> LLMResponse:
+    # Shielded: a cancelled waiter must not cancel the call others wait on
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
+# Requests are only packed with others of the same model, temperature and context
+_BatchKey = Tuple[str, float, Optional[str]]
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.items: List[Tuple[str, int, asyncio.Future]] = []
+        self.tokens = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class _LoopBatches:
+    def __init__(self):
+        self.pending: Dict[_BatchKey, _PendingBatch] = {}
+        self.running: set = set()
+
+
+class BatchingLLMClient:
+    """
+    Packs many small completions into one request with JSON-array output.
+
+    Requests with the same model, temperature and context are collected for
+    up to flush_window seconds, or until the batch would exceed
+    max_batch_tokens or max_batch_items, then sent as a single numbered
+    prompt with the shared context stated once. Answers are split back to
+    their callers; if the reply is not a JSON array of the right length,
+    every item falls back to an individual call.
+    """
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        flush_window: Optional[float] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_items: Optional[int] = None
+    ):
+        self.inner = inner
+        self.model = getattr(inner, "model", "llm")
+        self.flush_window = flush_window if flush_window is not None else settings.LLM_BATCH_WINDOW_MS / 1000
+        self.max_batch_tokens = max_batch_tokens or settings.LLM_BATCH_MAX_TOKENS
+        self.max_batch_items = max_batch_items or settings.LLM_BATCH_MAX_ITEMS
+        self.requests_sent = 0
+        # Batches hold futures and timers of the loop their callers run on
+        self._loops: "WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopBatches]" = WeakKeyDictionary()
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> LLMResponse:
+        cost = estimate_tokens(prompt) + max_tokens
+        context_cost = estimate_tokens(context or "")
+        if cost + context_cost > self.max_batch_tokens:
+            self.requests_sent += 1
+            return await self.inner.complete(
+                prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context
+            )
+
+        key = (model or self.model, temperature, context)
+        loop = asyncio.get_running_loop()
+        batches = self._batches(loop)
+        batch = batches.pending.get(key)
+        if batch and (batch.tokens + cost > self.max_batch_tokens or len(batch.items) >= self.max_batch_items):
+            self._dispatch(batches, key, batch)
+            batch = None
+
+        if batch is None:
+            batch = _PendingBatch()
+            batch.tokens = context_cost
+            batch.timer = loop.call_later(self.flush_window, self._dispatch, batches, key, batch)
+            batches.pending[key] = batch
+
+        future = loop.create_future()
+        batch.items.append((prompt, max_tokens, future))
+        batch.tokens += cost
+        return await future
+
+    def stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 512,
+        temperature: float = 0.3,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Streams are never batched."""
+        return self.inner.stream(prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context)
+
+    async def aclose(self) -> None:
+        """Send this event loop's pending batches and wait for them."""
+        batches = self._loops.pop(asyncio.get_running_loop(), None)
+        if batches is not None:
+            for key, batch in list(batches.pending.items()):
+                self._dispatch(batches, key, batch)
+            if batches.running:
+                await asyncio.gather(*batches.running, return_exceptions=True)
+        await self.inner.aclose()
+
+    def _batches(self, loop: asyncio.AbstractEventLoop) -> "_LoopBatches":
+        batches = self._loops.get(loop)
+        if batches is None:
+            batches = self._loops[loop] = _LoopBatches()
+        return batches
+
+    def _dispatch(self, batches: "_LoopBatches", key: _BatchKey, batch: _PendingBatch) -> None:
+        if batches.pending.get(key) is batch:
+            del batches.pending[key]
+        if batch.timer:
+            batch.timer.cancel()
+            batch.timer = None
+        if not batch.items:
+            return
+        items, batch.items = batch.items, []
+        task = asyncio.ensure_future(self._send(key, items))
+        batches.running.add(task)
+        task.add_done_callback(batches.running.discard)
+
+    async def _send(self, key: _BatchKey, items: List[Tuple[str, int, asyncio.Future]]) -> None:
+        model, temperature, context = key
+        if len(items) == 1:
+            await self._send_individually(key, items)
+            return
+
+        response = None
+        try:
+            self.requests_sent += 1
+            response = await self.inner.complete(
+                pack_prompts([prompt for prompt, _, _ in items], context),
+                model=model,
+                max_tokens=sum(max_tokens for _, max_tokens, _ in items) + 16 * len(items),
+                temperature=temperature
+            )
+            answers = unpack_answers(response.text, len(items))
+        except ValueError as e:
+            logger.warning("Batched completion unparseable, falling back to individual calls",
+                           items=len(items), error=str(e))
+            await self._send_individually(key, items, discarded=response)
+            return
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        count = len(items)
+        for index, ((_, _, future), answer) in enumerate(zip(items, answers)):
+            if future.done():
+                continue
+            # Split usage so per-item totals add up to the packed request
+            future.set_result(LLMResponse(
+                text=answer,
+                model=response.model,
+                prompt_tokens=response.prompt_tokens // count + (response.prompt_tokens % count if index == 0 else 0),
+                completion_tokens=response.completion_tokens // count + (response.completion_tokens % count if index == 0 else 0),
+                latency_ms=response.latency_ms,
+                batch_size=count,
+                batch_index=index,
+            ))
+
+    async def _send_individually(
+        self,
+        key: _BatchKey,
+        items: List[Tuple[str, int, asyncio.Future]],
+        discarded: Optional[LLMResponse] = None
+    ) -> None:
+        model, temperature, context = key
+        unaccounted = [discarded] if discarded is not None else []
+
+        async def send(prompt: str, max_tokens: int, future: asyncio.Future) -> None:
+            try:
+                self.requests_sent += 1
+                response = await self.inner.complete(
+                    prompt, model=model, max_tokens=max_tokens, temperature=temperature, context=context
+                )
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if unaccounted:
+                    # The unusable packed request was billed too
+                    packed = unaccounted.pop()
+                    response = replace(
+                        response,
+                        discarded_prompt_tokens=packed.prompt_tokens,
+                        discarded_completion_tokens=packed.completion_tokens
+                    )
+                if not future.done():
+                    future.set_result(response)
+
+        await asyncio.gather(*(send(*item) for item in items))
+
+
+def pack_prompts(prompts: List[str], context: Optional[str] = None) -> str:
+    """One prompt asking for a JSON array with an answer per numbered request."""
+    lines = [
+        f"Answer each of the following {len(prompts)} requests independently.",
+        f"Respond with only a JSON array of {len(prompts)} strings; element i is the answer to request i.",
+        ""
+    ]
+    if context:
+        lines[1:1] = ["Every request refers to this context:", context.strip()]
+    for i, prompt in enumerate(prompts, 1):
+        lines.append(f"[{i}] {prompt.strip()}")
+    return "\n".join(lines)
+
+
+def unpack_answers(text: str, count: int) -> List[str]:
+    """Parse a packed reply; raises ValueError unless it is a JSON array of count strings."""
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("no JSON array in batched response")
+    try:
+        answers = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON in batched response: {e}")
+    if not isinstance(answers, list) or len(answers) != count or not all(isinstance(a, str) for a in answers):
+        raise ValueError(f"expected a JSON array of {count} strings")
+    return answers
+
+
+def request_key(prompt: str, model: str, max_tokens: int, temperature: float, context: Optional[str] = None) -> str:
+    """Cache key for a completion request."""
+    payload = json.dumps(
+        {"prompt": prompt, "model": model, "max_tokens": max_tokens, "temperature": temperature, "context": context},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def with_context(prompt: str, context: Optional[str]) -> str:
+    """Prompt as sent on its own: the context, then the request."""
+    return f"{context.strip()}\n\n{prompt}" if context else prompt
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by every CachedLLMClient."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS)
+    return _response_cache
+
+
+@lru_cache(maxsize=1)
+def get_default_client() -> Optional[CachedLLMClient]:
+    """
+    Process-wide cached LLM client from settings, or None when no API key is
+    configured. Account per unit of work with track_llm_usage().
+    """
+    if not settings.OPENAI_API_KEY:
+        return None
+    return CachedLLMClient(OpenAIClient(settings.OPENAI_API_KEY))
+
+
+@lru_cache(maxsize=1)
+def get_batching_client() -> Optional[CachedLLMClient]:
+    """Process-wide cached client that packs small generations into batched requests, or None without an API key."""
+    if not settings.OPENAI_API_KEY:
+        return None
+    return CachedLLMClient(BatchingLLMClient(OpenAIClient(settings.OPENAI_API_KEY)))
+
+
+def record_llm_usage(review_id: str, usage: LLMUsage) -> None:
+    """Add a unit of work's LLM usage to the review's running totals."""
+    try:
+        key = _usage_key(review_id)
+        pipe = get_redis().pipeline()
+        for field, value in asdict(usage).items():
+            if isinstance(value, float):
+                pipe.hincrbyfloat(key, field, value)
+            else:
+                pipe.hincrby(key, field, value)
+        pipe.hincrbyfloat(key, "cost", usage.cost)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Could not record LLM usage", review_id=review_id, error=str(e))
+
+
+def get_llm_usage(review_id: str) -> Dict[str, Any]:
+    """Running LLM usage totals for a review (empty if none recorded)."""
+    try:
+        stored = get_redis().hgetall(_usage_key(review_id))
+    except Exception as e:
+        logger.warning("Could not read LLM usage", review_id=review_id, error=str(e))
+        return {}
+    return {field: float(value) if field in ("latency_ms", "cost") else int(value) for field, value in stored.items()}
+
+
+def _usage_key(review_id: str) -> str:
+    return f"llm_usage:{review_id}"
@@ -1,9 +1,17 @@
 import structlog
 from celery import shared_task
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from graphlib import TopologicalSorter
+import asyncio
+import hashlib
 import json
 import re
 
+from config import settings
+from llm import LLMClient, get_default_client, record_llm_usage, track_llm_usage
+from realtime import Publisher, get_publisher, review_channel
+from section_cache import SectionCache, get_section_cache
+
 logger = structlog.get_logger()
 
 @shared_task(bind=True, name='narrative_writer.write_review')
@@ -44,61 +52,28 @@ def write_review_narrative(
                    product_name=product_info.get('name'),
                    writing_style=writing_style)
         
-        # Generate executive summary
-        executive_summary = _generate_executive_summary(
-            product_info, scores, pros, cons, target_audience, writing_style
-        )
-        
-        # Generate overview section
-        overview = _generate_overview_section(
-            product_info, claims, criteria, writing_style
-        )
-        
-        # Generate detailed analysis
-        detailed_analysis = _generate_detailed_analysis(
-            product_info, claims, scores, criteria, writing_style
-        )
-        
-        # Generate pros and cons section
-        pros_cons_section = _generate_pros_cons_section(
-            pros, cons, writing_style
-        )
-        
-        # Generate use cases section
-        use_cases_section = _generate_use_cases_section(
-            use_cases, product_info, writing_style
-        )
-        
-        # Generate conclusion
-        conclusion = _generate_conclusion(
-            product_info, scores, pros, cons, use_cases, target_audience, writing_style
-        )
-        
-        # Generate recommendations
-        recommendations = _generate_recommendations(
-            product_info, scores, pros, cons, use_cases, target_audience
-        )
+        inputs = {
+            'product_info': product_info,
+            'claims': claims,
+            'scores': scores,
+            'criteria': criteria,
+            'pros': pros,
+            'cons': cons,
+            'use_cases': use_cases,
+            'target_audience': target_audience,
+            'writing_style': writing_style
+        }
+        sections = asyncio.run(_write_with_default_client(review_id, inputs))
         
         result = {
             'review_id': review_id,
             'product_id': product_info.get('id'),
-            'sections': {
-                'executive_summary': executive_summary,
-                'overview': overview,
-                'detailed_analysis': detailed_analysis,
-                'pros_cons': pros_cons_section,
-                'use_cases': use_cases_section,
-                'conclusion': conclusion,
-                'recommendations': recommendations
-            },
+            'sections': sections,
             'metadata': {
-                'total_words': _calculate_total_words([
-                    executive_summary, overview, detailed_analysis,
-                    pros_cons_section, use_cases_section, conclusion, recommendations
-                ]),
+                'total_words': _calculate_total_words(list(sections.values())),
                 'writing_style': writing_style,
                 'target_audience': target_audience,
-                'sections_count': 7
+                'sections_count': len(sections)
             }
         }
         
@@ -114,6 +89,208 @@ def write_review_narrative(
                     error=str(e))
         raise self.retry(countdown=60, max_retries=3)
 
+async def _write_with_default_client(review_id: str, inputs: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Write all sections with the configured LLM client (template text if none), streaming to the draft channel."""
+    llm_client = get_default_client()
+    publisher = get_publisher()
+    stream = DraftStream(publisher, review_id, inputs['product_info'].get('id'))
+    with track_llm_usage() as usage:
+        try:
+            sections = await write_sections(inputs, llm_client, stream=stream, section_cache=get_section_cache())
+        finally:
+            if llm_client:
+                record_llm_usage(review_id, usage)
+                await llm_client.aclose()
+            # Deliver the draft before the task reports completion, off the event loop
+            await asyncio.to_thread(publisher.flush, settings.REALTIME_FLUSH_TIMEOUT_SECONDS)
+    return sections
+
+async def write_sections(
+    inputs: Dict[str, Any],
+    llm_client: Optional[LLMClient] = None,
+    max_concurrency: Optional[int] = None,
+    stream: Optional['DraftStream'] = None,
+    section_cache: Optional[SectionCache] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate all review sections as a DAG.
+    
+    Independent sections run concurrently, capped per review by a semaphore;
+    sections with dependencies start once those sections are done and see
+    their content. Each section records a hash of exactly the inputs it used,
+    and sections whose hash is already in the cache are not regenerated.
+    Partials are published to the stream as they are produced.
+    Returns sections in the canonical SECTION_DEPENDENCIES order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or settings.NARRATIVE_MAX_CONCURRENCY)
+    tasks: Dict[str, asyncio.Task] = {}
+    cached: List[str] = []
+    
+    async def run(name: str) -> Dict[str, Any]:
+        dependencies = {dep: await tasks[dep] for dep in SECTION_DEPENDENCIES[name]}
+        input_hash = _section_input_hash(name, inputs, dependencies, llm_client)
+        
+        section = section_cache.get(input_hash) if section_cache else None
+        if section is not None:
+            cached.append(name)
+            if stream:
+                stream.section_started(name, section['title'])
+                stream.section_completed(name, section)
+            return section
+        
+        async with semaphore:
+            section = await _write_section(name, inputs, dependencies, llm_client, stream)
+        section['input_hash'] = input_hash
+        if section_cache:
+            section_cache.set(input_hash, section)
+        return section
+    
+    for name in TopologicalSorter(SECTION_DEPENDENCIES).static_order():
+        tasks[name] = asyncio.ensure_future(run(name))
+    
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    
+    sections = {name: tasks[name].result() for name in SECTION_DEPENDENCIES}
+    logger.info("Narrative sections written",
+               regenerated=[name for name in sections if name not in cached],
+               cached=cached)
+    if stream:
+        stream.draft_completed(sections)
+    return sections
+
+def _section_input_hash(
+    name: str,
+    inputs: Dict[str, Any],
+    dependencies: Dict[str, Dict[str, Any]],
+    llm_client: Optional[LLMClient]
+) -> str:
+    """Hash of exactly the inputs a section is generated from."""
+    payload = {
+        'section': name,
+        'version': SECTION_CACHE_VERSION,
+        'generator': getattr(llm_client, 'model', 'llm') if llm_client else 'template'
+    }
+    if llm_client:
+        # The rendered prompt carries everything the LLM sees, dependency content included
+        payload['prompt'] = _section_prompt(SECTION_BUILDERS[name](inputs), inputs, dependencies)
+    else:
+        payload['inputs'] = SECTION_INPUTS[name](inputs)
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+async def _write_section(
+    name: str,
+    inputs: Dict[str, Any],
+    dependencies: Dict[str, Dict[str, Any]],
+    llm_client: Optional[LLMClient],
+    stream: Optional['DraftStream'] = None
+) -> Dict[str, Any]:
+    """Build a section from its template and, if a client is given, rewrite it with the LLM."""
+    section = SECTION_BUILDERS[name](inputs)
+    if stream:
+        stream.section_started(name, section['title'])
+    
+    if llm_client is not None:
+        prompt = _section_prompt(section, inputs, dependencies)
+        if stream:
+            parts = []
+            async for delta in llm_client.stream(prompt):
+                parts.append(delta)
+                stream.section_delta(name, delta)
+            content = ''.join(parts).strip()
+        else:
+            content = (await llm_client.complete(prompt)).text.strip()
+        section = {
+            **section,
+            'content': content,
+            'word_count': len(content.split())
+        }
+    
+    if stream:
+        stream.section_completed(name, section)
+    return section
+
+class DraftStream:
+    """
+    Publishes section partials for one product to the review's draft channel.
+    
+    Token deltas are buffered and flushed on paragraph breaks or once
+    DRAFT_CHUNK_CHARS accumulate, keeping message volume bounded.
+    """
+    
+    def __init__(self, publisher: Publisher, review_id: str, product_id: Optional[str] = None):
+        self.publisher = publisher
+        self.channel = review_channel(review_id, 'draft')
+        self.product_id = product_id
+        self._buffers: Dict[str, List[str]] = {}
+        self._sequence: Dict[str, int] = {}
+    
+    def section_started(self, section: str, title: str) -> None:
+        self._buffers[section] = []
+        self._sequence[section] = 0
+        self._publish({'type': 'section.started', 'section': section, 'title': title})
+    
+    def section_delta(self, section: str, delta: str) -> None:
+        buffer = self._buffers.setdefault(section, [])
+        buffer.append(delta)
+        if '\n' in delta or sum(len(part) for part in buffer) >= DRAFT_CHUNK_CHARS:
+            self._flush(section)
+    
+    def section_completed(self, section: str, content: Dict[str, Any]) -> None:
+        self._flush(section)
+        self._publish({
+            'type': 'section.completed',
+            'section': section,
+            'content': content.get('content', ''),
+            'word_count': content.get('word_count', 0)
+        })
+    
+    def draft_completed(self, sections: Dict[str, Dict[str, Any]]) -> None:
+        self._publish({
+            'type': 'draft.completed',
+            'sections': list(sections),
+            'total_words': _calculate_total_words(list(sections.values()))
+        })
+    
+    def _flush(self, section: str) -> None:
+        buffer = self._buffers.get(section)
+        if not buffer:
+            return
+        self._publish({
+            'type': 'section.delta',
+            'section': section,
+            'seq': self._sequence.get(section, 0),
+            'text': ''.join(buffer)
+        })
+        self._sequence[section] = self._sequence.get(section, 0) + 1
+        self._buffers[section] = []
+    
+    def _publish(self, message: Dict[str, Any]) -> None:
+        self.publisher.publish(self.channel, {'product_id': self.product_id, **message})
+
+def _section_prompt(
+    section: Dict[str, Any],
+    inputs: Dict[str, Any],
+    dependencies: Dict[str, Dict[str, Any]]
+) -> str:
+    """Prompt asking the LLM to rewrite a templated section draft."""
+    product_name = inputs['product_info'].get('name', 'this product')
+    lines = [
+        f"You are writing the '{section['title']}' section of a review of {product_name}.",
+        f"Writing style: {inputs['writing_style']}."
+    ]
+    if inputs.get('target_audience'):
+        lines.append(f"Target audience: {inputs['target_audience']}.")
+    for dependency in dependencies.values():
+        lines.append(f"{dependency['title']}: {dependency['content']}")
+    lines.append("Rewrite the draft below into polished prose. Keep every fact and figure; add none.")
+    lines.append(section['content'])
+    return "\n".join(lines)
+
 def _generate_executive_summary(
     product_info: Dict[str, Any],
     scores: List[Dict[str, Any]],
@@ -127,11 +304,10 @@ def _generate_executive_summary(
     category = product_info.get('category', 'software')
     
     # Calculate overall score
-    overall_score = sum(s.get('weightedScore', 0) for s in scores) if scores else 0
+    overall_score = _overall_score(scores)
     
     # Get top pros and cons
-    top_pros = sorted(pros, key=lambda x: x.get('score', 0), reverse=True)[:3]
-    top_cons = sorted(cons, key=lambda x: x.get('score', 0))[:3]
+    top_pros, top_cons = _top_pros_cons(pros, cons)
     
     # Generate summary text
     if writing_style == 'professional':
@@ -174,13 +350,8 @@ def _generate_overview_section(
     category = product_info.get('category', 'software')
     description = product_info.get('description', '')
     
-    # Extract key features from claims
-    feature_claims = [c for c in claims if c.get('type') == 'feature']
-    key_features = [c.get('key', '') for c in feature_claims[:5]]
-    
-    # Extract pricing information
-    pricing_claims = [c for c in claims if c.get('type') == 'pricing']
-    pricing_info = pricing_claims[0].get('value', 'Pricing varies') if pricing_claims else 'Pricing not specified'
+    # Extract key features and pricing information from claims
+    key_features, pricing_info = _overview_facts(claims)
     
     if writing_style == 'professional':
         overview_text = f"{product_name} is a comprehensive {category} platform designed to address modern business needs. "
@@ -217,17 +388,7 @@ def _generate_detailed_analysis(
     product_name = product_info.get('name', 'this product')
     
     # Group scores by criterion
-    criterion_scores = {}
-    for score in scores:
-        criterion_id = score.get('criterionId')
-        criterion = next((c for c in criteria if c['id'] == criterion_id), None)
-        if criterion:
-            criterion_name = criterion.get('name', 'Unknown')
-            criterion_scores[criterion_name] = {
-                'score': score.get('normalizedScore', 0),
-                'weight': criterion.get('weight', 0),
-                'justification': score.get('justification', '')
-            }
+    criterion_scores = _criterion_scores(scores, criteria)
     
     # Sort criteria by weight
     sorted_criteria = sorted(criterion_scores.items(), key=lambda x: x[1]['weight'], reverse=True)
@@ -349,7 +510,7 @@ def _generate_conclusion(
 ) -> Dict[str, Any]:
     """Generate conclusion section."""
     product_name = product_info.get('name', 'this product')
-    overall_score = sum(s.get('weightedScore', 0) for s in scores) if scores else 0
+    overall_score = _overall_score(scores)
     
     if writing_style == 'professional':
         conclusion_text = f"In conclusion, {product_name} represents a {overall_score:.1%} performing solution that offers significant value for the right use cases. "
@@ -386,7 +547,7 @@ def _generate_recommendations(
 ) -> Dict[str, Any]:
     """Generate recommendations section."""
     product_name = product_info.get('name', 'this product')
-    overall_score = sum(s.get('weightedScore', 0) for s in scores) if scores else 0
+    overall_score = _overall_score(scores)
     
     recommendations_text = f"Based on our comprehensive analysis, here are our recommendations for {product_name}: "
     
@@ -424,6 +585,39 @@ def _generate_recommendations(
         ]
     }
 
+def _overall_score(scores: List[Dict[str, Any]]) -> float:
+    """Overall score as the sum of weighted criterion scores."""
+    return sum(s.get('weightedScore', 0) for s in scores) if scores else 0
+
+def _top_pros_cons(pros: List[Dict[str, Any]], cons: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+    """Three highest-scoring pros and three lowest-scoring cons."""
+    top_pros = sorted(pros, key=lambda x: x.get('score', 0), reverse=True)[:3]
+    top_cons = sorted(cons, key=lambda x: x.get('score', 0))[:3]
+    return top_pros, top_cons
+
+def _overview_facts(claims: List[Dict[str, Any]]) -> Tuple[List[str], str]:
+    """Key feature names and headline pricing used by the overview."""
+    feature_claims = [c for c in claims if c.get('type') == 'feature']
+    key_features = [c.get('key', '') for c in feature_claims[:5]]
+    
+    pricing_claims = [c for c in claims if c.get('type') == 'pricing']
+    pricing_info = pricing_claims[0].get('value', 'Pricing varies') if pricing_claims else 'Pricing not specified'
+    return key_features, pricing_info
+
+def _criterion_scores(scores: List[Dict[str, Any]], criteria: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Scores keyed by criterion name, with the criterion weight."""
+    criteria_by_id = {c['id']: c for c in criteria}
+    criterion_scores = {}
+    for score in scores:
+        criterion = criteria_by_id.get(score.get('criterionId'))
+        if criterion:
+            criterion_scores[criterion.get('name', 'Unknown')] = {
+                'score': score.get('normalizedScore', 0),
+                'weight': criterion.get('weight', 0),
+                'justification': score.get('justification', '')
+            }
+    return criterion_scores
+
 def _calculate_total_words(sections: List[Dict[str, Any]]) -> int:
     """Calculate total word count across all sections."""
     total = 0
@@ -431,3 +625,92 @@ def _calculate_total_words(sections: List[Dict[str, Any]]) -> int:
         if isinstance(section, dict) and 'word_count' in section:
             total += section['word_count']
     return total
+
+# Streamed deltas are flushed once this many characters are buffered
+DRAFT_CHUNK_CHARS = 160
+
+# Sections in output order, each with the sections it must wait for
+SECTION_DEPENDENCIES = {
+    'executive_summary': ('detailed_analysis', 'pros_cons'),
+    'overview': (),
+    'detailed_analysis': (),
+    'pros_cons': (),
+    'use_cases': (),
+    'conclusion': ('detailed_analysis', 'pros_cons', 'use_cases'),
+    'recommendations': ()
+}
+
+SECTION_BUILDERS = {
+    'executive_summary': lambda i: _generate_executive_summary(
+        i['product_info'], i['scores'], i['pros'], i['cons'], i['target_audience'], i['writing_style']
+    ),
+    'overview': lambda i: _generate_overview_section(
+        i['product_info'], i['claims'], i['criteria'], i['writing_style']
+    ),
+    'detailed_analysis': lambda i: _generate_detailed_analysis(
+        i['product_info'], i['claims'], i['scores'], i['criteria'], i['writing_style']
+    ),
+    'pros_cons': lambda i: _generate_pros_cons_section(
+        i['pros'], i['cons'], i['writing_style']
+    ),
+    'use_cases': lambda i: _generate_use_cases_section(
+        i['use_cases'], i['product_info'], i['writing_style']
+    ),
+    'conclusion': lambda i: _generate_conclusion(
+        i['product_info'], i['scores'], i['pros'], i['cons'], i['use_cases'], i['target_audience'], i['writing_style']
+    ),
+    'recommendations': lambda i: _generate_recommendations(
+        i['product_info'], i['scores'], i['pros'], i['cons'], i['use_cases'], i['target_audience']
+    )
+}
+
+# Bump to invalidate cached sections when templates or prompts change
+SECTION_CACHE_VERSION = 2
+
+# The subset of inputs each section builder reads (template text only; LLM sections hash their prompt)
+SECTION_INPUTS = {
+    'executive_summary': lambda i: {
+        'product': [i['product_info'].get('name'), i['product_info'].get('category')],
+        'overall_score': _overall_score(i['scores']),
+        'top_pros_cons': [[p.get('title') for p in top] for top in _top_pros_cons(i['pros'], i['cons'])],
+        'target_audience': i['target_audience'],
+        'writing_style': i['writing_style']
+    },
+    'overview': lambda i: {
+        'product': [i['product_info'].get(k) for k in ('name', 'category', 'description')],
+        'facts': _overview_facts(i['claims']),
+        'writing_style': i['writing_style']
+    },
+    'detailed_analysis': lambda i: {
+        'product': i['product_info'].get('name'),
+        'criterion_scores': _criterion_scores(i['scores'], i['criteria']),
+        'writing_style': i['writing_style']
+    },
+    'pros_cons': lambda i: {
+        'pros': [[p.get('title'), p.get('description')] for p in i['pros'][:5]],
+        'cons': [[c.get('title'), c.get('description')] for c in i['cons'][:5]],
+        'counts': [len(i['pros']), len(i['cons'])],
+        'writing_style': i['writing_style']
+    },
+    'use_cases': lambda i: {
+        'product': i['product_info'].get('name'),
+        'use_cases': [
+            [u.get(k) for k in ('title', 'detailed_description', 'complexity', 'time_to_value')]
+            for u in i['use_cases'][:3]
+        ],
+        'count': len(i['use_cases']),
+        'writing_style': i['writing_style']
+    },
+    'conclusion': lambda i: {
+        'product': i['product_info'].get('name'),
+        'overall_score': _overall_score(i['scores']),
+        'counts': [len(i['pros']), len(i['cons'])],
+        'target_audience': i['target_audience'],
+        'writing_style': i['writing_style']
+    },
+    'recommendations': lambda i: {
+        'product': i['product_info'].get('name'),
+        'overall_score': _overall_score(i['scores']),
+        'leads': [items[0].get('title') if items else None for items in (i['pros'], i['cons'], i['use_cases'])]
+    }
+}
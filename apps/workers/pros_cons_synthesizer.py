@@ -1,11 +1,85 @@
 import structlog
 from celery import shared_task
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import defaultdict
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 import json
 import re
+import numpy as np
 
 logger = structlog.get_logger()
 
+# Map criterion names to relevant claim patterns
+CRITERION_PATTERNS = {
+    'price': ('price', 'cost', 'pricing', 'subscription', 'monthly', 'annual'),
+    'performance': ('speed', 'performance', 'fast', 'slow', 'efficient'),
+    'quality': ('quality', 'resolution', 'accuracy', 'precision'),
+    'ease of use': ('easy', 'simple', 'intuitive', 'user-friendly', 'interface'),
+    'features': ('feature', 'functionality', 'capability', 'tool'),
+    'support': ('support', 'help', 'documentation', 'tutorial'),
+    'reliability': ('reliable', 'stable', 'robust', 'dependable'),
+    'scalability': ('scale', 'scalable', 'growth', 'enterprise')
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-]*")
+
+# Numeric claims within 5% of each other are treated as the same value
+CONTRADICTION_TOLERANCE = 0.05
+
+_CURRENCY_SYMBOLS = {'$': 'usd', '€': 'eur', '£': 'gbp', '¥': 'jpy'}
+_CURRENCY_CODES = {'dollars': 'usd', 'dollar': 'usd', 'euros': 'eur', 'euro': 'eur', 'pounds': 'gbp'}
+_MAGNITUDES = {'k': 1e3, 'm': 1e6, 'b': 1e9}
+_PERIOD_ALIASES = {
+    'mo': 'month', 'month': 'month', 'monthly': 'month',
+    'yr': 'year', 'year': 'year', 'annum': 'year', 'annually': 'year', 'yearly': 'year',
+    'wk': 'week', 'week': 'week', 'weekly': 'week',
+    'day': 'day', 'daily': 'day',
+}
+_PERIODS_PER_MONTH = {'month': 1.0, 'year': 1 / 12, 'week': 4.33, 'day': 30.44}
+_PERIOD_PATTERN = "|".join(sorted(_PERIOD_ALIASES, key=len, reverse=True))
+_PER = r"(?:\s*/\s*|\s+(?:per|an?|each)\s+)"
+_QUANTITY_RE = re.compile(
+    r"^(?P<symbol>[$€£¥])?\s*(?P<number>\d[\d,]*(?:\.\d+)?)(?P<magnitude>[kmb](?![a-z]))?(?:\s*(?P<percent>%))?"
+    r"(?:\s*(?P<unit>[a-z][a-z ]*?))??"
+    r"(?:" + _PER + r"(?!(?:" + _PERIOD_PATTERN + r")\b)(?P<per>[a-z]+))?"
+    r"(?:" + _PER + r"(?P<period>" + _PERIOD_PATTERN + r")"
+    r"|\s*(?P<suffix>monthly|yearly|annually|weekly|daily))?\.?$"
+)
+
+
+class ClaimIndex:
+    """Token inverted index over claim key/value text, built once per task."""
+    
+    def __init__(self, claims: List[Dict[str, Any]]):
+        self.claims = claims
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        for position, claim in enumerate(claims):
+            claim_text = f"{claim.get('key', '')} {claim.get('value', '')}".lower()
+            for token in _TOKEN_RE.findall(claim_text):
+                self._postings[token].add(position)
+        self._pattern_matches: Dict[str, Set[int]] = {}
+    
+    def positions(self, pattern: str) -> Set[int]:
+        """Positions of claims with a token containing the pattern (memoized)."""
+        matches = self._pattern_matches.get(pattern)
+        if matches is None:
+            # Scan the vocabulary, not the claims, to keep substring semantics
+            matches = set()
+            for token, token_positions in self._postings.items():
+                if pattern in token:
+                    matches |= token_positions
+            self._pattern_matches[pattern] = matches
+        return matches
+    
+    def find(self, patterns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Claims matching any of the patterns, in original order."""
+        positions: Set[int] = set()
+        for pattern in patterns:
+            positions |= self.positions(pattern)
+        return [self.claims[p] for p in sorted(positions)]
+
 @shared_task(bind=True, name='pros_cons_synthesizer.synthesize')
 def synthesize_pros_cons(
     self,
@@ -37,66 +111,9 @@ def synthesize_pros_cons(
                    claims_count=len(claims),
                    scores_count=len(scores))
         
-        # Group claims by type
-        feature_claims = [c for c in claims if c.get('type') == 'feature']
-        pricing_claims = [c for c in claims if c.get('type') == 'pricing']
-        limit_claims = [c for c in claims if c.get('type') == 'limit']
-        
-        # Analyze scores to identify strengths and weaknesses
-        strengths = []
-        weaknesses = []
-        
-        for score in scores:
-            criterion = next((c for c in criteria if c['id'] == score['criterionId']), None)
-            if not criterion:
-                continue
-                
-            normalized_score = score.get('normalizedScore', 0)
-            criterion_name = criterion.get('name', 'Unknown')
-            
-            if normalized_score >= 0.7:
-                strengths.append({
-                    'criterion': criterion_name,
-                    'score': normalized_score,
-                    'justification': score.get('justification', ''),
-                    'evidence': _find_supporting_claims(criterion_name, claims)
-                })
-            elif normalized_score <= 0.3:
-                weaknesses.append({
-                    'criterion': criterion_name,
-                    'score': normalized_score,
-                    'justification': score.get('justification', ''),
-                    'evidence': _find_supporting_claims(criterion_name, claims)
-                })
-        
-        # Generate pros from strengths and positive claims
-        pros = _generate_pros(strengths, feature_claims, product_info)
-        
-        # Generate cons from weaknesses and negative claims
-        cons = _generate_cons(weaknesses, limit_claims, pricing_claims, product_info)
-        
-        # Identify red flags
-        red_flags = _identify_red_flags(claims, scores, product_info)
-        
-        # Calculate confidence scores
-        pros_confidence = _calculate_confidence(pros, claims)
-        cons_confidence = _calculate_confidence(cons, claims)
-        
-        result = {
-            'review_id': review_id,
-            'product_id': product_id,
-            'pros': pros,
-            'cons': cons,
-            'red_flags': red_flags,
-            'metadata': {
-                'pros_confidence': pros_confidence,
-                'cons_confidence': cons_confidence,
-                'strengths_count': len(strengths),
-                'weaknesses_count': len(weaknesses),
-                'claims_analyzed': len(claims),
-                'criteria_covered': len(set(s['criterionId'] for s in scores))
-            }
-        }
+        criteria_by_id = {c['id']: c for c in criteria}
+        result = _synthesize_product(review_id, product_id, claims, scores, criteria_by_id, product_info)
+        pros, cons, red_flags = result['pros'], result['cons'], result['red_flags']
         
         logger.info("Pros/cons synthesis completed", 
                    review_id=review_id,
@@ -114,36 +131,198 @@ def synthesize_pros_cons(
                     error=str(e))
         raise self.retry(countdown=60, max_retries=3)
 
-def _find_supporting_claims(criterion_name: str, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Find claims that support a given criterion."""
-    supporting_claims = []
-    
-    # Map criterion names to relevant claim patterns
-    criterion_patterns = {
-        'price': ['price', 'cost', 'pricing', 'subscription', 'monthly', 'annual'],
-        'performance': ['speed', 'performance', 'fast', 'slow', 'efficient'],
-        'quality': ['quality', 'resolution', 'accuracy', 'precision'],
-        'ease of use': ['easy', 'simple', 'intuitive', 'user-friendly', 'interface'],
-        'features': ['feature', 'functionality', 'capability', 'tool'],
-        'support': ['support', 'help', 'documentation', 'tutorial'],
-        'reliability': ['reliable', 'stable', 'robust', 'dependable'],
-        'scalability': ['scale', 'scalable', 'growth', 'enterprise']
+@shared_task(bind=True, name='pros_cons_synthesizer.synthesize_batch')
+def synthesize_pros_cons_batch(
+    self,
+    review_id: str,
+    products: List[Dict[str, Any]],
+    criteria: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Synthesize pros, cons and red flags for every product of a review in one pass.
+    
+    Args:
+        review_id: Review identifier
+        products: Products to synthesize, each with product_id, claims, scores and product_info
+        criteria: List of evaluation criteria shared by the review
+    
+    Returns:
+        Dictionary containing per-product results and batch metadata
+    """
+    try:
+        logger.info("Starting batch pros/cons synthesis", 
+                   review_id=review_id, 
+                   products_count=len(products))
+        
+        # Shared setup: criteria lookup and the review-wide score matrix
+        criteria_by_id = {c['id']: c for c in criteria}
+        relative = _compute_relative_strengths(products, criteria)
+        
+        results = []
+        for product in products:
+            product_id = product.get('product_id')
+            result = _synthesize_product(
+                review_id,
+                product_id,
+                product.get('claims', []),
+                product.get('scores', []),
+                criteria_by_id,
+                product.get('product_info', {})
+            )
+            result['relative_strengths'] = relative.get(product_id, {}).get('strengths', [])
+            result['relative_weaknesses'] = relative.get(product_id, {}).get('weaknesses', [])
+            results.append(result)
+        
+        logger.info("Batch pros/cons synthesis completed", 
+                   review_id=review_id,
+                   products_count=len(results))
+        
+        return {
+            'review_id': review_id,
+            'products': results,
+            'metadata': {
+                'products_count': len(results),
+                'criteria_count': len(criteria)
+            }
+        }
+        
+    except Exception as e:
+        logger.error("Error in batch pros/cons synthesis", 
+                    review_id=review_id,
+                    error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+def _synthesize_product(
+    review_id: str,
+    product_id: str,
+    claims: List[Dict[str, Any]],
+    scores: List[Dict[str, Any]],
+    criteria_by_id: Dict[str, Dict[str, Any]],
+    product_info: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Synthesize pros, cons and red flags for one product."""
+    # Group claims by type
+    feature_claims = [c for c in claims if c.get('type') == 'feature']
+    pricing_claims = [c for c in claims if c.get('type') == 'pricing']
+    limit_claims = [c for c in claims if c.get('type') == 'limit']
+    
+    claim_index = ClaimIndex(claims)
+    
+    # Analyze scores to identify strengths and weaknesses
+    strengths = []
+    weaknesses = []
+    
+    for score in scores:
+        criterion = criteria_by_id.get(score['criterionId'])
+        if not criterion:
+            continue
+            
+        normalized_score = score.get('normalizedScore', 0)
+        criterion_name = criterion.get('name', 'Unknown')
+        
+        if normalized_score >= 0.7:
+            strengths.append({
+                'criterion': criterion_name,
+                'score': normalized_score,
+                'justification': score.get('justification', ''),
+                'evidence': _find_supporting_claims(criterion_name, claim_index)
+            })
+        elif normalized_score <= 0.3:
+            weaknesses.append({
+                'criterion': criterion_name,
+                'score': normalized_score,
+                'justification': score.get('justification', ''),
+                'evidence': _find_supporting_claims(criterion_name, claim_index)
+            })
+    
+    # Generate pros from strengths and positive claims
+    pros = _generate_pros(strengths, feature_claims, product_info)
+    
+    # Generate cons from weaknesses and negative claims
+    cons = _generate_cons(weaknesses, limit_claims, pricing_claims, product_info)
+    
+    # Identify red flags
+    red_flags = _identify_red_flags(claims, scores, criteria_by_id, product_info)
+    
+    # Calculate confidence scores
+    pros_confidence = _calculate_confidence(pros, claims)
+    cons_confidence = _calculate_confidence(cons, claims)
+    
+    return {
+        'review_id': review_id,
+        'product_id': product_id,
+        'pros': pros,
+        'cons': cons,
+        'red_flags': red_flags,
+        'metadata': {
+            'pros_confidence': pros_confidence,
+            'cons_confidence': cons_confidence,
+            'strengths_count': len(strengths),
+            'weaknesses_count': len(weaknesses),
+            'claims_analyzed': len(claims),
+            'criteria_covered': len(set(s['criterionId'] for s in scores))
+        }
     }
+
+def _compute_relative_strengths(
+    products: List[Dict[str, Any]],
+    criteria: List[Dict[str, Any]],
+    threshold: float = 0.15
+) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """Compare each product's normalized scores with the average of its review peers."""
+    if len(products) < 2 or not criteria:
+        return {}
+    
+    column = {c['id']: j for j, c in enumerate(criteria)}
+    matrix = np.full((len(products), len(criteria)), np.nan)
+    for i, product in enumerate(products):
+        for score in product.get('scores', []):
+            j = column.get(score.get('criterionId'))
+            if j is not None:
+                matrix[i, j] = score.get('normalizedScore', 0)
     
-    # Find relevant patterns for the criterion
+    # Peer average excludes the product itself
+    present = ~np.isnan(matrix)
+    values = np.where(present, matrix, 0.0)
+    peer_counts = present.sum(axis=0) - present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peer_average = (values.sum(axis=0) - values) / peer_counts
+    delta = matrix - peer_average
+    
+    relative = {}
+    for i, product in enumerate(products):
+        strengths, weaknesses = [], []
+        for j, criterion in enumerate(criteria):
+            if not present[i, j] or peer_counts[i, j] == 0:
+                continue
+            entry = {
+                'criterion': criterion.get('name', 'Unknown'),
+                'score': float(matrix[i, j]),
+                'peer_average': round(float(peer_average[i, j]), 4),
+                'delta': round(float(delta[i, j]), 4)
+            }
+            if delta[i, j] >= threshold:
+                strengths.append(entry)
+            elif delta[i, j] <= -threshold:
+                weaknesses.append(entry)
+        relative[product.get('product_id')] = {
+            'strengths': sorted(strengths, key=lambda e: e['delta'], reverse=True),
+            'weaknesses': sorted(weaknesses, key=lambda e: e['delta'])
+        }
+    return relative
+
+def _find_supporting_claims(criterion_name: str, claim_index: ClaimIndex) -> List[Dict[str, Any]]:
+    """Find claims that support a given criterion."""
+    return claim_index.find(_criterion_patterns(criterion_name.lower()))
+
+@lru_cache(maxsize=1024)
+def _criterion_patterns(criterion_lower: str) -> Tuple[str, ...]:
+    """Find relevant claim patterns for a criterion name."""
     relevant_patterns = []
-    criterion_lower = criterion_name.lower()
-    for pattern_key, patterns in criterion_patterns.items():
+    for patterns in CRITERION_PATTERNS.values():
         if any(pattern in criterion_lower for pattern in patterns):
             relevant_patterns.extend(patterns)
-    
-    # Find claims that match the patterns
-    for claim in claims:
-        claim_text = f"{claim.get('key', '')} {claim.get('value', '')}".lower()
-        if any(pattern in claim_text for pattern in relevant_patterns):
-            supporting_claims.append(claim)
-    
-    return supporting_claims
+    return tuple(relevant_patterns)
 
 def _generate_pros(strengths: List[Dict], feature_claims: List[Dict], product_info: Dict) -> List[Dict]:
     """Generate pros based on strengths and positive claims."""
@@ -232,16 +411,19 @@ def _generate_cons(weaknesses: List[Dict], limit_claims: List[Dict], pricing_cla
     
     return cons[:10]  # Limit to top 10 cons
 
-def _identify_red_flags(claims: List[Dict], scores: List[Dict], product_info: Dict) -> List[Dict]:
+def _identify_red_flags(claims: List[Dict], scores: List[Dict], criteria_by_id: Dict[str, Dict], product_info: Dict) -> List[Dict]:
     """Identify potential red flags."""
     red_flags = []
     
     # Check for missing critical information
     critical_criteria = ['price', 'performance', 'quality', 'support']
-    covered_criteria = set(s.get('criterionId') for s in scores)
+    covered_criteria = [
+        criteria_by_id[s.get('criterionId')].get('name', '').lower()
+        for s in scores if s.get('criterionId') in criteria_by_id
+    ]
     
     for criterion in critical_criteria:
-        if not any(criterion in c.get('name', '').lower() for c in covered_criteria):
+        if not any(criterion in name for name in covered_criteria):
             red_flags.append({
                 'id': f"red_flag_{len(red_flags)}",
                 'title': f"Missing {criterion.title()} Information",
@@ -292,31 +474,113 @@ def _is_expensive_claim(claim: Dict) -> bool:
     return any(word in claim_text for word in expensive_words)
 
 def _find_contradictions(claims: List[Dict]) -> List[Dict]:
-    """Find contradictory claims."""
+    """
+    Find contradictory claims about the same (product, key).
+    
+    Numeric claims contradict when their normalized values fall outside a
+    shared tolerance band for the same unit; text claims when their normalized
+    text differs. Sort-based grouping keeps this O(n log n).
+    """
     contradictions = []
     
-    # Group claims by topic
-    topic_groups = {}
-    for claim in claims:
-        topic = _extract_topic(claim)
-        if topic not in topic_groups:
-            topic_groups[topic] = []
-        topic_groups[topic].append(claim)
-    
-    # Check for contradictions within topics
-    for topic, topic_claims in topic_groups.items():
-        if len(topic_claims) > 1:
-            # Simple contradiction detection based on value differences
-            values = [c.get('value', '') for c in topic_claims]
-            if len(set(values)) > 1:
-                contradictions.append({
-                    'topic': topic,
-                    'claims': topic_claims,
-                    'values': values
-                })
+    entries = []
+    for position, claim in enumerate(claims):
+        key = str(claim.get('key', '')).strip().lower()
+        parsed = _parse_claim_quantity(claim)
+        if parsed is not None:
+            value, unit = parsed
+            entries.append((str(claim.get('product_id') or ''), key, 0, unit, value, position))
+        else:
+            text = ' '.join(str(claim.get('value', '')).lower().split())
+            entries.append((str(claim.get('product_id') or ''), key, 1, '', text, position))
+    entries.sort()
+    
+    for (product_id, key), group in groupby(entries, key=itemgetter(0, 1)):
+        group = list(group)
+        if len(group) < 2:
+            continue
+        
+        conflicting: List[int] = []
+        for (kind, unit), subgroup in groupby(group, key=itemgetter(2, 3)):
+            subgroup = list(subgroup)
+            if kind == 0:
+                bands = _tolerance_bands([entry[4] for entry in subgroup])
+            else:
+                bands = len(set(entry[4] for entry in subgroup))
+            if bands > 1:
+                conflicting.extend(entry[5] for entry in subgroup)
+        
+        if conflicting:
+            topic_claims = [claims[position] for position in sorted(conflicting)]
+            contradictions.append({
+                'topic': key or _extract_topic(topic_claims[0]),
+                'product_id': product_id or None,
+                'claims': topic_claims,
+                'values': [c.get('value', '') for c in topic_claims]
+            })
     
     return contradictions
 
+def _tolerance_bands(values: List[float]) -> int:
+    """Count the tolerance bands needed to cover sorted values."""
+    bands = 0
+    band_start = None
+    for value in values:
+        if band_start is None or value - band_start > max(abs(band_start), abs(value)) * CONTRADICTION_TOLERANCE:
+            bands += 1
+            band_start = value
+    return bands
+
+def _parse_claim_quantity(claim: Dict) -> Optional[Tuple[float, str]]:
+    """
+    Return (value, canonical unit) for a numeric claim, preferring the
+    extractor's numeric_value/unit. "$29/month" and "29 USD per month" both
+    yield (29.0, 'usd/month'); yearly amounts are converted to monthly.
+    """
+    numeric_value = claim.get('numeric_value')
+    unit = claim.get('unit')
+    if numeric_value is not None and unit:
+        parsed_unit = _parse_quantity(f"1 {unit}")
+        if parsed_unit is not None:
+            scale, canonical = parsed_unit
+            return float(numeric_value) * scale, canonical
+    
+    value = claim.get('value')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), str(unit or '').strip().lower()
+    if not isinstance(value, str):
+        return None
+    return _parse_quantity(value)
+
+@lru_cache(maxsize=4096)
+def _parse_quantity(text: str) -> Optional[Tuple[float, str]]:
+    """Parse a single quantity such as '$29/month', '1,000 calls per month', '$0.5 per render' or '99.9%'."""
+    match = _QUANTITY_RE.match(text.strip().lower())
+    if not match:
+        return None
+    
+    value = float(match.group('number').replace(',', ''))
+    value *= _MAGNITUDES.get(match.group('magnitude') or '', 1)
+    
+    # Currency and written unit stay separate parts: '$0.5 per render' is usd/render, not usd
+    unit = (match.group('unit') or '').strip()
+    currency = _CURRENCY_SYMBOLS.get(match.group('symbol') or '') or _CURRENCY_CODES.get(unit)
+    if currency and unit in _CURRENCY_CODES:
+        unit = ''
+    unit = ' '.join(part for part in (currency, match.group('percent'), unit) if part)
+    
+    per = match.group('per')
+    if per:
+        unit = f"{unit}/{per}" if unit else f"per {per}"
+    
+    period = match.group('period') or match.group('suffix')
+    if period:
+        period = _PERIOD_ALIASES[period]
+        value *= _PERIODS_PER_MONTH[period]
+        unit = f"{unit}/month" if unit else 'per month'
+    
+    return value, unit
+
 def _extract_topic(claim: Dict) -> str:
     """Extract the main topic from a claim."""
     key = claim.get('key', '').lower()
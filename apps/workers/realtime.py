@@ -0,0 +1,118 @@
+import structlog
+from typing import Dict, Any, List, Optional, Protocol
+from collections import defaultdict
+import json
+import queue
+import threading
+from functools import lru_cache
+
+from config import settings
+from redis_client import get_redis
+
+logger = structlog.get_logger()
+
+# Messages sent per Redis round trip by the publisher thread
+REALTIME_PUBLISH_BATCH = 100
+
+
+def review_channel(review_id: str, topic: str) -> str:
+    """Realtime channel name for a review topic (see ARCH.md), e.g. review:{id}:draft."""
+    return f"review:{review_id}:{topic}"
+
+
+class Publisher(Protocol):
+    """Fire-and-forget publisher for realtime channels."""
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        ...
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until published messages are delivered; False if it timed out."""
+        ...
+
+
+class RedisPublisher:
+    """
+    Publishes JSON messages over Redis pub/sub from a background thread.
+
+    publish() only enqueues, so callers on an event loop never wait on a
+    Redis round trip; the sender thread pipelines whatever is queued, in
+    order. A full queue or a Redis failure drops messages with a warning and
+    never breaks the caller.
+    """
+
+    def __init__(self, max_pending: Optional[int] = None):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending or settings.REALTIME_MAX_PENDING)
+        self._lock = threading.Lock()
+        self._sender: Optional[threading.Thread] = None
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._ensure_sender()
+        try:
+            self._queue.put_nowait((channel, json.dumps(message)))
+        except queue.Full:
+            logger.warning("Realtime publish queue full, dropping message", channel=channel)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _ensure_sender(self) -> None:
+        # Started lazily (and again in a forked child, where it isn't running)
+        with self._lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(target=self._send_forever, name='realtime-publisher', daemon=True)
+                self._sender.start()
+
+    def _send_forever(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < REALTIME_PUBLISH_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                for channel, payload in batch:
+                    pipe.publish(channel, payload)
+                pipe.execute()
+            except Exception as e:
+                logger.warning("Realtime publish failed", messages=len(batch), error=str(e))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class InMemoryBroker:
+    """In-process stand-in for Redis pub/sub, used by tests and local runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[queue.Queue]] = defaultdict(list)
+        self.published: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    def subscribe(self, channel: str) -> queue.Queue:
+        """Queue receiving every message published to channel from now on."""
+        subscriber: queue.Queue = queue.Queue()
+        with self._lock:
+            self._subscribers[channel].append(subscriber)
+        return subscriber
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        # Round-trip through JSON so tests see what a Redis subscriber would
+        message = json.loads(json.dumps(message))
+        with self._lock:
+            self.published[channel].append(message)
+            subscribers = list(self._subscribers[channel])
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+
+@lru_cache(maxsize=1)
+def get_publisher() -> Publisher:
+    """Process-wide realtime publisher for workers."""
+    return RedisPublisher()
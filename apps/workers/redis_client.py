@@ -0,0 +1,148 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import time
+
+import redis
+
+from config import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client backed by a shared connection pool."""
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+class InMemoryRedis:
+    """In-process stand-in for the Redis commands the link graph, link health cache, export cache and criteria index use."""
+
+    def __init__(self):
+        self._values: Dict[str, str] = {}
+        self._expires: Dict[str, float] = {}
+        self._zsets: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+    def pipeline(self) -> "_InMemoryRedisPipeline":
+        return _InMemoryRedisPipeline(self)
+
+    def get(self, key: str) -> Optional[str]:
+        if key in self._expires and self._expires[key] <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return self._values.get(key)
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: str, ex: Optional[float] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self.get(key) is not None:
+            return None
+        self._values[key] = value
+        if ex:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    def incr(self, key: str) -> int:
+        value = int(self.get(key) or 0) + 1
+        self._values[key] = str(value)
+        return value
+
+    def ttl(self, key: str) -> int:
+        if self.get(key) is None:
+            return -2
+        if key not in self._expires:
+            return -1
+        return int(self._expires[key] - time.monotonic())
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            removed += int(self._values.pop(key, None) is not None)
+            removed += int(self._zsets.pop(key, None) is not None)
+            self._expires.pop(key, None)
+        return removed
+
+    def zadd(self, key: str, mapping: Dict[str, float], xx: bool = False) -> int:
+        if xx:
+            mapping = {member: score for member, score in mapping.items() if member in self._zsets.get(key, {})}
+        added = sum(1 for member in mapping if member not in self._zsets[key])
+        self._zsets[key].update(mapping)
+        return added
+
+    def zrem(self, key: str, *members: str) -> int:
+        zset = self._zsets.get(key, {})
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    def zcard(self, key: str) -> int:
+        return len(self._zsets.get(key, {}))
+
+    def zrevrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        ranked = self._ranked(key, reverse=True)
+        ranked = ranked[start:] if end == -1 else ranked[start:end + 1]
+        return ranked if withscores else [member for member, _score in ranked]
+
+    def zrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        ranked = self._ranked(key, reverse=False)
+        ranked = ranked[start:] if end == -1 else ranked[start:end + 1]
+        return ranked if withscores else [member for member, _score in ranked]
+
+    def zrangebyscore(self, key: str, min_score, max_score) -> List[str]:
+        low, high = float(min_score), float(max_score)
+        return [member for member, score in self._ranked(key, reverse=False) if low <= score <= high]
+
+    def zremrangebyrank(self, key: str, start: int, end: int) -> int:
+        ranked = self._ranked(key, reverse=False)
+        end = len(ranked) + end if end < 0 else end
+        doomed = ranked[start:end + 1] if end >= start else []
+        return self.zrem(key, *(member for member, _score in doomed))
+
+    def _snapshot(self, key: str) -> tuple:
+        return self.get(key), dict(self._zsets.get(key, {}))
+
+    def _ranked(self, key: str, reverse: bool) -> List[Tuple[str, float]]:
+        # Redis orders ties by member, reversed along with the scores
+        return sorted(self._zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+
+
+class _InMemoryRedisPipeline:
+    """Queues commands until execute; after watch(), commands run immediately until multi()."""
+
+    def __init__(self, store: InMemoryRedis):
+        self._store = store
+        self._commands: List[Tuple[str, tuple, dict]] = []
+        self._watched: Dict[str, tuple] = {}
+        self._immediate = False
+
+    def __enter__(self) -> "_InMemoryRedisPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.reset()
+
+    def __getattr__(self, name: str):
+        if self._immediate:
+            return getattr(self._store, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def watch(self, *keys: str) -> None:
+        self._watched.update((key, self._store._snapshot(key)) for key in keys)
+        self._immediate = True
+
+    def multi(self) -> None:
+        self._immediate = False
+
+    def reset(self) -> None:
+        self._commands, self._watched, self._immediate = [], {}, False
+
+    def execute(self) -> list:
+        commands, watched = self._commands, self._watched
+        self.reset()
+        if any(self._store._snapshot(key) != snapshot for key, snapshot in watched.items()):
+            raise redis.WatchError("Watched variable changed.")
+        return [getattr(self._store, name)(*args, **kwargs) for name, args, kwargs in commands]
@@ -0,0 +1,76 @@
+import structlog
+from typing import Dict, Any, Optional, Protocol
+from collections import OrderedDict
+import json
+import threading
+
+from config import settings
+from redis_client import get_redis
+
+logger = structlog.get_logger()
+
+
+class SectionCache(Protocol):
+    """Generated narrative sections keyed by their input hash."""
+
+    def get(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def set(self, input_hash: str, section: Dict[str, Any]) -> None:
+        ...
+
+
+class InMemorySectionCache:
+    """Process-local LRU section cache, used by tests and local runs."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stored = self._entries.get(input_hash)
+            if stored is None:
+                return None
+            self._entries.move_to_end(input_hash)
+        return json.loads(stored)
+
+    def set(self, input_hash: str, section: Dict[str, Any]) -> None:
+        # Stored as JSON so callers never share mutable section dicts
+        stored = json.dumps(section)
+        with self._lock:
+            self._entries[input_hash] = stored
+            self._entries.move_to_end(input_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisSectionCache:
+    """Section cache shared across workers; a cache outage only costs regeneration."""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or settings.NARRATIVE_SECTION_CACHE_TTL_SECONDS
+
+    def get(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            stored = get_redis().get(_section_key(input_hash))
+        except Exception as e:
+            logger.warning("Could not read cached section", input_hash=input_hash, error=str(e))
+            return None
+        return json.loads(stored) if stored else None
+
+    def set(self, input_hash: str, section: Dict[str, Any]) -> None:
+        try:
+            get_redis().set(_section_key(input_hash), json.dumps(section), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning("Could not cache section", input_hash=input_hash, error=str(e))
+
+
+def _section_key(input_hash: str) -> str:
+    return f"narrative_section:{input_hash}"
+
+
+def get_section_cache() -> SectionCache:
+    """Default section cache for workers."""
+    return RedisSectionCache()
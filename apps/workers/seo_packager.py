@@ -1,12 +1,29 @@
 import structlog
 from celery import shared_task
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from functools import lru_cache
+import asyncio
 import json
 import re
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from llm import LLMClient, get_batching_client, record_llm_usage, track_llm_usage
+from text_matching import tokenize, count_phrases
+from link_graph import LinkGraph
+
 logger = structlog.get_logger()
 
+FAQ_ANSWER_MAX_TOKENS = 120
+RELATED_LINK_COUNT = 5
+SITE_NAME = "Product Review Crew"
+SITE_URL = "https://productreviewcrew.com"
+DEFAULT_IMAGE_URL = f"{SITE_URL}/images/default-review.jpg"
+
 @shared_task(bind=True, name='seo_packager.package')
 def package_seo_content(
     self,
@@ -17,7 +34,8 @@ def package_seo_content(
     scores: List[Dict[str, Any]],
     pros: List[Dict[str, Any]],
     cons: List[Dict[str, Any]],
-    target_keywords: Optional[List[str]] = None
+    target_keywords: Optional[List[str]] = None,
+    org_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Package review content with comprehensive SEO optimization.
@@ -31,6 +49,7 @@ def package_seo_content(
         pros: List of pros
         cons: List of cons
         target_keywords: Optional list of target keywords
+        org_id: Org whose published reviews are suggested as internal links
     
     Returns:
         Dictionary containing SEO metadata and structured data
@@ -55,12 +74,13 @@ def package_seo_content(
         twitter_card = _generate_twitter_card(product_info, review_sections, meta_data)
         
         # Generate schema markup
+        faq_answers = asyncio.run(_answer_faq_with_default_client(review_id, product_info, review_sections, claims))
         schema_markup = _generate_schema_markup(
-            product_info, review_sections, claims, scores
+            product_info, review_sections, claims, scores, faq_answers
         )
         
         # Generate internal linking suggestions
-        internal_links = _generate_internal_links(review_sections, product_info)
+        internal_links = _generate_internal_links(review_sections, product_info, review_id, org_id)
         
         # Generate keyword optimization suggestions
         keyword_suggestions = _generate_keyword_suggestions(
@@ -98,6 +118,137 @@ def package_seo_content(
                     error=str(e))
         raise self.retry(countdown=60, max_retries=3)
 
+@shared_task(bind=True, name='seo_packager.package_category')
+def package_category_seo(
+    self,
+    category: str,
+    reviews: List[Dict[str, Any]],
+    published_at: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Package SEO metadata for many reviews of one category (category hubs, sitemap rebuilds).
+    
+    Args:
+        category: Category shared by the reviews
+        reviews: Review payloads with review_id, product_info, review_sections, claims,
+            scores, pros, cons and optional target_keywords / faq_answers
+        published_at: Publication timestamp, defaults to now
+    
+    Returns:
+        Dictionary with a compact SEO package per review and the hub's ItemList JSON-LD
+    """
+    try:
+        logger.info("Starting category SEO packaging", 
+                   category=category, 
+                   reviews=len(reviews))
+        
+        packages = package_reviews_bulk(category, reviews, published_at)
+        
+        result = {
+            'category': category,
+            'packages': packages,
+            'hub_json_ld': _hub_json_ld(category, packages),
+            'metadata': {
+                'generated_at': datetime.utcnow().isoformat(),
+                'review_count': len(packages)
+            }
+        }
+        
+        logger.info("Category SEO packaging completed", 
+                   category=category,
+                   review_count=len(packages))
+        
+        return result
+        
+    except Exception as e:
+        logger.error("Error in category SEO packaging", 
+                    category=category,
+                    error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+def package_reviews_bulk(
+    category: str,
+    reviews: List[Dict[str, Any]],
+    published_at: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build SEO packages for a batch of same-category reviews.
+    
+    Site fragments and the timestamp are built once per batch, and the
+    per-product JSON-LD pieces (product, FAQ, breadcrumb) are serialized once
+    per distinct content and reused across reviews and batches. Each package
+    carries its JSON-LD as a ready-to-embed JSON array string; FAQ answers are
+    not generated here, pass previously generated ones as faq_answers.
+    """
+    published_at = published_at or datetime.utcnow().isoformat()
+    site = _site_fragments()
+    
+    packages = []
+    for review in reviews:
+        product_info = {**review.get('product_info', {}), 'category': category}
+        product_name = product_info.get('name', 'Product')
+        review_sections = review.get('review_sections', {})
+        rating_value = _rating_value(review.get('scores', []))
+        
+        meta_data = _generate_meta_data(product_info, review_sections, review.get('target_keywords'))
+        review_json_ld = _review_json_ld(
+            product_info, review_sections, review.get('claims', []), rating_value,
+            review.get('pros', []), review.get('cons', []), site, published_at
+        )
+        
+        # Every fragment is a JSON document, so joining them yields a valid array
+        json_ld = "[" + ",".join((
+            dumps_json(review_json_ld),
+            _product_json_ld_fragment(product_name, category, product_info.get('description', ''), rating_value),
+            _faq_json_ld_fragment(product_name, tuple(review.get('faq_answers') or ())),
+            _breadcrumb_json_ld_fragment(category, product_name, _review_slug(product_info))
+        )) + "]"
+        
+        packages.append({
+            'review_id': review.get('review_id'),
+            'product_id': product_info.get('id'),
+            'meta_data': meta_data,
+            'open_graph': _generate_open_graph(product_info, review_sections, meta_data, published_at),
+            'twitter_card': _generate_twitter_card(product_info, review_sections, meta_data),
+            'json_ld': json_ld
+        })
+    
+    return packages
+
+def dumps_json(data: Any) -> str:
+    """Compact JSON text, encoded with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+@lru_cache(maxsize=4096)
+def _product_json_ld_fragment(product_name: str, category: str, description: str, rating_value: float) -> str:
+    return dumps_json(_product_json_ld(product_name, category, description, rating_value))
+
+@lru_cache(maxsize=4096)
+def _faq_json_ld_fragment(product_name: str, faq_answers: Tuple[str, ...]) -> str:
+    return dumps_json(_faq_json_ld(product_name, faq_answers))
+
+@lru_cache(maxsize=4096)
+def _breadcrumb_json_ld_fragment(category: str, product_name: str, slug: str) -> str:
+    return dumps_json(_breadcrumb_json_ld(category, product_name, slug))
+
+def _hub_json_ld(category: str, packages: List[Dict[str, Any]]) -> str:
+    """ItemList JSON-LD for a category hub page linking every packaged review."""
+    return dumps_json({
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "name": f"{category.title()} reviews",
+        "itemListElement": [
+            {
+                "@type": "ListItem",
+                "position": position,
+                "url": f"{SITE_URL}{package['meta_data']['canonical_url']}"
+            }
+            for position, package in enumerate(packages, start=1)
+        ]
+    })
+
 def _generate_meta_data(
     product_info: Dict[str, Any],
     review_sections: Dict[str, Any],
@@ -138,7 +289,7 @@ def _generate_meta_data(
         'title': meta_title,
         'description': summary_text,
         'keywords': target_keywords or [f"{product_name} review", f"{category} review", "software review"],
-        'canonical_url': f"/reviews/{product_info.get('slug', product_name.lower().replace(' ', '-'))}",
+        'canonical_url': f"/reviews/{_review_slug(product_info)}",
         'robots': 'index, follow'
     }
 
@@ -153,16 +304,53 @@ def _generate_structured_data(
     """Generate JSON-LD structured data."""
     product_name = product_info.get('name', 'Product')
     category = product_info.get('category', 'software')
+    rating_value = _rating_value(scores)
     
-    # Calculate overall rating
+    return {
+        'review': _review_json_ld(
+            product_info, review_sections, claims, rating_value, pros, cons,
+            _site_fragments(), datetime.utcnow().isoformat()
+        ),
+        'product': _product_json_ld(product_name, category, product_info.get('description', ''), rating_value)
+    }
+
+def _rating_value(scores: List[Dict[str, Any]]) -> float:
+    """Overall weighted score on a 5-star scale."""
     overall_score = sum(s.get('weightedScore', 0) for s in scores) if scores else 0
-    rating_value = overall_score * 5  # Convert to 5-star scale
+    return round(overall_score * 5, 1)
+
+def _site_fragments() -> Dict[str, Any]:
+    """Organization fragments shared by every review on the site."""
+    return {
+        'author': {
+            "@type": "Organization",
+            "name": SITE_NAME
+        },
+        'publisher': {
+            "@type": "Organization",
+            "name": SITE_NAME,
+            "url": SITE_URL
+        }
+    }
+
+def _review_json_ld(
+    product_info: Dict[str, Any],
+    review_sections: Dict[str, Any],
+    claims: List[Dict[str, Any]],
+    rating_value: float,
+    pros: List[Dict[str, Any]],
+    cons: List[Dict[str, Any]],
+    site: Dict[str, Any],
+    published_at: str
+) -> Dict[str, Any]:
+    """Review JSON-LD for one review."""
+    product_name = product_info.get('name', 'Product')
+    category = product_info.get('category', 'software')
     
     # Extract pricing information
     pricing_claims = [c for c in claims if c.get('type') == 'pricing']
     price = pricing_claims[0].get('value', 'Contact for pricing') if pricing_claims else 'Contact for pricing'
     
-    # Generate review structured data
     review_structured_data = {
         "@context": "https://schema.org",
         "@type": "Review",
@@ -178,21 +366,14 @@ def _generate_structured_data(
         },
         "reviewRating": {
             "@type": "Rating",
-            "ratingValue": round(rating_value, 1),
+            "ratingValue": rating_value,
             "bestRating": 5,
             "worstRating": 1
         },
-        "author": {
-            "@type": "Organization",
-            "name": "Product Review Crew"
-        },
+        "author": site['author'],
         "reviewBody": review_sections.get('executive_summary', {}).get('content', ''),
-        "datePublished": datetime.utcnow().isoformat(),
-        "publisher": {
-            "@type": "Organization",
-            "name": "Product Review Crew",
-            "url": "https://productreviewcrew.com"
-        }
+        "datePublished": published_at,
+        "publisher": site['publisher']
     }
     
     # Add pros and cons if available
@@ -211,35 +392,37 @@ def _generate_structured_data(
                 "reviewBody": con.get('title', '')
             })
     
+    return review_structured_data
+
+def _product_json_ld(product_name: str, category: str, description: str, rating_value: float) -> Dict[str, Any]:
+    """SoftwareApplication JSON-LD for the reviewed product."""
     return {
-        'review': review_structured_data,
-        'product': {
-            "@context": "https://schema.org",
-            "@type": "SoftwareApplication",
-            "name": product_name,
-            "applicationCategory": category,
-            "description": product_info.get('description', ''),
-            "aggregateRating": {
-                "@type": "AggregateRating",
-                "ratingValue": round(rating_value, 1),
-                "bestRating": 5,
-                "worstRating": 1,
-                "ratingCount": 1
-            }
+        "@context": "https://schema.org",
+        "@type": "SoftwareApplication",
+        "name": product_name,
+        "applicationCategory": category,
+        "description": description,
+        "aggregateRating": {
+            "@type": "AggregateRating",
+            "ratingValue": rating_value,
+            "bestRating": 5,
+            "worstRating": 1,
+            "ratingCount": 1
         }
     }
 
 def _generate_open_graph(
     product_info: Dict[str, Any],
     review_sections: Dict[str, Any],
-    meta_data: Dict[str, Any]
+    meta_data: Dict[str, Any],
+    published_at: Optional[str] = None
 ) -> Dict[str, Any]:
     """Generate Open Graph tags."""
     product_name = product_info.get('name', 'Product')
     category = product_info.get('category', 'software')
     
     # Extract image URL (placeholder for now)
-    image_url = product_info.get('image_url', 'https://productreviewcrew.com/images/default-review.jpg')
+    image_url = product_info.get('image_url', DEFAULT_IMAGE_URL)
     
     return {
         'og:title': meta_data['title'],
@@ -249,9 +432,9 @@ def _generate_open_graph(
         'og:image': image_url,
         'og:image:width': '1200',
         'og:image:height': '630',
-        'og:site_name': 'Product Review Crew',
+        'og:site_name': SITE_NAME,
         'og:locale': 'en_US',
-        'article:published_time': datetime.utcnow().isoformat(),
+        'article:published_time': published_at or datetime.utcnow().isoformat(),
         'article:section': category,
         'article:tag': meta_data['keywords']
     }
@@ -265,7 +448,7 @@ def _generate_twitter_card(
     product_name = product_info.get('name', 'Product')
     
     # Extract image URL (placeholder for now)
-    image_url = product_info.get('image_url', 'https://productreviewcrew.com/images/default-review.jpg')
+    image_url = product_info.get('image_url', DEFAULT_IMAGE_URL)
     
     return {
         'twitter:card': 'summary_large_image',
@@ -280,13 +463,23 @@ def _generate_schema_markup(
     product_info: Dict[str, Any],
     review_sections: Dict[str, Any],
     claims: List[Dict[str, Any]],
-    scores: List[Dict[str, Any]]
+    scores: List[Dict[str, Any]],
+    faq_answers: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """Generate additional schema markup."""
     product_name = product_info.get('name', 'Product')
     category = product_info.get('category', 'software')
     
-    # Generate FAQ schema if we have pros/cons
+    return {
+        'faq': _faq_json_ld(product_name, faq_answers),
+        'breadcrumb': _breadcrumb_json_ld(category, product_name, _review_slug(product_info))
+    }
+
+def _review_slug(product_info: Dict[str, Any]) -> str:
+    return product_info.get('slug', product_info.get('name', 'Product').lower().replace(' ', '-'))
+
+def _faq_json_ld(product_name: str, faq_answers: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """FAQPage JSON-LD; questions without a generated answer point to the review."""
     faq_schema = {
         "@context": "https://schema.org",
         "@type": "FAQPage",
@@ -294,25 +487,25 @@ def _generate_schema_markup(
     }
     
     # Add common FAQ questions
-    faq_questions = [
-        f"Is {product_name} worth it?",
-        f"What are the main features of {product_name}?",
-        f"How much does {product_name} cost?",
-        f"What are the alternatives to {product_name}?"
-    ]
+    faq_questions = _faq_questions(product_name)
+    default_answer = f"Find detailed answers in our comprehensive {product_name} review."
     
-    for question in faq_questions:
+    for i, question in enumerate(faq_questions):
+        answer = faq_answers[i] if faq_answers and i < len(faq_answers) and faq_answers[i] else default_answer
         faq_schema["mainEntity"].append({
             "@type": "Question",
             "name": question,
             "acceptedAnswer": {
                 "@type": "Answer",
-                "text": f"Find detailed answers in our comprehensive {product_name} review."
+                "text": answer
             }
         })
     
-    # Generate BreadcrumbList schema
-    breadcrumb_schema = {
+    return faq_schema
+
+def _breadcrumb_json_ld(category: str, product_name: str, slug: str) -> Dict[str, Any]:
+    """BreadcrumbList JSON-LD: Home > Reviews > Category > Product."""
+    return {
         "@context": "https://schema.org",
         "@type": "BreadcrumbList",
         "itemListElement": [
@@ -320,37 +513,102 @@ def _generate_schema_markup(
                 "@type": "ListItem",
                 "position": 1,
                 "name": "Home",
-                "item": "https://productreviewcrew.com"
+                "item": SITE_URL
             },
             {
                 "@type": "ListItem",
                 "position": 2,
                 "name": "Reviews",
-                "item": "https://productreviewcrew.com/reviews"
+                "item": f"{SITE_URL}/reviews"
             },
             {
                 "@type": "ListItem",
                 "position": 3,
                 "name": category.title(),
-                "item": f"https://productreviewcrew.com/reviews/{category.lower()}"
+                "item": f"{SITE_URL}/reviews/{category.lower()}"
             },
             {
                 "@type": "ListItem",
                 "position": 4,
                 "name": product_name,
-                "item": f"https://productreviewcrew.com/reviews/{product_info.get('slug', product_name.lower().replace(' ', '-'))}"
+                "item": f"{SITE_URL}/reviews/{slug}"
             }
         ]
     }
+
+def _faq_questions(product_name: str) -> List[str]:
+    """Common FAQ questions for a product review."""
+    return [
+        f"Is {product_name} worth it?",
+        f"What are the main features of {product_name}?",
+        f"How much does {product_name} cost?",
+        f"What are the alternatives to {product_name}?"
+    ]
+
+async def _answer_faq_with_default_client(
+    review_id: str,
+    product_info: Dict[str, Any],
+    review_sections: Dict[str, Any],
+    claims: List[Dict[str, Any]]
+) -> Optional[List[str]]:
+    """Answer the FAQ questions with the batching LLM client (None if not configured)."""
+    llm_client = get_batching_client()
+    if llm_client is None:
+        return None
+    with track_llm_usage() as usage:
+        try:
+            return await answer_faq_questions(product_info, review_sections, claims, llm_client)
+        except Exception as e:
+            logger.warning("FAQ answer generation failed, using defaults", review_id=review_id, error=str(e))
+            return None
+        finally:
+            record_llm_usage(review_id, usage)
+            await llm_client.aclose()
+
+async def answer_faq_questions(
+    product_info: Dict[str, Any],
+    review_sections: Dict[str, Any],
+    claims: List[Dict[str, Any]],
+    llm_client: LLMClient
+) -> List[str]:
+    """
+    Answer each FAQ question from the review content.
     
-    return {
-        'faq': faq_schema,
-        'breadcrumb': breadcrumb_schema
-    }
+    The questions are issued concurrently with the facts as shared context,
+    so a batching client packs them into a single request that states the
+    facts once.
+    """
+    product_name = product_info.get('name', 'Product')
+    facts = f"Review facts: {_faq_facts(product_info, review_sections, claims)}"
+    prompts = [
+        f"Using only the review facts, answer in at most two sentences: {question}"
+        for question in _faq_questions(product_name)
+    ]
+    responses = await asyncio.gather(*(
+        llm_client.complete(prompt, max_tokens=FAQ_ANSWER_MAX_TOKENS, context=facts) for prompt in prompts
+    ))
+    return [response.text.strip() for response in responses]
+
+def _faq_facts(product_info: Dict[str, Any], review_sections: Dict[str, Any], claims: List[Dict[str, Any]]) -> str:
+    """Compact fact sheet the FAQ answers are grounded in."""
+    facts = []
+    for section in ('executive_summary', 'conclusion'):
+        content = review_sections.get(section, {}).get('content')
+        if content:
+            facts.append(content)
+    for claim in claims[:10]:
+        if claim.get('key') and claim.get('value'):
+            facts.append(f"{claim['key']}: {claim['value']}")
+    if product_info.get('description'):
+        facts.append(product_info['description'])
+    return ' | '.join(facts)
 
 def _generate_internal_links(
     review_sections: Dict[str, Any],
-    product_info: Dict[str, Any]
+    product_info: Dict[str, Any],
+    review_id: Optional[str] = None,
+    org_id: Optional[str] = None,
+    link_graph: Optional[LinkGraph] = None
 ) -> List[Dict[str, Any]]:
     """Generate internal linking suggestions."""
     product_name = product_info.get('name', 'Product')
@@ -374,16 +632,50 @@ def _generate_internal_links(
         'priority': 'medium'
     })
     
-    # Suggest links to related reviews
-    internal_links.append({
-        'text': f"Similar {category} reviews",
-        'url': f"/reviews/{category.lower()}/similar",
-        'context': 'related content',
-        'priority': 'low'
-    })
+    # Suggest links to related reviews from the link graph
+    related_reviews = _related_reviews(review_id, product_info, org_id, link_graph)
+    for related in related_reviews:
+        internal_links.append({
+            'text': related['title'],
+            'url': related['url'],
+            'context': 'related content',
+            'priority': 'medium',
+            'relevance': related['score']
+        })
+    
+    if not related_reviews:
+        internal_links.append({
+            'text': f"Similar {category} reviews",
+            'url': f"/reviews/{category.lower()}/similar",
+            'context': 'related content',
+            'priority': 'low'
+        })
     
     return internal_links
 
+def _related_reviews(
+    review_id: Optional[str],
+    product_info: Dict[str, Any],
+    org_id: Optional[str] = None,
+    link_graph: Optional[LinkGraph] = None
+) -> List[Dict[str, Any]]:
+    """Top related published reviews of the org; an unpublished review is matched on its features."""
+    product_name = product_info.get('name', 'Product')
+    try:
+        graph = link_graph or LinkGraph(org_id)
+        related = graph.related(review_id, RELATED_LINK_COUNT) if review_id else []
+        if not related:
+            related = graph.suggest({
+                'review_id': review_id or '',
+                'title': f"{product_name} review",
+                'category': product_info.get('category', 'software'),
+                'products': [product_name]
+            }, RELATED_LINK_COUNT)
+        return related
+    except Exception as e:
+        logger.warning("Link graph unavailable, using placeholder links", error=str(e))
+        return []
+
 def _generate_keyword_suggestions(
     review_sections: Dict[str, Any],
     target_keywords: Optional[List[str]],
@@ -394,10 +686,11 @@ def _generate_keyword_suggestions(
     category = product_info.get('category', 'software')
     
     # Extract text content for keyword analysis
-    all_content = ""
-    for section in review_sections.values():
-        if isinstance(section, dict) and 'content' in section:
-            all_content += section['content'] + " "
+    all_content = " ".join(
+        section['content'] for section in review_sections.values()
+        if isinstance(section, dict) and 'content' in section
+    )
+    tokens = tokenize(all_content)
     
     # Generate keyword suggestions
     primary_keywords = target_keywords or [
@@ -425,30 +718,37 @@ def _generate_keyword_suggestions(
         f"{category} features comparison"
     ]
     
-    # Keyword density analysis
-    keyword_density = {}
-    for keyword in primary_keywords:
-        keyword_lower = keyword.lower()
-        content_lower = all_content.lower()
-        count = content_lower.count(keyword_lower)
-        density = (count * len(keyword_lower.split())) / len(all_content.split()) * 100
-        keyword_density[keyword] = {
-            'count': count,
-            'density': round(density, 2),
-            'optimal': 0.5 <= density <= 2.0
-        }
+    # Keyword density analysis: one pass over the tokens for every keyword
+    counts = count_phrases(tokens, primary_keywords + long_tail_keywords + semantic_keywords)
+    keyword_density = _keyword_density(primary_keywords, counts, len(tokens))
     
     return {
         'primary_keywords': primary_keywords,
         'long_tail_keywords': long_tail_keywords,
         'semantic_keywords': semantic_keywords,
         'keyword_density': keyword_density,
-        'suggestions': _generate_keyword_optimization_suggestions(keyword_density, all_content)
+        'long_tail_density': _keyword_density(long_tail_keywords, counts, len(tokens)),
+        'semantic_density': _keyword_density(semantic_keywords, counts, len(tokens)),
+        'suggestions': _generate_keyword_optimization_suggestions(keyword_density, all_content, len(tokens))
     }
 
+def _keyword_density(keywords: List[str], counts: Dict[str, int], total_words: int) -> Dict[str, Any]:
+    """Density of each keyword as the share of words covered by its occurrences."""
+    keyword_density = {}
+    for keyword in keywords:
+        count = counts.get(keyword, 0)
+        density = (count * len(tokenize(keyword))) / total_words * 100 if total_words else 0.0
+        keyword_density[keyword] = {
+            'count': count,
+            'density': round(density, 2),
+            'optimal': 0.5 <= density <= 2.0
+        }
+    return keyword_density
+
 def _generate_keyword_optimization_suggestions(
     keyword_density: Dict[str, Any],
-    content: str
+    content: str,
+    word_count: Optional[int] = None
 ) -> List[str]:
     """Generate specific keyword optimization suggestions."""
     suggestions = []
@@ -460,14 +760,16 @@ def _generate_keyword_optimization_suggestions(
             suggestions.append(f"Reduce overuse of '{keyword}' - current density: {data['density']}%")
     
     # Content length suggestions
-    word_count = len(content.split())
+    if word_count is None:
+        word_count = len(tokenize(content))
     if word_count < 1000:
         suggestions.append("Consider expanding content to at least 1000 words for better SEO")
     elif word_count > 3000:
         suggestions.append("Content is quite long - consider breaking into multiple pages")
     
     # Heading structure suggestions
-    if 'h1' not in content.lower() and 'h2' not in content.lower():
+    content_lower = content.lower()
+    if 'h1' not in content_lower and 'h2' not in content_lower:
         suggestions.append("Add proper heading structure (H1, H2, H3) for better SEO")
     
     return suggestions
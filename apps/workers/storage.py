@@ -0,0 +1,283 @@
+import structlog
+from typing import BinaryIO, ContextManager, List, Dict, Any, Optional, Protocol
+from contextlib import contextmanager
+from functools import lru_cache
+import io
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from config import settings
+
+logger = structlog.get_logger()
+
+
+class ObjectStorage(Protocol):
+    """Blob storage for exports and source snapshots."""
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        ...
+
+    def upload_fileobj(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        ...
+
+    def get(self, key: str) -> bytes:
+        ...
+
+    def open_reader(self, key: str) -> ContextManager[BinaryIO]:
+        """Read-only stream of an object, for copying it without loading it whole."""
+        ...
+
+    def exists(self, key: str) -> bool:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """Time-limited download URL for an object."""
+        ...
+
+    def open_writer(self, key: str, content_type: str) -> ContextManager[BinaryIO]:
+        """
+        Write-only stream to a new object, committed when the context exits
+        cleanly and discarded if it raises.
+        """
+        ...
+
+
+class S3Storage:
+    """
+    S3/MinIO storage over one process-wide client.
+
+    The client keeps a pooled set of keep-alive connections; objects above
+    the multipart threshold are uploaded in concurrent parts.
+    """
+
+    def __init__(self, bucket: Optional[str] = None, client=None):
+        self.bucket = bucket or settings.S3_BUCKET
+        self.client = client if client is not None else _s3_client()
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.STORAGE_MULTIPART_THRESHOLD_BYTES,
+            multipart_chunksize=settings.STORAGE_MULTIPART_CHUNK_BYTES,
+            max_concurrency=settings.STORAGE_UPLOAD_CONCURRENCY
+        )
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        if len(data) < self.transfer_config.multipart_threshold:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+        else:
+            self.upload_fileobj(key, io.BytesIO(data), content_type)
+
+    def upload_fileobj(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        """Stream a file-like object; multipart above the threshold."""
+        self.client.upload_fileobj(
+            fileobj, self.bucket, key,
+            ExtraArgs={'ContentType': content_type},
+            Config=self.transfer_config
+        )
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    @contextmanager
+    def open_reader(self, key: str):
+        body = self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        try:
+            yield body
+        finally:
+            body.close()
+
+    @contextmanager
+    def open_writer(self, key: str, content_type: str):
+        writer = S3MultipartWriter(self.client, self.bucket, key, content_type, self.transfer_config.multipart_chunksize)
+        try:
+            yield writer
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        # Signed locally from the client's credentials, no request is made
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires_in or settings.EXPORT_URL_TTL_SECONDS
+        )
+
+
+class S3MultipartWriter:
+    """
+    Write-only stream uploaded to S3 in parts as it is written.
+
+    At most one part is buffered in memory. Objects smaller than a part are
+    sent as a single PUT on close. The stream is not seekable, so zipfile
+    writes data descriptors rather than seeking back to patch headers.
+    """
+
+    def __init__(self, client, bucket: str, key: str, content_type: str, part_size: int):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Complete the upload with whatever is still buffered."""
+        if self._upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), ContentType=self.content_type)
+        else:
+            if self._buffer or not self._parts:
+                self._upload_part(bytes(self._buffer))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                MultipartUpload={'Parts': self._parts}
+            )
+        self._buffer = bytearray()
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except ClientError as e:
+                logger.warning("Could not abort multipart upload", key=self.key, error=str(e))
+        self._buffer = bytearray()
+
+    def _upload_part(self, data: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )['UploadId']
+        part_number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            PartNumber=part_number, Body=data
+        )
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+
+class LocalStorage:
+    """Filesystem storage under a root directory, used by tests and local runs."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or settings.LOCAL_STORAGE_PATH)
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        self.upload_fileobj(key, io.BytesIO(data), content_type)
+
+    def upload_fileobj(self, key: str, fileobj: BinaryIO, content_type: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial object
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                shutil.copyfileobj(fileobj, temp_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def open_reader(self, key: str):
+        return open(self._path(key), 'rb')
+
+    @contextmanager
+    def open_writer(self, key: str, content_type: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                yield temp_file
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        return Path(self._path(key)).as_uri()
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Storage key escapes the storage root: {key}")
+        return path
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> ObjectStorage:
+    """Process-wide storage backend selected by STORAGE_BACKEND ('s3' or 'local')."""
+    if settings.STORAGE_BACKEND == 'local':
+        return LocalStorage()
+    return S3Storage()
+
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    # Clients are thread-safe and own the connection pool; build one per process
+    session = boto3.session.Session()
+    return session.client(
+        's3',
+        endpoint_url=settings.S3_ENDPOINT,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION,
+        config=Config(
+            max_pool_connections=settings.STORAGE_MAX_POOL_CONNECTIONS,
+            retries={'max_attempts': 3, 'mode': 'standard'},
+            s3={'addressing_style': 'path' if settings.S3_FORCE_PATH_STYLE else 'auto'}
+        )
+    )
@@ -0,0 +1,104 @@
+from typing import Dict, List, Iterable, Sequence, Set, Tuple, Union
+from collections import deque
+from functools import lru_cache
+import re
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; punctuation and whitespace are separators."""
+    return _WORD_RE.findall(text.lower())
+
+
+class PhraseMatcher:
+    """
+    Token-level Aho-Corasick automaton over a set of phrases.
+
+    Counting every phrase occurrence in a token stream is a single pass,
+    O(tokens + matches), independent of how many phrases are registered.
+    Matches are whole-token and may overlap.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[Tuple[str, ...]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for phrase in phrases:
+            tokens = tuple(tokenize(phrase))
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                next_node = self._goto[node].get(token)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][token] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(len(self.phrases))
+            self.phrases.append(tokens)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so a node's failure target is always resolved before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches that end at the failure target
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def count(self, tokens: Sequence[str]) -> List[int]:
+        """Occurrence count of each registered phrase, in registration order."""
+        counts = [0] * len(self.phrases)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for token in tokens:
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for phrase_id in out[node]:
+                counts[phrase_id] += 1
+        return counts
+
+    def matched(self, tokens: Sequence[str]) -> Set[int]:
+        """Ids (registration order) of the phrases occurring at least once."""
+        found: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for token in tokens:
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            found.update(out[node])
+        return found
+
+
+@lru_cache(maxsize=256)
+def compile_phrases(phrases: Tuple[str, ...]) -> PhraseMatcher:
+    """Memoized matcher for a phrase set (keyword lists repeat across runs)."""
+    return PhraseMatcher(phrases)
+
+
+def count_phrases(text_or_tokens: Union[str, Sequence[str]], phrases: Sequence[str]) -> Dict[str, int]:
+    """Count whole-token occurrences of each phrase in a text or token list."""
+    tokens = tokenize(text_or_tokens) if isinstance(text_or_tokens, str) else text_or_tokens
+    unique = tuple(dict.fromkeys(phrases))
+    matcher = compile_phrases(unique)
+    counts = matcher.count(tokens)
+
+    # Phrases with no word tokens are dropped by the matcher
+    by_tokens = dict(zip(matcher.phrases, counts))
+    return {phrase: by_tokens.get(tuple(tokenize(phrase)), 0) for phrase in unique}
@@ -1,11 +1,40 @@
 import structlog
 from celery import shared_task
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Mapping
+from types import MappingProxyType
+from collections import defaultdict
+from functools import lru_cache
 import json
 import re
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+from db import get_engine
+from redis_client import get_redis
+from text_matching import compile_phrases, tokenize
 
 logger = structlog.get_logger()
 
+COMPLEXITY_WEIGHTS = {'low': 0.8, 'medium': 0.6, 'high': 0.4}
+
+# Category substrings mapped to built-in catalog groups, checked in order
+CATEGORY_GROUPS = (
+    (('ai', 'artificial intelligence', 'machine learning'), 'ai'),
+    (('video', 'editing'), 'video'),
+    (('business', 'enterprise', 'saas'), 'business'),
+    (('development', 'programming', 'code'), 'development'),
+)
+
+# Target audiences mapped to the catalog segments they cover
+AUDIENCE_MAPPING = {
+    'individual': ('individuals', 'content-creators', 'developers'),
+    'small-business': ('small-business', 'content-creators', 'marketers'),
+    'enterprise': ('enterprise', 'businesses', 'teams'),
+    'developers': ('developers', 'teams'),
+    'marketers': ('marketers', 'content-creators', 'small-business')
+}
+
 @shared_task(bind=True, name='usecase_recommender.recommend')
 def recommend_use_cases(
     self,
@@ -14,7 +43,8 @@ def recommend_use_cases(
     claims: List[Dict[str, Any]],
     scores: List[Dict[str, Any]],
     product_info: Dict[str, Any],
-    target_audience: Optional[str] = None
+    target_audience: Optional[str] = None,
+    org_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Recommend use cases for a product based on its features, claims, and scores.
@@ -26,6 +56,7 @@ def recommend_use_cases(
         scores: List of scores for the product across criteria
         product_info: Basic product information (name, category, etc.)
         target_audience: Optional target audience (e.g., 'small-business', 'enterprise', 'individual')
+        org_id: Optional organization whose custom use case catalog takes precedence
     
     Returns:
         Dictionary containing recommended use cases and metadata
@@ -43,13 +74,7 @@ def recommend_use_cases(
         
         # Generate use cases based on product category
         category = product_info.get('category', '').lower()
-        base_use_cases = _get_category_use_cases(category, features, capabilities)
-        
-        # Filter and rank use cases based on target audience
-        if target_audience:
-            use_cases = _filter_by_audience(base_use_cases, target_audience, product_info)
-        else:
-            use_cases = base_use_cases
+        use_cases = _get_category_use_cases(category, org_id, target_audience)
         
         # Score use cases based on product fit
         scored_use_cases = _score_use_cases(use_cases, claims, scores, product_info)
@@ -89,6 +114,85 @@ def recommend_use_cases(
                     error=str(e))
         raise self.retry(countdown=60, max_retries=3)
 
+@shared_task(bind=True, name='usecase_recommender.rank_products')
+def rank_products_for_use_cases(
+    self,
+    review_id: str,
+    use_cases: List[Dict[str, Any]],
+    products: List[Dict[str, Any]],
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    Rank products for each use case ("best tool for X" roundups).
+    
+    Args:
+        review_id: Review identifier
+        use_cases: Use cases to rank products for
+        products: Products with product_id, claims, scores and product_info
+        top_k: Number of products to keep per use case
+    
+    Returns:
+        Dictionary containing the ranked products per use case
+    """
+    try:
+        logger.info("Starting use case product ranking", 
+                   review_id=review_id, 
+                   use_cases_count=len(use_cases),
+                   products_count=len(products))
+        
+        fit = score_use_case_fit(use_cases, products)
+        fit_score = fit['fit_score']
+        
+        rankings = []
+        for i, use_case in enumerate(use_cases):
+            order = np.argsort(-fit_score[i], kind='stable')[:top_k]
+            rankings.append({
+                'use_case_id': use_case.get('id'),
+                'title': use_case.get('title'),
+                'products': [
+                    {
+                        'product_id': products[j].get('product_id'),
+                        'fit_score': float(fit_score[i, j]),
+                        'feature_match': float(fit['feature_match'][i, j])
+                    }
+                    for j in order
+                ]
+            })
+        
+        logger.info("Use case product ranking completed", 
+                   review_id=review_id,
+                   rankings_count=len(rankings))
+        
+        return {
+            'review_id': review_id,
+            'rankings': rankings,
+            'metadata': {
+                'use_cases_count': len(use_cases),
+                'products_count': len(products)
+            }
+        }
+        
+    except Exception as e:
+        logger.error("Error in use case product ranking", 
+                    review_id=review_id,
+                    error=str(e))
+        raise self.retry(countdown=60, max_retries=3)
+
+@shared_task(bind=True, name='usecase_recommender.invalidate_catalog')
+def invalidate_use_case_catalog(self, org_id: str) -> Dict[str, Any]:
+    """
+    Invalidate an org's cached use case catalog after it changes.
+    
+    Args:
+        org_id: Organization whose catalog was updated
+    
+    Returns:
+        Dictionary containing the new catalog version
+    """
+    version = get_redis().incr(_catalog_version_key(org_id))
+    logger.info("Use case catalog invalidated", org_id=org_id, version=version)
+    return {'org_id': org_id, 'version': version, 'status': 'completed'}
+
 def _extract_features(claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Extract product features from claims."""
     features = []
@@ -140,262 +244,245 @@ def _analyze_capabilities(claims: List[Dict[str, Any]], scores: List[Dict[str, A
     
     return capabilities
 
-def _get_category_use_cases(category: str, features: List[Dict], capabilities: List[Dict]) -> List[Dict[str, Any]]:
-    """Get use cases based on product category."""
-    use_cases = []
-    
-    # AI/ML Tools
-    if 'ai' in category or 'artificial intelligence' in category or 'machine learning' in category:
-        use_cases.extend([
-            {
-                'id': 'ai_content_generation',
-                'title': 'AI Content Generation',
-                'description': 'Generate high-quality content using artificial intelligence',
-                'audience': ['content-creators', 'marketers', 'businesses'],
-                'complexity': 'medium',
-                'requirements': ['ai-capabilities', 'content-tools'],
-                'benefits': ['time-savings', 'quality-improvement', 'scalability']
-            },
-            {
-                'id': 'data_analysis',
-                'title': 'Data Analysis & Insights',
-                'description': 'Analyze large datasets and extract meaningful insights',
-                'audience': ['data-scientists', 'analysts', 'enterprise'],
-                'complexity': 'high',
-                'requirements': ['ai-capabilities', 'data-processing'],
-                'benefits': ['insights', 'automation', 'accuracy']
-            },
-            {
-                'id': 'automation',
-                'title': 'Process Automation',
-                'description': 'Automate repetitive tasks and workflows',
-                'audience': ['businesses', 'enterprise', 'developers'],
-                'complexity': 'medium',
-                'requirements': ['automation-capabilities', 'integration'],
-                'benefits': ['efficiency', 'cost-reduction', 'accuracy']
-            }
-        ])
-    
-    # Video Editing
-    elif 'video' in category or 'editing' in category:
-        use_cases.extend([
-            {
-                'id': 'video_editing',
-                'title': 'Professional Video Editing',
-                'description': 'Create and edit professional-quality videos',
-                'audience': ['content-creators', 'filmmakers', 'marketers'],
-                'complexity': 'medium',
-                'requirements': ['video-tools', 'performance'],
-                'benefits': ['quality', 'efficiency', 'professional-results']
-            },
-            {
-                'id': 'social_media_content',
-                'title': 'Social Media Content Creation',
-                'description': 'Create engaging content for social media platforms',
-                'audience': ['content-creators', 'marketers', 'small-business'],
-                'complexity': 'low',
-                'requirements': ['video-tools', 'templates'],
-                'benefits': ['engagement', 'brand-awareness', 'time-savings']
-            },
-            {
-                'id': 'educational_content',
-                'title': 'Educational Content Production',
-                'description': 'Create educational videos and tutorials',
-                'audience': ['educators', 'trainers', 'businesses'],
-                'complexity': 'medium',
-                'requirements': ['video-tools', 'usability'],
-                'benefits': ['learning', 'engagement', 'accessibility']
-            }
-        ])
-    
-    # Business Software
-    elif 'business' in category or 'enterprise' in category or 'saas' in category:
-        use_cases.extend([
-            {
-                'id': 'project_management',
-                'title': 'Project Management',
-                'description': 'Manage projects, tasks, and team collaboration',
-                'audience': ['project-managers', 'teams', 'businesses'],
-                'complexity': 'medium',
-                'requirements': ['collaboration-tools', 'usability'],
-                'benefits': ['organization', 'collaboration', 'efficiency']
-            },
-            {
-                'id': 'customer_relationship',
-                'title': 'Customer Relationship Management',
-                'description': 'Manage customer interactions and relationships',
-                'audience': ['sales-teams', 'businesses', 'enterprise'],
-                'complexity': 'medium',
-                'requirements': ['crm-capabilities', 'integration'],
-                'benefits': ['customer-retention', 'sales-growth', 'insights']
-            },
-            {
-                'id': 'business_analytics',
-                'title': 'Business Analytics',
-                'description': 'Analyze business data and generate reports',
-                'audience': ['businesses', 'enterprise', 'analysts'],
-                'complexity': 'high',
-                'requirements': ['analytics-capabilities', 'data-processing'],
-                'benefits': ['insights', 'decision-making', 'optimization']
-            }
-        ])
-    
-    # Development Tools
-    elif 'development' in category or 'programming' in category or 'code' in category:
-        use_cases.extend([
-            {
-                'id': 'code_development',
-                'title': 'Software Development',
-                'description': 'Develop and maintain software applications',
-                'audience': ['developers', 'teams', 'enterprise'],
-                'complexity': 'high',
-                'requirements': ['development-tools', 'performance'],
-                'benefits': ['productivity', 'quality', 'collaboration']
-            },
-            {
-                'id': 'code_review',
-                'title': 'Code Review & Quality Assurance',
-                'description': 'Review code and ensure quality standards',
-                'audience': ['developers', 'teams', 'enterprise'],
-                'complexity': 'medium',
-                'requirements': ['review-tools', 'integration'],
-                'benefits': ['quality', 'learning', 'consistency']
-            },
-            {
-                'id': 'testing_automation',
-                'title': 'Testing & Automation',
-                'description': 'Automate testing processes and quality assurance',
-                'audience': ['developers', 'qa-teams', 'enterprise'],
-                'complexity': 'medium',
-                'requirements': ['testing-tools', 'automation'],
-                'benefits': ['reliability', 'efficiency', 'coverage']
-            }
-        ])
-    
-    # Default use cases for any category
-    else:
-        use_cases.extend([
-            {
-                'id': 'productivity_improvement',
-                'title': 'Productivity Improvement',
-                'description': 'Improve overall productivity and efficiency',
-                'audience': ['individuals', 'small-business', 'enterprise'],
-                'complexity': 'low',
-                'requirements': ['usability', 'integration'],
-                'benefits': ['efficiency', 'time-savings', 'organization']
-            },
-            {
-                'id': 'cost_reduction',
-                'title': 'Cost Reduction',
-                'description': 'Reduce operational costs and improve ROI',
-                'audience': ['businesses', 'enterprise'],
-                'complexity': 'medium',
-                'requirements': ['analytics', 'automation'],
-                'benefits': ['cost-savings', 'efficiency', 'roi']
-            }
-        ])
-    
-    return use_cases
-
-def _filter_by_audience(use_cases: List[Dict], target_audience: str, product_info: Dict) -> List[Dict]:
-    """Filter use cases based on target audience."""
-    audience_mapping = {
-        'individual': ['individuals', 'content-creators', 'developers'],
-        'small-business': ['small-business', 'content-creators', 'marketers'],
-        'enterprise': ['enterprise', 'businesses', 'teams'],
-        'developers': ['developers', 'teams'],
-        'marketers': ['marketers', 'content-creators', 'small-business']
-    }
-    
-    target_audiences = audience_mapping.get(target_audience, [target_audience])
+class UseCaseCatalog:
+    """
+    Immutable use case catalog indexed by category group and audience.
     
-    filtered_cases = []
-    for use_case in use_cases:
-        if any(audience in use_case.get('audience', []) for audience in target_audiences):
-            filtered_cases.append(use_case)
+    Each use case carries a bitmask of its audiences, so audience filtering is
+    a bitwise AND against the mask of the target audience's segments.
+    """
     
-    return filtered_cases
+    def __init__(self, groups: Dict[str, List[Dict[str, Any]]]):
+        self.use_cases: List[Mapping[str, Any]] = []
+        self.by_group: Dict[str, Tuple[int, ...]] = {}
+        self.audience_bits: Dict[str, int] = {}
+        self.audience_masks: List[int] = []
+        
+        for group, use_cases in groups.items():
+            positions = []
+            for use_case in use_cases:
+                mask = 0
+                for audience in use_case.get('audience', []):
+                    mask |= self.audience_bits.setdefault(audience, 1 << len(self.audience_bits))
+                positions.append(len(self.use_cases))
+                self.use_cases.append(_freeze_use_case(use_case))
+                self.audience_masks.append(mask)
+            self.by_group[group] = tuple(positions)
+    
+    def audience_mask(self, target_audience: str) -> int:
+        """Bitmask of the segments a target audience maps to."""
+        mask = 0
+        for audience in AUDIENCE_MAPPING.get(target_audience, (target_audience,)):
+            mask |= self.audience_bits.get(audience, 0)
+        return mask
+    
+    def select(self, group: str, target_audience: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Use cases for a category group, optionally limited to an audience."""
+        positions = self.by_group.get(group, ())
+        if target_audience:
+            mask = self.audience_mask(target_audience)
+            positions = [i for i in positions if self.audience_masks[i] & mask]
+        return [dict(self.use_cases[i]) for i in positions]
+
+def _get_category_use_cases(category: str, org_id: Optional[str] = None, target_audience: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get use cases for a product category (org catalog first, then built-in)."""
+    if org_id:
+        try:
+            org_catalog = _load_org_catalog(org_id, _org_catalog_version(org_id))
+        except Exception as e:
+            # Nothing is memoized for the failed load, so the catalog is
+            # picked up again as soon as the database is back
+            logger.warning("Could not load org use case catalog", org_id=org_id, error=str(e))
+            org_catalog = None
+        if org_catalog is not None and category in org_catalog.by_group:
+            return org_catalog.select(category, target_audience)
+    
+    return USE_CASE_CATALOG.select(_category_group(category), target_audience)
+
+@lru_cache(maxsize=1024)
+def _category_group(category: str) -> str:
+    """Map a free-form category onto a built-in catalog group."""
+    for patterns, group in CATEGORY_GROUPS:
+        if any(pattern in category for pattern in patterns):
+            return group
+    return 'default'
+
+@lru_cache(maxsize=256)
+def _load_org_catalog(org_id: str, catalog_version: int) -> UseCaseCatalog:
+    """
+    Load an org's custom use cases from the database (once per catalog
+    version). Database errors propagate so a failed load is never memoized.
+    """
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text("SELECT category, use_cases FROM use_case_catalogs WHERE org_id = :org_id"),
+            {"org_id": org_id}
+        ).fetchall()
+    
+    groups = {}
+    for category, use_cases in rows:
+        if isinstance(use_cases, str):
+            use_cases = json.loads(use_cases)
+        groups[category.lower()] = use_cases
+    
+    logger.info("Loaded org use case catalog", org_id=org_id, version=catalog_version, categories=len(groups))
+    return UseCaseCatalog(groups)
+
+def _org_catalog_version(org_id: str) -> int:
+    """Current catalog version for an org (bumped on change)."""
+    try:
+        return int(get_redis().get(_catalog_version_key(org_id)) or 0)
+    except Exception as e:
+        logger.warning("Could not read use case catalog version", org_id=org_id, error=str(e))
+        return 0
+
+def _catalog_version_key(org_id: str) -> str:
+    return f"use_case_catalog:{org_id}:version"
+
+def _freeze_use_case(use_case: Dict[str, Any]) -> Mapping[str, Any]:
+    """Freeze a use case dict, turning list fields into tuples."""
+    return MappingProxyType({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in use_case.items()
+    })
+
+def clear_use_case_cache() -> None:
+    """Drop memoized category groups and org catalogs."""
+    _category_group.cache_clear()
+    _load_org_catalog.cache_clear()
 
 def _score_use_cases(use_cases: List[Dict], claims: List[Dict], scores: List[Dict], product_info: Dict) -> List[Dict]:
     """Score use cases based on product fit."""
-    scored_cases = []
+    fit = score_use_case_fit(use_cases, [{'claims': claims, 'scores': scores, 'product_info': product_info}])
     
-    for use_case in use_cases:
-        score = 0.0
-        requirements = use_case.get('requirements', [])
-        
-        # Score based on feature match
-        feature_match_score = _calculate_feature_match(requirements, claims)
-        score += feature_match_score * 0.4
-        
-        # Score based on performance capabilities
-        performance_score = _calculate_performance_score(requirements, scores)
-        score += performance_score * 0.3
-        
-        # Score based on usability
-        usability_score = _calculate_usability_score(use_case, scores)
-        score += usability_score * 0.2
-        
-        # Score based on pricing fit
-        pricing_score = _calculate_pricing_score(use_case, claims, product_info)
-        score += pricing_score * 0.1
-        
+    scored_cases = []
+    for i, use_case in enumerate(use_cases):
         scored_cases.append({
             **use_case,
-            'fit_score': score,
-            'feature_match': feature_match_score,
-            'performance_score': performance_score,
-            'usability_score': usability_score,
-            'pricing_score': pricing_score
+            'fit_score': float(fit['fit_score'][i, 0]),
+            'feature_match': float(fit['feature_match'][i, 0]),
+            'performance_score': float(fit['performance_score'][i, 0]),
+            'usability_score': float(fit['usability_score'][i, 0]),
+            'pricing_score': float(fit['pricing_score'][i, 0])
         })
     
     # Sort by fit score
     scored_cases.sort(key=lambda x: x['fit_score'], reverse=True)
     return scored_cases
 
-def _calculate_feature_match(requirements: List[str], claims: List[Dict]) -> float:
-    """Calculate feature match score."""
-    if not requirements:
-        return 0.5
+def score_use_case_fit(use_cases: List[Dict], products: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Score every (use case, product) pair at once.
     
-    matches = 0
-    for requirement in requirements:
-        for claim in claims:
-            if requirement.lower() in claim.get('key', '').lower() or requirement.lower() in claim.get('value', '').lower():
-                matches += 1
-                break
+    Use case requirements are compiled into a use case x term matrix and the
+    products' claims into a product x term matrix, so feature match for all
+    pairs is a single sparse product. Score-derived signals are computed once
+    per product and broadcast across use cases.
     
-    return matches / len(requirements)
-
-def _calculate_performance_score(requirements: List[str], scores: List[Dict]) -> float:
-    """Calculate performance score."""
-    performance_requirements = [r for r in requirements if 'performance' in r or 'speed' in r]
-    if not performance_requirements:
-        return 0.5
+    Returns:
+        Dictionary of (use cases x products) arrays: fit_score, feature_match,
+        performance_score, usability_score and pricing_score
+    """
+    requirements, vocabulary = _compile_requirements(use_cases)
+    product_terms = _product_term_matrix([p.get('claims', []) for p in products], vocabulary)
+    
+    # Requirements met per pair: requirement x term  @  term x product (presence)
+    requirement_counts = np.asarray(requirements.sum(axis=1)).ravel()
+    matched = (requirements @ (product_terms > 0).astype(np.float64).T).toarray()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        feature_match = np.where(requirement_counts[:, None] > 0, matched / requirement_counts[:, None], 0.5)
+    
+    signals = np.array(
+        [_product_signals(p.get('claims', []), p.get('scores', [])) for p in products],
+        dtype=np.float64
+    ).reshape(len(products), 3)
+    performance, usability, pricing = signals.T
+    
+    needs_performance = np.array([
+        any('performance' in r or 'speed' in r for r in use_case.get('requirements', []))
+        for use_case in use_cases
+    ], dtype=bool)
+    complexity_weight = np.array([
+        COMPLEXITY_WEIGHTS.get(use_case.get('complexity', 'medium'), 0.6) for use_case in use_cases
+    ])
+    
+    shape = (len(use_cases), len(products))
+    performance_score = np.where(needs_performance[:, None], performance[None, :], 0.5)
+    usability_score = complexity_weight[:, None] * usability[None, :]
+    pricing_score = np.broadcast_to(pricing[None, :], shape)
+    
+    fit_score = (
+        feature_match * 0.4 +
+        performance_score * 0.3 +
+        usability_score * 0.2 +
+        pricing_score * 0.1
+    )
     
-    performance_scores = [s.get('normalizedScore', 0) for s in scores if 'performance' in s.get('criterionId', '').lower()]
-    return sum(performance_scores) / len(performance_scores) if performance_scores else 0.5
+    return {
+        'fit_score': fit_score,
+        'feature_match': feature_match,
+        'performance_score': performance_score,
+        'usability_score': usability_score,
+        'pricing_score': pricing_score
+    }
 
-def _calculate_usability_score(use_case: Dict, scores: List[Dict]) -> float:
-    """Calculate usability score."""
-    complexity = use_case.get('complexity', 'medium')
-    complexity_weights = {'low': 0.8, 'medium': 0.6, 'high': 0.4}
-    
-    usability_scores = [s.get('normalizedScore', 0) for s in scores if 'ease' in s.get('criterionId', '').lower() or 'usability' in s.get('criterionId', '').lower()]
-    base_score = sum(usability_scores) / len(usability_scores) if usability_scores else 0.5
-    
-    return base_score * complexity_weights.get(complexity, 0.6)
+def _compile_requirements(use_cases: List[Dict]) -> Tuple[sparse.csr_matrix, List[str]]:
+    """Compile use case requirements into a binary use case x term matrix."""
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, use_case in enumerate(use_cases):
+        for requirement in set(r.lower() for r in use_case.get('requirements', [])):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(requirement, len(vocabulary)))
+    
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(use_cases), len(vocabulary))
+    )
+    return matrix, list(vocabulary)
 
-def _calculate_pricing_score(use_case: Dict, claims: List[Dict], product_info: Dict) -> float:
-    """Calculate pricing fit score."""
-    # This is a simplified scoring - in practice, you'd want more sophisticated pricing analysis
-    pricing_claims = [c for c in claims if c.get('type') == 'pricing']
-    
-    if not pricing_claims:
-        return 0.5
-    
-    # Assume moderate pricing is good for most use cases
-    return 0.7
+def _product_term_matrix(product_claims: List[List[Dict]], vocabulary: List[str]) -> sparse.csr_matrix:
+    """Count, per product, the claims whose key or value mentions each term as whole words."""
+    # One automaton over the whole vocabulary, so each claim costs O(tokens), not O(terms)
+    matcher = compile_phrases(tuple(vocabulary))
+    # Matcher ids follow vocabulary order, skipping terms without word tokens
+    columns = [j for j, term in enumerate(vocabulary) if tokenize(term)]
+    
+    rows, cols, counts = [], [], []
+    for i, claims in enumerate(product_claims):
+        term_counts: Dict[int, int] = defaultdict(int)
+        for claim in claims:
+            # Key and value are matched separately so no phrase spans the two
+            matched = matcher.matched(tokenize(str(claim.get('key', ''))))
+            matched |= matcher.matched(tokenize(str(claim.get('value', ''))))
+            for phrase_id in matched:
+                term_counts[columns[phrase_id]] += 1
+        for j, count in term_counts.items():
+            rows.append(i)
+            cols.append(j)
+            counts.append(count)
+    
+    return sparse.csr_matrix(
+        (np.array(counts, dtype=np.float64), (rows, cols)),
+        shape=(len(product_claims), len(vocabulary))
+    )
+
+def _product_signals(claims: List[Dict], scores: List[Dict]) -> Tuple[float, float, float]:
+    """Per-product performance, usability and pricing signals (one pass over scores)."""
+    performance_scores, usability_scores = [], []
+    for score in scores:
+        criterion_id = score.get('criterionId', '').lower()
+        value = score.get('normalizedScore', 0)
+        if 'performance' in criterion_id:
+            performance_scores.append(value)
+        if 'ease' in criterion_id or 'usability' in criterion_id:
+            usability_scores.append(value)
+    
+    performance = sum(performance_scores) / len(performance_scores) if performance_scores else 0.5
+    usability = sum(usability_scores) / len(usability_scores) if usability_scores else 0.5
+    # Simplified pricing fit: moderate pricing is assumed good for most use cases
+    pricing = 0.7 if any(c.get('type') == 'pricing' for c in claims) else 0.5
+    return performance, usability, pricing
 
 def _generate_detailed_use_cases(scored_use_cases: List[Dict], claims: List[Dict], product_info: Dict) -> List[Dict]:
     """Generate detailed use case descriptions."""
@@ -423,18 +510,14 @@ def _generate_detailed_use_cases(scored_use_cases: List[Dict], claims: List[Dict
     return detailed_cases
 
 def _find_supporting_claims_for_use_case(use_case: Dict, claims: List[Dict]) -> List[Dict]:
-    """Find claims that support a specific use case."""
-    supporting_claims = []
-    requirements = use_case.get('requirements', [])
-    
-    for claim in claims:
-        claim_text = f"{claim.get('key', '')} {claim.get('value', '')}".lower()
-        for requirement in requirements:
-            if requirement.lower() in claim_text:
-                supporting_claims.append(claim)
-                break
-    
-    return supporting_claims
+    """Find claims that mention a requirement as whole words, as in the fit scoring."""
+    matcher = compile_phrases(tuple(use_case.get('requirements', [])))
+    return [
+        claim for claim in claims
+        # Key and value are matched separately, as in _product_term_matrix
+        if matcher.matched(tokenize(str(claim.get('key', ''))))
+        or matcher.matched(tokenize(str(claim.get('value', ''))))
+    ]
 
 def _generate_use_case_description(use_case: Dict, supporting_claims: List[Dict], product_info: Dict) -> str:
     """Generate a detailed description for a use case."""
@@ -601,3 +684,146 @@ def _generate_customer_profile(segment: str, use_cases: List[Dict], product_info
         'relevant_use_cases': [uc['id'] for uc in relevant_use_cases],
         'fit_score': sum(uc['fit_score'] for uc in relevant_use_cases) / len(relevant_use_cases) if relevant_use_cases else 0
     }
+
+
+# Built-in use case catalog by category group
+_USE_CASE_CATALOG_DATA = {
+    'ai': [
+        {
+            'id': 'ai_content_generation',
+            'title': 'AI Content Generation',
+            'description': 'Generate high-quality content using artificial intelligence',
+            'audience': ['content-creators', 'marketers', 'businesses'],
+            'complexity': 'medium',
+            'requirements': ['ai-capabilities', 'content-tools'],
+            'benefits': ['time-savings', 'quality-improvement', 'scalability']
+        },
+        {
+            'id': 'data_analysis',
+            'title': 'Data Analysis & Insights',
+            'description': 'Analyze large datasets and extract meaningful insights',
+            'audience': ['data-scientists', 'analysts', 'enterprise'],
+            'complexity': 'high',
+            'requirements': ['ai-capabilities', 'data-processing'],
+            'benefits': ['insights', 'automation', 'accuracy']
+        },
+        {
+            'id': 'automation',
+            'title': 'Process Automation',
+            'description': 'Automate repetitive tasks and workflows',
+            'audience': ['businesses', 'enterprise', 'developers'],
+            'complexity': 'medium',
+            'requirements': ['automation-capabilities', 'integration'],
+            'benefits': ['efficiency', 'cost-reduction', 'accuracy']
+        }
+    ],
+    'video': [
+        {
+            'id': 'video_editing',
+            'title': 'Professional Video Editing',
+            'description': 'Create and edit professional-quality videos',
+            'audience': ['content-creators', 'filmmakers', 'marketers'],
+            'complexity': 'medium',
+            'requirements': ['video-tools', 'performance'],
+            'benefits': ['quality', 'efficiency', 'professional-results']
+        },
+        {
+            'id': 'social_media_content',
+            'title': 'Social Media Content Creation',
+            'description': 'Create engaging content for social media platforms',
+            'audience': ['content-creators', 'marketers', 'small-business'],
+            'complexity': 'low',
+            'requirements': ['video-tools', 'templates'],
+            'benefits': ['engagement', 'brand-awareness', 'time-savings']
+        },
+        {
+            'id': 'educational_content',
+            'title': 'Educational Content Production',
+            'description': 'Create educational videos and tutorials',
+            'audience': ['educators', 'trainers', 'businesses'],
+            'complexity': 'medium',
+            'requirements': ['video-tools', 'usability'],
+            'benefits': ['learning', 'engagement', 'accessibility']
+        }
+    ],
+    'business': [
+        {
+            'id': 'project_management',
+            'title': 'Project Management',
+            'description': 'Manage projects, tasks, and team collaboration',
+            'audience': ['project-managers', 'teams', 'businesses'],
+            'complexity': 'medium',
+            'requirements': ['collaboration-tools', 'usability'],
+            'benefits': ['organization', 'collaboration', 'efficiency']
+        },
+        {
+            'id': 'customer_relationship',
+            'title': 'Customer Relationship Management',
+            'description': 'Manage customer interactions and relationships',
+            'audience': ['sales-teams', 'businesses', 'enterprise'],
+            'complexity': 'medium',
+            'requirements': ['crm-capabilities', 'integration'],
+            'benefits': ['customer-retention', 'sales-growth', 'insights']
+        },
+        {
+            'id': 'business_analytics',
+            'title': 'Business Analytics',
+            'description': 'Analyze business data and generate reports',
+            'audience': ['businesses', 'enterprise', 'analysts'],
+            'complexity': 'high',
+            'requirements': ['analytics-capabilities', 'data-processing'],
+            'benefits': ['insights', 'decision-making', 'optimization']
+        }
+    ],
+    'development': [
+        {
+            'id': 'code_development',
+            'title': 'Software Development',
+            'description': 'Develop and maintain software applications',
+            'audience': ['developers', 'teams', 'enterprise'],
+            'complexity': 'high',
+            'requirements': ['development-tools', 'performance'],
+            'benefits': ['productivity', 'quality', 'collaboration']
+        },
+        {
+            'id': 'code_review',
+            'title': 'Code Review & Quality Assurance',
+            'description': 'Review code and ensure quality standards',
+            'audience': ['developers', 'teams', 'enterprise'],
+            'complexity': 'medium',
+            'requirements': ['review-tools', 'integration'],
+            'benefits': ['quality', 'learning', 'consistency']
+        },
+        {
+            'id': 'testing_automation',
+            'title': 'Testing & Automation',
+            'description': 'Automate testing processes and quality assurance',
+            'audience': ['developers', 'qa-teams', 'enterprise'],
+            'complexity': 'medium',
+            'requirements': ['testing-tools', 'automation'],
+            'benefits': ['reliability', 'efficiency', 'coverage']
+        }
+    ],
+    'default': [
+        {
+            'id': 'productivity_improvement',
+            'title': 'Productivity Improvement',
+            'description': 'Improve overall productivity and efficiency',
+            'audience': ['individuals', 'small-business', 'enterprise'],
+            'complexity': 'low',
+            'requirements': ['usability', 'integration'],
+            'benefits': ['efficiency', 'time-savings', 'organization']
+        },
+        {
+            'id': 'cost_reduction',
+            'title': 'Cost Reduction',
+            'description': 'Reduce operational costs and improve ROI',
+            'audience': ['businesses', 'enterprise'],
+            'complexity': 'medium',
+            'requirements': ['analytics', 'automation'],
+            'benefits': ['cost-savings', 'efficiency', 'roi']
+        }
+    ]
+}
+
+USE_CASE_CATALOG = UseCaseCatalog(_USE_CASE_CATALOG_DATA)
@@ -2,7 +2,16 @@
 
 from celery_app import celery_app
 import structlog
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Mapping
+from types import MappingProxyType
+from functools import lru_cache
+import json
+
+from sqlalchemy import text
+
+from db import get_engine
+from redis_client import get_redis
+from criteria_recommender import get_suggested_criteria, load_suggested_criteria, index_version_key
 
 logger = structlog.get_logger()
 
@@ -16,10 +25,11 @@ def plan_criteria(self, planning_data: Dict[str, Any]) -> Dict[str, Any]:
         review_id = planning_data.get("review_id")
         category = planning_data.get("category")
         audience = planning_data.get("audience")
+        org_id = planning_data.get("org_id")
         
         logger.info("Starting criteria planning", review_id=review_id, category=category, audience=audience)
         
-        criteria = _generate_criteria(category, audience)
+        criteria = _generate_criteria(category, audience, org_id)
         
         result = {
             "review_id": review_id,
@@ -35,183 +45,311 @@ def plan_criteria(self, planning_data: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
-def _generate_criteria(category: str, audience: str) -> List[Dict[str, Any]]:
-    """Generate criteria based on category and audience"""
-    
-    # Base criteria templates by category
-    category_templates = {
-        "ai_video": [
-            {
-                "name": "Video Quality",
-                "description": "Output video resolution and visual quality",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.25
-            },
-            {
-                "name": "Generation Speed",
-                "description": "Time to generate video content",
-                "direction": "lower_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            },
-            {
-                "name": "AI Model Quality",
-                "description": "Sophistication of underlying AI models",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            },
-            {
-                "name": "Ease of Use",
-                "description": "User interface and workflow simplicity",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.15
-            },
-            {
-                "name": "Price per Video",
-                "description": "Cost per generated video",
-                "direction": "lower_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            }
-        ],
-        "ai_writing": [
-            {
-                "name": "Content Quality",
-                "description": "Writing quality and coherence",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.30
-            },
-            {
-                "name": "Customization",
-                "description": "Ability to customize tone and style",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            },
-            {
-                "name": "Speed",
-                "description": "Time to generate content",
-                "direction": "lower_better",
-                "normalization": "minmax",
-                "weight": 0.15
-            },
-            {
-                "name": "Plagiarism Check",
-                "description": "Built-in plagiarism detection",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.15
-            },
-            {
-                "name": "Price per Word",
-                "description": "Cost per generated word",
-                "direction": "lower_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            }
-        ],
-        "project_management": [
-            {
-                "name": "Feature Completeness",
-                "description": "Comprehensive project management features",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.25
-            },
-            {
-                "name": "Team Collaboration",
-                "description": "Multi-user collaboration capabilities",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.20
-            },
-            {
-                "name": "Integration Options",
-                "description": "Third-party integrations available",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.15
-            },
-            {
-                "name": "Learning Curve",
-                "description": "Ease of getting started",
-                "direction": "higher_better",
-                "normalization": "minmax",
-                "weight": 0.15
-            },
-            {
-                "name": "Price per User",
-                "description": "Monthly cost per team member",
-                "direction": "lower_better",
-                "normalization": "minmax",
-                "weight": 0.25
-            }
-        ]
-    }
-    
-    # Get base criteria for category
-    base_criteria = category_templates.get(category.lower(), [
+@celery_app.task(bind=True)
+def invalidate_criteria_templates(self, org_id: str) -> Dict[str, Any]:
+    """
+    Invalidate cached org criteria templates after they change
+    """
+    version = get_redis().incr(_template_version_key(org_id))
+    logger.info("Criteria templates invalidated", org_id=org_id, version=version)
+    return {"org_id": org_id, "version": version, "status": "completed"}
+
+
+def _freeze(criteria: List[Dict[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    """Freeze a list of criteria dicts into an immutable tuple"""
+    return tuple(MappingProxyType(dict(c)) for c in criteria)
+
+
+# Base criteria templates by category
+_CATEGORY_TEMPLATE_DATA = {
+    "ai_video": [
         {
-            "name": "Quality",
-            "description": "Overall product quality",
+            "name": "Video Quality",
+            "description": "Output video resolution and visual quality",
             "direction": "higher_better",
             "normalization": "minmax",
-            "weight": 0.30
+            "weight": 0.25
         },
         {
-            "name": "Price",
-            "description": "Product pricing",
+            "name": "Generation Speed",
+            "description": "Time to generate video content",
             "direction": "lower_better",
             "normalization": "minmax",
-            "weight": 0.30
+            "weight": 0.20
+        },
+        {
+            "name": "AI Model Quality",
+            "description": "Sophistication of underlying AI models",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.20
         },
         {
             "name": "Ease of Use",
-            "description": "User experience and simplicity",
+            "description": "User interface and workflow simplicity",
             "direction": "higher_better",
             "normalization": "minmax",
+            "weight": 0.15
+        },
+        {
+            "name": "Price per Video",
+            "description": "Cost per generated video",
+            "direction": "lower_better",
+            "normalization": "minmax",
             "weight": 0.20
+        }
+    ],
+    "ai_writing": [
+        {
+            "name": "Content Quality",
+            "description": "Writing quality and coherence",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.30
+        },
+        {
+            "name": "Customization",
+            "description": "Ability to customize tone and style",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.20
+        },
+        {
+            "name": "Speed",
+            "description": "Time to generate content",
+            "direction": "lower_better",
+            "normalization": "minmax",
+            "weight": 0.15
         },
         {
-            "name": "Features",
-            "description": "Feature completeness",
+            "name": "Plagiarism Check",
+            "description": "Built-in plagiarism detection",
             "direction": "higher_better",
             "normalization": "minmax",
+            "weight": 0.15
+        },
+        {
+            "name": "Price per Word",
+            "description": "Cost per generated word",
+            "direction": "lower_better",
+            "normalization": "minmax",
             "weight": 0.20
         }
-    ])
-    
-    # Adjust weights based on audience
-    audience_adjustments = {
-        "freelancers": {
-            "Price": 0.40,  # Higher weight on price
-            "Ease of Use": 0.25,  # Higher weight on simplicity
+    ],
+    "project_management": [
+        {
+            "name": "Feature Completeness",
+            "description": "Comprehensive project management features",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.25
         },
-        "enterprise": {
-            "Quality": 0.40,  # Higher weight on quality
-            "Features": 0.30,  # Higher weight on features
-            "Price": 0.20,  # Lower weight on price
+        {
+            "name": "Team Collaboration",
+            "description": "Multi-user collaboration capabilities",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.20
+        },
+        {
+            "name": "Integration Options",
+            "description": "Third-party integrations available",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.15
         },
-        "startups": {
-            "Price": 0.35,  # Moderate weight on price
-            "Features": 0.25,  # Moderate weight on features
-            "Ease of Use": 0.25,  # Moderate weight on ease
+        {
+            "name": "Learning Curve",
+            "description": "Ease of getting started",
+            "direction": "higher_better",
+            "normalization": "minmax",
+            "weight": 0.15
+        },
+        {
+            "name": "Price per User",
+            "description": "Monthly cost per team member",
+            "direction": "lower_better",
+            "normalization": "minmax",
+            "weight": 0.25
         }
+    ]
+}
+
+# Fallback criteria for unknown categories
+_DEFAULT_TEMPLATE_DATA = [
+    {
+        "name": "Quality",
+        "description": "Overall product quality",
+        "direction": "higher_better",
+        "normalization": "minmax",
+        "weight": 0.30
+    },
+    {
+        "name": "Price",
+        "description": "Product pricing",
+        "direction": "lower_better",
+        "normalization": "minmax",
+        "weight": 0.30
+    },
+    {
+        "name": "Ease of Use",
+        "description": "User experience and simplicity",
+        "direction": "higher_better",
+        "normalization": "minmax",
+        "weight": 0.20
+    },
+    {
+        "name": "Features",
+        "description": "Feature completeness",
+        "direction": "higher_better",
+        "normalization": "minmax",
+        "weight": 0.20
+    }
+]
+
+# Weight overrides by audience
+_AUDIENCE_ADJUSTMENT_DATA = {
+    "freelancers": {
+        "Price": 0.40,  # Higher weight on price
+        "Ease of Use": 0.25,  # Higher weight on simplicity
+    },
+    "enterprise": {
+        "Quality": 0.40,  # Higher weight on quality
+        "Features": 0.30,  # Higher weight on features
+        "Price": 0.20,  # Lower weight on price
+    },
+    "startups": {
+        "Price": 0.35,  # Moderate weight on price
+        "Features": 0.25,  # Moderate weight on features
+        "Ease of Use": 0.25,  # Moderate weight on ease
     }
+}
+
+
+CATEGORY_TEMPLATES: Mapping[str, Tuple[Mapping[str, Any], ...]] = MappingProxyType(
+    {category: _freeze(criteria) for category, criteria in _CATEGORY_TEMPLATE_DATA.items()}
+)
+DEFAULT_TEMPLATE = _freeze(_DEFAULT_TEMPLATE_DATA)
+AUDIENCE_ADJUSTMENTS: Mapping[str, Mapping[str, float]] = MappingProxyType(
+    {audience: MappingProxyType(weights) for audience, weights in _AUDIENCE_ADJUSTMENT_DATA.items()}
+)
+
+
+def _generate_criteria(category: str, audience: str, org_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Generate criteria based on category and audience"""
+    category, audience = (category or "").lower(), (audience or "").lower()
+    try:
+        template_version, index_version = _org_cache_versions(org_id) if org_id else (0, 0)
+        resolved = _resolve_criteria(category, audience, org_id, template_version, index_version)
+    except Exception as e:
+        # Cache versions, org templates or history unavailable: resolve without
+        # memoizing anything, so the real values are picked up once they are back
+        logger.warning("Could not resolve cached criteria", org_id=org_id, error=str(e))
+        resolved = _resolve_uncached(category, audience, org_id)
     
+    # Hand out copies so callers can't mutate the cached templates
+    return [dict(criterion) for criterion in resolved]
+
+
+@lru_cache(maxsize=1024)
+def _resolve_criteria(
+    category: str,
+    audience: str,
+    org_id: Optional[str],
+    template_version: int,
+    index_version: int
+) -> Tuple[Mapping[str, Any], ...]:
+    """Resolve audience-weighted, normalized criteria (memoized per org cache versions)"""
+    org_templates = _load_org_templates(org_id, template_version) if org_id else MappingProxyType({})
+    base_criteria = _template_criteria(category, org_templates) \
+        or (_load_historical_criteria(org_id, category, index_version) if org_id else None) \
+        or DEFAULT_TEMPLATE
+    return _weighted_criteria(base_criteria, audience)
+
+
+def _resolve_uncached(category: str, audience: str, org_id: Optional[str]) -> Tuple[Mapping[str, Any], ...]:
+    """Resolve criteria from whichever sources are reachable, memoizing nothing"""
+    org_templates: Mapping[str, Tuple[Mapping[str, Any], ...]] = MappingProxyType({})
+    if org_id:
+        try:
+            org_templates = _load_org_templates.__wrapped__(org_id, 0)
+        except Exception as e:
+            logger.warning("Could not load org criteria templates", org_id=org_id, error=str(e))
+    base_criteria = _template_criteria(category, org_templates) \
+        or (_freeze(get_suggested_criteria(org_id, category)) if org_id else None) \
+        or DEFAULT_TEMPLATE
+    return _weighted_criteria(base_criteria, audience)
+
+
+def _template_criteria(
+    category: str,
+    org_templates: Mapping[str, Tuple[Mapping[str, Any], ...]]
+) -> Optional[Tuple[Mapping[str, Any], ...]]:
+    # Precedence: org template, built-in template, then callers fall back to org history and the generic template
+    return org_templates.get(category) or CATEGORY_TEMPLATES.get(category)
+
+
+def _weighted_criteria(base_criteria: Tuple[Mapping[str, Any], ...], audience: str) -> Tuple[Mapping[str, Any], ...]:
     # Apply audience adjustments
-    adjustments = audience_adjustments.get(audience.lower(), {})
-    for criterion in base_criteria:
-        if criterion["name"] in adjustments:
-            criterion["weight"] = adjustments[criterion["name"]]
+    adjustments = AUDIENCE_ADJUSTMENTS.get(audience, {})
+    weights = [adjustments.get(c["name"], c["weight"]) for c in base_criteria]
     
     # Normalize weights to sum to 1.0
-    total_weight = sum(c["weight"] for c in base_criteria)
-    for criterion in base_criteria:
-        criterion["weight"] = criterion["weight"] / total_weight
+    total_weight = sum(weights) or 1.0
+    return tuple(
+        MappingProxyType({**criterion, "weight": weight / total_weight})
+        for criterion, weight in zip(base_criteria, weights)
+    )
+
+
+@lru_cache(maxsize=256)
+def _load_org_templates(org_id: str, template_version: int) -> Mapping[str, Tuple[Mapping[str, Any], ...]]:
+    """
+    Load an org's custom templates from the database (once per template
+    version). Database errors propagate so a failed load is never memoized.
+    """
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            text("SELECT category, criteria FROM criteria_templates WHERE org_id = :org_id"),
+            {"org_id": org_id}
+        ).fetchall()
+    
+    templates = {}
+    for category, criteria in rows:
+        if isinstance(criteria, str):
+            criteria = json.loads(criteria)
+        templates[category.lower()] = _freeze(criteria)
     
-    return base_criteria
+    logger.info("Loaded org criteria templates", org_id=org_id, version=template_version, categories=len(templates))
+    return MappingProxyType(templates)
+
+
+@lru_cache(maxsize=1024)
+def _load_historical_criteria(org_id: str, category: str, index_version: int) -> Tuple[Mapping[str, Any], ...]:
+    """
+    Criteria suggested by the org's review history (once per index version).
+    Redis errors propagate so a failed lookup is never memoized as "no history".
+    """
+    return _freeze(load_suggested_criteria(org_id, category))
+
+
+def _org_cache_versions(org_id: str) -> Tuple[int, int]:
+    """
+    Current (template, history index) versions for an org, in one round trip.
+    Redis errors propagate: memoizing under a guessed version would outlive the outage.
+    """
+    template_version, index_version = get_redis().mget(
+        _template_version_key(org_id), index_version_key(org_id)
+    )
+    return int(template_version or 0), int(index_version or 0)
+
+
+def _template_version_key(org_id: str) -> str:
+    return f"criteria_templates:{org_id}:version"
+
+
+def clear_criteria_cache() -> None:
+    """Drop memoized criteria and org templates"""
+    _resolve_criteria.cache_clear()
+    _load_org_templates.cache_clear()
+    _load_historical_criteria.cache_clear()
@@ -0,0 +1,304 @@
+from celery_app import celery_app
+import structlog
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+import math
+
+from redis import WatchError
+from sqlalchemy import text
+
+from db import get_engine
+from redis_client import get_redis
+
+logger = structlog.get_logger()
+
+WATERMARK_KEY = "criteria_index:watermark"
+FOLDED_KEY = "criteria_index:folded"
+WATERMARK_OVERLAP = timedelta(minutes=5)  # Re-read window for rows committed late with an earlier timestamp
+MAX_SUGGESTED_CRITERIA = 6
+MIN_SUPPORT = 0.2  # Criterion must appear in at least 20% of a category's reviews
+MAX_TRACKED_CRITERIA = 50  # Co-occurrence is kept for the most frequent criteria only
+
+# Criteria and scores are append-only, so everything since the watermark that
+# is not in the folded set is new criteria or new scores. Reading starts an
+# overlap window behind the watermark; the folded set holds the ids inside that
+# window already merged. Every criterion of a touched review is read (for
+# co-occurrence with its new criteria), with score stats over new scores only.
+_HISTORY_QUERY = """
+    SELECT r.id, r.org_id, lower(r.category), c.name, c.description, c.direction,
+           c.normalization, c.weight, avg(s.normalized), avg(s.normalized * s.normalized),
+           count(s.id), c.created_at > :since AND NOT (c.id::text = ANY(:folded_criteria)),
+           c.id::text, c.created_at,
+           array_agg(s.id::text) FILTER (WHERE s.id IS NOT NULL),
+           array_agg(s.created_at) FILTER (WHERE s.id IS NOT NULL)
+    FROM criteria c
+    JOIN reviews r ON r.id = c.review_id
+    LEFT JOIN scores s ON s.criteria_id = c.id AND s.created_at > :since
+        AND NOT (s.id::text = ANY(:folded_scores))
+    WHERE c.review_id IN (
+        SELECT review_id FROM criteria
+        WHERE created_at > :since AND NOT (id::text = ANY(:folded_criteria))
+        UNION
+        SELECT c2.review_id FROM scores s2 JOIN criteria c2 ON c2.id = s2.criteria_id
+        WHERE s2.created_at > :since AND NOT (s2.id::text = ANY(:folded_scores))
+    )
+    GROUP BY r.id, c.id
+"""
+
+
+@celery_app.task(bind=True, name="criteria_recommender.rebuild_criteria_index")
+def rebuild_criteria_index(self, rebuild_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Fold criteria and scores added since the last run into the per-category
+    suggestion index (pass {"full": True} to rebuild from scratch)
+
+    All states, suggestions and the watermark are written in one MULTI, so a
+    crash or retry never applies a delta twice; a concurrent rebuild that
+    commits first aborts this one.
+    """
+    try:
+        full = bool((rebuild_data or {}).get("full"))
+        with get_redis().pipeline() as pipe:
+            pipe.watch(WATERMARK_KEY)
+            watermark = None if full else pipe.get(WATERMARK_KEY)
+            stored_folded = pipe.get(FOLDED_KEY) if watermark else None
+            folded = json.loads(stored_folded) if stored_folded else _empty_folded()
+
+            logger.info("Starting criteria index rebuild", full=full, watermark=watermark)
+
+            rows, new_watermark, folded = _fetch_history(watermark, folded)
+            groups = _group_reviews(rows)
+
+            updates = []
+            for (org_id, category), reviews in groups.items():
+                stored = None if full else pipe.get(_state_key(org_id, category))
+                state = _merge_reviews(json.loads(stored) if stored else _empty_state(), reviews)
+                updates.append((org_id, category, state, _build_suggestion(state)))
+
+            pipe.multi()
+            for org_id, category, state, suggestion in updates:
+                pipe.set(_state_key(org_id, category), json.dumps(state))
+                pipe.set(_suggestion_key(org_id, category), json.dumps(suggestion))
+            for org_id in sorted({org_id for org_id, *_rest in updates}):
+                pipe.incr(index_version_key(org_id))
+            if new_watermark:
+                pipe.set(WATERMARK_KEY, new_watermark)
+                pipe.set(FOLDED_KEY, json.dumps(folded))
+            pipe.execute()
+
+        result = {
+            "categories_updated": len(groups),
+            "reviews_indexed": sum(len(reviews) for reviews in groups.values()),
+            "watermark": new_watermark or watermark,
+            "status": "completed"
+        }
+
+        logger.info("Criteria index rebuild completed", **result)
+        return result
+
+    except WatchError:
+        logger.warning("Criteria index rebuilt concurrently, dropping this run")
+        return {"categories_updated": 0, "reviews_indexed": 0, "status": "superseded"}
+
+    except Exception as e:
+        logger.error("Criteria index rebuild failed", error=str(e))
+        raise
+
+
+def get_suggested_criteria(org_id: str, category: str) -> List[Dict[str, Any]]:
+    """Precomputed historical criteria for an org/category (single key lookup)"""
+    try:
+        return load_suggested_criteria(org_id, category)
+    except Exception as e:
+        logger.warning("Could not read criteria suggestions", org_id=org_id, category=category, error=str(e))
+        return []
+
+
+def load_suggested_criteria(org_id: str, category: str) -> List[Dict[str, Any]]:
+    """Like get_suggested_criteria, but Redis errors propagate instead of reading as no history"""
+    stored = get_redis().get(_suggestion_key(org_id, category))
+    return json.loads(stored) if stored else []
+
+
+def index_version_key(org_id: str) -> str:
+    return f"criteria_index:{org_id}:version"
+
+
+def _state_key(org_id: str, category: str) -> str:
+    return f"criteria_index:{org_id}:{category}:state"
+
+
+def _suggestion_key(org_id: str, category: str) -> str:
+    return f"criteria_index:{org_id}:{category}:suggested"
+
+
+def _empty_folded() -> Dict[str, Dict[str, str]]:
+    return {"criteria": {}, "scores": {}}
+
+
+def _fetch_history(
+    watermark: Optional[str],
+    folded: Dict[str, Dict[str, str]]
+) -> Tuple[List[tuple], Optional[str], Dict[str, Dict[str, str]]]:
+    """
+    Fetch per-criterion history rows of reviews with criteria or scores not yet
+    folded in, reading from an overlap window behind the watermark. Returns the
+    rows, the new watermark (None when nothing is new) and the folded ids still
+    inside the new overlap window.
+    """
+    since = datetime.fromisoformat(watermark) - WATERMARK_OVERLAP if watermark else "-infinity"
+    with get_engine().connect() as conn:
+        rows = conn.execute(text(_HISTORY_QUERY), {
+            "since": since,
+            "folded_criteria": list(folded["criteria"]),
+            "folded_scores": list(folded["scores"]),
+        }).fetchall()
+
+    folded = {kind: dict(ids) for kind, ids in folded.items()}
+    changed_at = []
+    for row in rows:
+        criterion_id, created_at, score_ids, score_created_at = row[12:16]
+        if row[11]:
+            folded["criteria"][criterion_id] = created_at.isoformat()
+            changed_at.append(created_at)
+        for score_id, score_created in zip(score_ids or [], score_created_at or []):
+            folded["scores"][score_id] = score_created.isoformat()
+            changed_at.append(score_created)
+    if not changed_at:
+        return rows, None, folded
+
+    # Newest criterion or score folded in, so later scores on old criteria are picked up;
+    # late rows behind the watermark never move it back
+    newest = max(changed_at)
+    if watermark:
+        newest = max(newest, datetime.fromisoformat(watermark))
+    cutoff = newest - WATERMARK_OVERLAP
+    folded = {
+        kind: {item_id: ts for item_id, ts in ids.items() if datetime.fromisoformat(ts) > cutoff}
+        for kind, ids in folded.items()
+    }
+    return rows, newest.isoformat(), folded
+
+
+def _group_reviews(rows: List[tuple]) -> Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]]:
+    """Group history rows into {(org_id, category): {review_id: [criterion, ...]}}"""
+    groups: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+    for (review_id, org_id, category, name, description, direction, normalization,
+         weight, score_mean, score_sq_mean, score_count, is_new, *_folded_ids) in rows:
+        groups[(str(org_id), category)][str(review_id)].append({
+            "name": name,
+            "description": description,
+            "direction": direction,
+            "normalization": normalization,
+            "weight": float(weight or 0),
+            "score_mean": float(score_mean or 0),
+            "score_sq_mean": float(score_sq_mean or 0),
+            "score_count": int(score_count or 0),
+            "new": bool(is_new),
+        })
+    return groups
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"reviews": 0, "criteria": {}, "cooccurrence": {}}
+
+
+def _merge_reviews(state: Dict[str, Any], reviews: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge a batch of reviews' criteria into the running aggregate. Criteria
+    already indexed (new=False) only add the stats of their new scores.
+    """
+    stats = state["criteria"]
+    cooccurrence = state["cooccurrence"]
+
+    for review_criteria in reviews.values():
+        new_keys = {c["name"].strip().lower() for c in review_criteria if c.get("new", True)}
+        if all(c.get("new", True) for c in review_criteria):
+            state["reviews"] += 1
+        keys = sorted({c["name"].strip().lower() for c in review_criteria})
+
+        for criterion in review_criteria:
+            key = criterion["name"].strip().lower()
+            entry = stats.setdefault(key, {
+                "name": criterion["name"],
+                "description": criterion.get("description") or "",
+                "direction": criterion.get("direction") or "higher_better",
+                "normalization": criterion.get("normalization") or "minmax",
+                "count": 0,
+                "weight_sum": 0.0,
+                "score_sum": 0.0,
+                "score_sq_sum": 0.0,
+                "score_count": 0,
+            })
+            if criterion.get("new", True):
+                entry["count"] += 1
+                entry["weight_sum"] += criterion["weight"]
+            entry["score_sum"] += criterion["score_mean"] * criterion["score_count"]
+            entry["score_sq_sum"] += criterion["score_sq_mean"] * criterion["score_count"]
+            entry["score_count"] += criterion["score_count"]
+
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                if a in new_keys or b in new_keys:
+                    pair = f"{a}|{b}"
+                    cooccurrence[pair] = cooccurrence.get(pair, 0) + 1
+
+    # Bound the co-occurrence table to the most frequent criteria
+    tracked = set(sorted(stats, key=lambda k: stats[k]["count"], reverse=True)[:MAX_TRACKED_CRITERIA])
+    state["cooccurrence"] = {
+        pair: count for pair, count in cooccurrence.items()
+        if all(k in tracked for k in pair.split("|"))
+    }
+    return state
+
+
+def _build_suggestion(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Pick a coherent criteria set: start from the most frequent criterion and
+    greedily add the candidate that most often co-occurs with those chosen.
+    """
+    total_reviews = state["reviews"]
+    if not total_reviews:
+        return []
+
+    stats = state["criteria"]
+    candidates = [k for k, v in stats.items() if v["count"] / total_reviews >= MIN_SUPPORT]
+
+    def discrimination(key: str) -> float:
+        # Criteria whose scores spread products apart are more useful for ranking
+        entry = stats[key]
+        if not entry["score_count"]:
+            return 0.0
+        mean = entry["score_sum"] / entry["score_count"]
+        return math.sqrt(max(entry["score_sq_sum"] / entry["score_count"] - mean * mean, 0.0))
+
+    def pair_count(a: str, b: str) -> int:
+        return state["cooccurrence"].get(f"{min(a, b)}|{max(a, b)}", 0)
+
+    candidates.sort(key=lambda k: (stats[k]["count"], discrimination(k)), reverse=True)
+    chosen: List[str] = candidates[:1]
+    remaining = candidates[1:]
+    while remaining and len(chosen) < MAX_SUGGESTED_CRITERIA:
+        best = max(remaining, key=lambda k: (
+            sum(pair_count(k, c) for c in chosen) / stats[k]["count"],
+            stats[k]["count"],
+        ))
+        chosen.append(best)
+        remaining.remove(best)
+
+    mean_weights = [stats[k]["weight_sum"] / stats[k]["count"] for k in chosen]
+    total_weight = sum(mean_weights) or 1.0
+
+    return [
+        {
+            "name": stats[k]["name"],
+            "description": stats[k]["description"],
+            "direction": stats[k]["direction"],
+            "normalization": stats[k]["normalization"],
+            "weight": weight / total_weight,
+            "support": round(stats[k]["count"] / total_reviews, 3),
+        }
+        for k, weight in zip(chosen, mean_weights)
+    ]
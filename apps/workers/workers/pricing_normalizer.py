@@ -2,9 +2,11 @@
 
 from celery_app import celery_app
 import structlog
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 import re
-import requests
+
+from fx_rates import FxSnapshot, get_fx_table, parse_date
 
 logger = structlog.get_logger()
 
@@ -17,18 +19,23 @@ def normalize_pricing(self, pricing_data: Dict[str, Any]) -> Dict[str, Any]:
     try:
         product_id = pricing_data.get("product_id")
         raw_pricing = pricing_data.get("pricing_data")
+        as_of = pricing_data.get("as_of")
         
         logger.info("Starting pricing normalization", product_id=product_id)
         
+        # Resolve the FX snapshot once so historical reviews reproduce
+        fx_snapshot = get_fx_table().snapshot(parse_date(as_of) if as_of else None)
+        
         normalized_pricing = []
         
         for price_item in raw_pricing:
-            normalized = _normalize_price_item(price_item)
+            normalized = _normalize_price_item(price_item, fx_snapshot)
             normalized_pricing.append(normalized)
         
         result = {
             "product_id": product_id,
             "normalized_pricing": normalized_pricing,
+            "fx_snapshot_date": fx_snapshot.effective_date.isoformat(),
             "status": "completed"
         }
         
@@ -40,7 +47,69 @@ def normalize_pricing(self, pricing_data: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
-def _normalize_price_item(price_item: Dict[str, Any]) -> Dict[str, Any]:
+@celery_app.task(bind=True)
+def estimate_costs_at_scale(self, estimate_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Estimate USD/month cost at given seat/render volumes for every product in a review
+    """
+    try:
+        review_id = estimate_data.get("review_id")
+        products = estimate_data.get("products", [])
+        seats = np.asarray(estimate_data.get("seats", [1]), dtype=float)
+        renders = np.asarray(estimate_data.get("renders", [0]), dtype=float)
+        seats, renders = np.broadcast_arrays(seats, renders)
+        
+        logger.info("Starting cost-at-scale estimation", review_id=review_id, products=len(products), points=len(seats))
+        
+        plans = []
+        for product in products:
+            for item in product.get("normalized_pricing", []):
+                if item.get("pricing_model"):
+                    plans.append((product.get("product_id"), item))
+        
+        curves = CostCurves([item["pricing_model"] for _, item in plans])
+        plan_costs = curves.cost(seats, renders)  # plans x points
+        
+        # Cheapest plan per product at each volume
+        estimates = {}
+        for plan_index, (product_id, item) in enumerate(plans):
+            current = estimates.get(product_id)
+            if current is None:
+                estimates[product_id] = (plan_costs[plan_index].copy(), np.full(len(seats), plan_index))
+            else:
+                cheaper = plan_costs[plan_index] < current[0]
+                current[0][cheaper] = plan_costs[plan_index][cheaper]
+                current[1][cheaper] = plan_index
+        
+        result = {
+            "review_id": review_id,
+            "estimates": [
+                {
+                    "product_id": product_id,
+                    "costs": [
+                        {
+                            "seats": float(seats[i]),
+                            "renders": float(renders[i]),
+                            "usd_monthly": round(float(costs[i]), 2),
+                            "plan": plans[best[i]][1].get("original_price"),
+                        }
+                        for i in range(len(seats))
+                    ],
+                }
+                for product_id, (costs, best) in estimates.items()
+            ],
+            "status": "completed"
+        }
+        
+        logger.info("Cost-at-scale estimation completed", review_id=review_id)
+        return result
+        
+    except Exception as e:
+        logger.error("Cost-at-scale estimation failed", review_id=review_id, error=str(e))
+        raise
+
+
+def _normalize_price_item(price_item: Dict[str, Any], fx_snapshot: FxSnapshot) -> Dict[str, Any]:
     """Normalize a single price item"""
     original_price = price_item.get("price", "")
     original_currency = price_item.get("currency", "USD")
@@ -50,13 +119,25 @@ def _normalize_price_item(price_item: Dict[str, Any]) -> Dict[str, Any]:
     numeric_value = _extract_numeric_value(original_price)
     
     # Convert to USD if needed
-    usd_value = _convert_to_usd(numeric_value, original_currency)
+    usd_value = _convert_to_usd(numeric_value, original_currency, fx_snapshot)
     
     # Normalize to monthly
-    monthly_value = _normalize_to_monthly(usd_value, billing_period)
+    monthly_value = _normalize_to_monthly(usd_value, billing_period) if usd_value is not None else None
     
     # Extract caveats
     caveats = _extract_caveats(price_item)
+    if usd_value is None:
+        caveats.append(f"No exchange rate for {original_currency.upper()}; USD price unavailable")
+    
+    per_seat = "per seat" in original_price.lower() or "per user" in original_price.lower()
+    per_render = "per render" in original_price.lower() or "per generation" in original_price.lower()
+    
+    # Tiered model in USD/month: structured tiers when provided, else the flat price
+    if usd_value is None:
+        pricing_model = None
+    else:
+        usd_monthly_factor = _normalize_to_monthly(_convert_to_usd(1.0, original_currency, fx_snapshot), billing_period)
+        pricing_model = _build_pricing_model(price_item.get("tiers"), usd_monthly_factor, monthly_value, per_seat, per_render)
     
     return {
         "original_price": original_price,
@@ -64,11 +145,129 @@ def _normalize_price_item(price_item: Dict[str, Any]) -> Dict[str, Any]:
         "billing_period": billing_period,
         "usd_monthly": monthly_value,
         "caveats": caveats,
-        "per_seat": "per seat" in original_price.lower() or "per user" in original_price.lower(),
-        "per_render": "per render" in original_price.lower() or "per generation" in original_price.lower(),
+        "per_seat": per_seat,
+        "per_render": per_render,
+        "pricing_model": pricing_model,
+    }
+
+
+def _build_pricing_model(
+    tiers: Optional[Dict[str, Any]],
+    usd_monthly_factor: float,
+    monthly_value: float,
+    per_seat: bool,
+    per_render: bool
+) -> Dict[str, Any]:
+    """
+    Build a tiered pricing model in USD/month.
+    
+    Structured tiers look like:
+        {"base": 49, "seats": {"included": 3, "brackets": [{"up_to": 10, "unit_price": 12}, {"up_to": None, "unit_price": 9}]},
+         "renders": {"included": 100, "brackets": [{"up_to": 1000, "unit_price": 0.5}], "overage": 0.8}}
+    """
+    if not tiers:
+        flat = {"included": 0, "brackets": [{"up_to": None, "unit_price": monthly_value}]}
+        return {
+            "base": 0.0 if (per_seat or per_render) else monthly_value,
+            "seats": flat if per_seat else None,
+            "renders": flat if per_render and not per_seat else None,
+        }
+    
+    def scale_dimension(spec: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not spec:
+            return None
+        return {
+            "included": float(spec.get("included", 0)),
+            "brackets": [
+                {"up_to": b.get("up_to"), "unit_price": float(b["unit_price"]) * usd_monthly_factor}
+                for b in spec.get("brackets", [])
+            ],
+            "overage": float(spec["overage"]) * usd_monthly_factor if spec.get("overage") is not None else None,
+        }
+    
+    return {
+        "base": float(tiers.get("base", 0)) * usd_monthly_factor,
+        "seats": scale_dimension(tiers.get("seats")),
+        "renders": scale_dimension(tiers.get("renders")),
     }
 
 
+def _compile_dimension(spec: Optional[Dict[str, Any]]) -> Tuple[List[float], List[float], List[float]]:
+    """Compile a usage dimension into breakpoints, cumulative costs and segment slopes"""
+    if not spec:
+        return [0.0], [0.0], [0.0]
+    
+    # Segments as (start, slope); usage up to `included` is free
+    segments = [(0.0, 0.0)]
+    start = float(spec.get("included", 0))
+    last_price = 0.0
+    for bracket in spec.get("brackets", []):
+        last_price = float(bracket["unit_price"])
+        segments.append((start, last_price))
+        if bracket.get("up_to") is None:
+            break
+        start = max(start, float(bracket["up_to"]))
+    else:
+        overage = spec.get("overage")
+        segments.append((start, float(overage) if overage is not None else last_price))
+    
+    # Later segments win when two start at the same point (zero-length segments)
+    deduped: Dict[float, float] = {}
+    for seg_start, slope in segments:
+        deduped[seg_start] = slope
+    
+    breakpoints = sorted(deduped)
+    slopes = [deduped[x] for x in breakpoints]
+    costs = [0.0]
+    for k in range(1, len(breakpoints)):
+        costs.append(costs[-1] + slopes[k - 1] * (breakpoints[k] - breakpoints[k - 1]))
+    
+    return breakpoints, costs, slopes
+
+
+class CostCurves:
+    """
+    Piecewise-linear cost curves for many pricing models, padded into arrays so
+    cost-at-volume queries are evaluated for all plans at once.
+    """
+    
+    def __init__(self, pricing_models: List[Dict[str, Any]]):
+        self.base = np.array([float(m.get("base") or 0.0) for m in pricing_models])
+        self.seats = self._pad([_compile_dimension(m.get("seats")) for m in pricing_models])
+        self.renders = self._pad([_compile_dimension(m.get("renders")) for m in pricing_models])
+    
+    @staticmethod
+    def _pad(compiled: List[Tuple[List[float], List[float], List[float]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        width = max((len(x) for x, _, _ in compiled), default=1)
+        breakpoints = np.full((len(compiled), width), np.inf)
+        costs = np.zeros((len(compiled), width))
+        slopes = np.zeros((len(compiled), width))
+        for i, (x, y, s) in enumerate(compiled):
+            breakpoints[i, :len(x)] = x
+            costs[i, :len(y)] = y
+            slopes[i, :len(s)] = s
+        return breakpoints, costs, slopes
+    
+    @staticmethod
+    def _evaluate(curve: Tuple[np.ndarray, np.ndarray, np.ndarray], volume: np.ndarray) -> np.ndarray:
+        breakpoints, costs, slopes = curve
+        # Active segment per (plan, query): last breakpoint <= volume
+        segment = (breakpoints[:, :, None] <= volume[None, None, :]).sum(axis=1) - 1
+        segment = np.maximum(segment, 0)
+        x = np.take_along_axis(breakpoints, segment, axis=1)
+        y = np.take_along_axis(costs, segment, axis=1)
+        s = np.take_along_axis(slopes, segment, axis=1)
+        return y + s * (volume[None, :] - x)
+    
+    def cost(self, seats: np.ndarray, renders: np.ndarray) -> np.ndarray:
+        """USD/month cost for each plan (rows) at each (seats, renders) point (columns)"""
+        seats = np.atleast_1d(np.asarray(seats, dtype=float))
+        renders = np.atleast_1d(np.asarray(renders, dtype=float))
+        if len(self.base) == 0:
+            return np.zeros((0, len(seats)))
+        return self.base[:, None] + self._evaluate(self.seats, seats) + self._evaluate(self.renders, renders)
+
+
 def _extract_numeric_value(price_string: str) -> float:
     """Extract numeric value from price string"""
     # Remove currency symbols and extract numbers
@@ -78,23 +277,12 @@ def _extract_numeric_value(price_string: str) -> float:
     return 0.0
 
 
-def _convert_to_usd(value: float, currency: str) -> float:
-    """Convert value to USD using exchange rates"""
+def _convert_to_usd(value: float, currency: str, fx_snapshot: FxSnapshot) -> Optional[float]:
+    """Convert value to USD using the FX snapshot; None if the currency is unknown"""
     if currency.upper() == "USD":
         return value
     
-    # TODO: Implement real exchange rate API
-    # For now, use placeholder rates
-    rates = {
-        "EUR": 1.1,
-        "GBP": 1.3,
-        "CAD": 0.75,
-        "AUD": 0.65,
-        "JPY": 0.007,
-    }
-    
-    rate = rates.get(currency.upper(), 1.0)
-    return value * rate
+    return fx_snapshot.to_usd(value, currency)
 
 
 def _normalize_to_monthly(value: float, billing_period: str) -> float:
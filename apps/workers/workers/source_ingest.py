@@ -5,9 +5,11 @@ import structlog
 from typing import Dict, Any
 import requests
 from bs4 import BeautifulSoup
-import boto3
+from datetime import datetime
 import json
 
+from storage import get_storage
+
 logger = structlog.get_logger()
 
 
@@ -89,8 +91,15 @@ def _extract_csv_content(file_path: str) -> str:
 
 def _store_snapshot(source_id: str, content: str, source_type: str) -> str:
     """Store content snapshot to S3"""
-    # TODO: Implement S3 storage
-    return f"snapshots/{source_id}/{source_type}.json"
+    snapshot_key = f"snapshots/{source_id}/{source_type}.json"
+    snapshot = {
+        "source_id": source_id,
+        "type": source_type,
+        "content": content,
+        "captured_at": datetime.utcnow().isoformat()
+    }
+    get_storage().put(snapshot_key, json.dumps(snapshot).encode("utf-8"), "application/json")
+    return snapshot_key
 
 
 def _extract_citations(content: str, source_url: str) -> list:
@@ -123,6 +123,24 @@ CREATE TABLE criteria (
     created_at TIMESTAMPTZ DEFAULT now()
 );
 
+CREATE TABLE criteria_templates (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID REFERENCES orgs(id),
+    category TEXT NOT NULL,
+    criteria JSONB NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(org_id, category)
+);
+
+CREATE TABLE use_case_catalogs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    org_id UUID REFERENCES orgs(id),
+    category TEXT NOT NULL,
+    use_cases JSONB NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(org_id, category)
+);
+
 CREATE TABLE scores (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     review_id UUID REFERENCES reviews(id),
@@ -259,6 +277,9 @@ CREATE INDEX idx_sources_review_id ON sources (review_id);
 CREATE INDEX idx_products_review_id ON products (review_id);
 CREATE INDEX idx_criteria_review_id ON criteria (review_id);
 CREATE INDEX idx_scores_review_id ON scores (review_id);
+CREATE INDEX idx_scores_criteria_id ON scores (criteria_id);
+CREATE INDEX idx_criteria_created_at ON criteria (created_at);
+CREATE INDEX idx_scores_created_at ON scores (created_at);
 CREATE INDEX idx_rankings_review_id ON rankings (review_id);
 CREATE INDEX idx_writeups_review_id ON writeups (review_id);
 CREATE INDEX idx_sections_review_id ON document_sections (review_id);